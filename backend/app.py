@@ -1,18 +1,69 @@
+import asyncio
 import os
+import time
 from decimal import Decimal
-from typing import List, Optional
+from typing import Callable, List, Optional, TypeVar
 
-from fastapi import Depends, FastAPI, Header, HTTPException, status
+from anyio import to_thread
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response, WebSocket, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-
-from . import schemas
-from .auth import create_access_token, decode_access_token, get_password_hash, verify_password
-from .db import Base, SessionLocal, engine, get_db
-from .models import League, Lineup, LineupSlot, Membership, Player, Squad, SquadPlayer, User
-from .seed_players import seed_players
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import (
+    autolineup,
+    ingest,
+    lineups,
+    optimizer,
+    player_history,
+    player_search,
+    schedule,
+    schemas,
+    standings,
+    transfers,
+)
+from .auth import (
+    AuthUser,
+    HasherBusy,
+    create_user_token,
+    decode_access_token,
+    get_password_hash,
+    needs_rehash,
+    password_hasher,
+    token_versions,
+    verify_password,
+)
+from .broker import Subscription
+from .catalog import player_catalog, serialize_player
+from .db import (
+    AsyncSessionLocal,
+    async_engine,
+    async_write_engine,
+    check_schema,
+    engine,
+    get_async_db,
+    get_async_write_db,
+    write_engine,
+)
+from .idempotency import IdempotencyMiddleware, idempotency_store
+from .memberships import membership_cache
+from .metrics import MetricsMiddleware, instrument_engines, metrics
+from .models import Kickoff, League, Membership, Player, Squad, SquadPlayer, User
+from .ratelimit import rate_limiter
+from .responses import RowsResponse
+from .schedule import clock, kickoff_schedule
+from .scoring import apply_stat_lines
+from .standings_feed import standings_feed
+
+T = TypeVar("T")
 
 app = FastAPI(title="GridCap API", openapi_url="/api/openapi.json", docs_url="/api/docs")
+# Innermost, so replays are still timed by the metrics middleware. It also runs the rate limiter, inside
+# CORS so that 429 responses still carry CORS headers and browsers can read Retry-After.
+app.add_middleware(IdempotencyMiddleware, store=idempotency_store, limiter=rate_limiter)
 # ---- CORS SETUP (paste this right after app = FastAPI(...)) ----
 import os
 from fastapi.middleware.cors import CORSMiddleware
@@ -30,27 +81,49 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],  # includes Authorization, Content-Type
+    expose_headers=["ETag", "Idempotent-Replayed", "Retry-After", "X-Next-Cursor"],
 )
 
 # You can still export FRONTEND_ORIGIN in your hosting env; the regex above
 # will allow Vercel previews and the exact origin will also be valid.
 
-
-Base.metadata.create_all(bind=engine)
+# Added last so it wraps everything else and times the whole request.
+app.add_middleware(MetricsMiddleware, registry=metrics)
+instrument_engines([engine, write_engine, async_engine, async_write_engine])
+metrics.gauge(
+    "gridcap_threadpool_threads_busy",
+    "Threads of the request threadpool running sync code.",
+    lambda: to_thread.current_default_thread_limiter().borrowed_tokens,
+)
+metrics.gauge(
+    "gridcap_threadpool_tasks_waiting",
+    "Sync calls waiting for a request threadpool thread.",
+    lambda: to_thread.current_default_thread_limiter().statistics().tasks_waiting,
+)
+metrics.gauge("gridcap_password_hasher_jobs", "bcrypt jobs running or queued.", lambda: password_hasher.pending)
+metrics.gauge(
+    "gridcap_membership_cache_hit_ratio",
+    "Share of league authorization checks answered from the membership cache.",
+    lambda: membership_cache.hit_ratio,
+)
+metrics.gauge("gridcap_membership_cache_users", "Users with cached league memberships.", lambda: len(membership_cache))
+metrics.gauge(
+    "gridcap_rate_limited_requests", "Requests refused with 429 by the rate limiter.", lambda: rate_limiter.limited
+)
+metrics.gauge(
+    "gridcap_idempotent_replays",
+    "Write requests answered from the Idempotency-Key store.",
+    lambda: idempotency_store.replayed,
+)
 
 
 @app.on_event("startup")
 def on_startup() -> None:
-    db = SessionLocal()
-    try:
-        seed_players(db)
-    finally:
-        db.close()
+    # Migrations and seeding run at deploy time (python -m backend.manage migrate --seed).
+    check_schema(engine)
 
 
-def get_current_user(
-    db: Session = Depends(get_db), authorization: Optional[str] = Header(None)
-) -> User:
+def read_token(authorization: Optional[str]) -> dict:
     if authorization is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing token")
     token = authorization.replace("Bearer ", "")
@@ -58,207 +131,701 @@ def get_current_user(
         payload = decode_access_token(token)
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    user_id = payload.get("sub")
-    if user_id is None:
+    if payload.get("sub") is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    return payload
+
+
+async def load_token_user(db: AsyncSession, payload: dict) -> User:
+    user = await db.get(User, int(payload["sub"]))
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    token_versions.record(user.id, user.token_version)
+    if payload.get("tv", 0) != user.token_version:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
     return user
 
 
-def serialize_player(player: Player) -> dict:
-    return {
-        "id": player.id,
-        "name": player.name,
-        "position": player.position,
-        "team": player.team,
-        "cost": float(player.cost),
-    }
+async def get_current_user(authorization: Optional[str] = Header(None)) -> AuthUser:
+    """Authenticate from the signed claims and the user's token version.
+
+    The version comes from ``token_versions`` when this process has a fresh
+    one, so most requests run no query; otherwise it is read from ``users``.
+    Tokens without claims load the whole user row.
+    """
+    payload = read_token(authorization)
+    if "name" not in payload or "tv" not in payload:
+        async with AsyncSessionLocal() as db:
+            user = await load_token_user(db, payload)
+        return AuthUser(id=user.id, name=user.name)
+    user_id = int(payload["sub"])
+    version = token_versions.get(user_id)
+    if version is None:
+        async with AsyncSessionLocal() as db:
+            version = await db.scalar(select(User.token_version).where(User.id == user_id))
+        if version is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        token_versions.record(user_id, version)
+    if payload["tv"] != version:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+    return AuthUser(id=user_id, name=payload["name"])
+
+
+async def get_current_db_user(
+    db: AsyncSession = Depends(get_async_db), authorization: Optional[str] = Header(None)
+) -> User:
+    return await load_token_user(db, read_token(authorization))
 
 
-@app.post("/api/auth/register", response_model=schemas.AuthResponse)
-def register_user(payload: schemas.UserCreate, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.email == payload.email.lower()).first()
-    if existing:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-    user = User(name=payload.name.strip(), email=payload.email.lower(), password_hash=get_password_hash(payload.password))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    if not ADMIN_TOKEN or x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin token required")
+
+
+async def find_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    return await db.scalar(select(User).where(User.email == email))
+
+
+async def insert_user(db: AsyncSession, user: User) -> bool:
     db.add(user)
-    db.commit()
-    db.refresh(user)
-    token = create_access_token({"sub": user.id})
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return False
+    return True
+
+
+async def update_user(db: AsyncSession, user_id: int, **values) -> None:
+    await db.execute(update(User).where(User.id == user_id).values(**values))
+    await db.commit()
+
+
+def hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many password checks in progress, retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def shed_when_hasher_saturated() -> None:
+    if password_hasher.saturated:
+        raise hasher_busy()
+
+
+async def run_password_hasher(func: Callable[..., T], *args) -> T:
+    try:
+        return await password_hasher.run(func, *args)
+    except HasherBusy:
+        raise hasher_busy()
+
+
+@app.post(
+    "/api/auth/register", response_model=schemas.AuthResponse, dependencies=[Depends(shed_when_hasher_saturated)]
+)
+async def register_user(
+    payload: schemas.UserCreate,
+    db: AsyncSession = Depends(get_async_db),
+    write_db: AsyncSession = Depends(get_async_write_db),
+):
+    email = payload.email.lower()
+    if await find_user_by_email(db, email):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
+    # Hash before touching the writer so the write lock is never held across bcrypt.
+    password_hash = await run_password_hasher(get_password_hash, payload.password)
+    user = User(name=payload.name.strip(), email=email, password_hash=password_hash)
+    if not await insert_user(write_db, user):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
+    token_versions.record(user.id, user.token_version)
+    token = create_user_token(user.id, user.name, user.token_version)
     return schemas.AuthResponse(id=user.id, name=user.name, email=user.email, token=token)
 
 
-@app.post("/api/auth/login", response_model=schemas.AuthResponse)
-def login_user(payload: schemas.UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == payload.email.lower()).first()
-    if not user or not verify_password(payload.password, user.password_hash):
+@app.post("/api/auth/login", response_model=schemas.AuthResponse, dependencies=[Depends(shed_when_hasher_saturated)])
+async def login_user(
+    payload: schemas.UserLogin,
+    db: AsyncSession = Depends(get_async_db),
+    write_db: AsyncSession = Depends(get_async_write_db),
+):
+    user = await find_user_by_email(db, payload.email.lower())
+    if not user or not await run_password_hasher(verify_password, payload.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
-    token = create_access_token({"sub": user.id})
+    if needs_rehash(user.password_hash):
+        # Upgrade hashes made with an old cost factor while we know the plain password.
+        # Skipped when the hasher is saturated; the next login will try again.
+        try:
+            password_hash = await password_hasher.hash(payload.password)
+            await update_user(write_db, user.id, password_hash=password_hash)
+        except HasherBusy:
+            pass
+    token_versions.record(user.id, user.token_version)
+    token = create_user_token(user.id, user.name, user.token_version)
     return schemas.AuthResponse(id=user.id, name=user.name, email=user.email, token=token)
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/api/auth/me", response_model=schemas.MeResponse)
-def get_me(user: User = Depends(get_current_user)):
+async def get_me(user: User = Depends(get_current_db_user)):
     return schemas.MeResponse(id=user.id, name=user.name, email=user.email, created_at=user.created_at)
 
 
-def ensure_membership(db: Session, user: User, league_id: int) -> League:
-    league = db.query(League).filter(League.id == league_id).first()
-    if not league:
+@app.post("/api/auth/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout_user(
+    write_db: AsyncSession = Depends(get_async_write_db), user: User = Depends(get_current_db_user)
+):
+    token_version = user.token_version + 1
+    await update_user(write_db, user.id, token_version=token_version)
+    token_versions.record(user.id, token_version)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@app.post("/api/auth/password", response_model=schemas.AuthResponse)
+async def change_password(
+    payload: schemas.PasswordChangeRequest,
+    write_db: AsyncSession = Depends(get_async_write_db),
+    user: User = Depends(get_current_db_user),
+):
+    if not await run_password_hasher(verify_password, payload.current_password, user.password_hash):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    password_hash = await run_password_hasher(get_password_hash, payload.new_password)
+    token_version = user.token_version + 1
+    await update_user(write_db, user.id, password_hash=password_hash, token_version=token_version)
+    token_versions.record(user.id, token_version)
+    token = create_user_token(user.id, user.name, token_version)
+    return schemas.AuthResponse(id=user.id, name=user.name, email=user.email, token=token)
+
+
+async def ensure_membership(db: AsyncSession, user: AuthUser, league_id: int) -> None:
+    """404 for unknown leagues, 403 for non-members; no query when the membership is cached."""
+    access = await membership_cache.access(db, user.id, [league_id])
+    if league_id not in access:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="League not found")
-    membership = db.query(Membership).filter(Membership.user_id == user.id, Membership.league_id == league_id).first()
-    if not membership:
+    if not access[league_id]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a member of this league")
-    return league
 
 
 @app.post("/api/leagues/create", response_model=schemas.LeagueCreateResponse)
-def create_league(payload: schemas.LeagueCreateRequest, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+async def create_league(
+    payload: schemas.LeagueCreateRequest,
+    db: AsyncSession = Depends(get_async_write_db),
+    user: AuthUser = Depends(get_current_user),
+):
     league = League(name=payload.name.strip(), created_by_user_id=user.id)
     db.add(league)
-    db.commit()
-    db.refresh(league)
+    await db.flush()
     membership = Membership(user_id=user.id, league_id=league.id)
     db.add(membership)
-    db.commit()
+    await db.flush()
+    await db.run_sync(lambda session: standings.add_standing(session, membership, user))
+    await db.commit()
     return schemas.LeagueCreateResponse(league_id=league.id)
 
 
 @app.post("/api/leagues/join", response_model=schemas.MembershipOut)
-def join_league(payload: schemas.LeagueJoinRequest, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    league = db.query(League).filter(League.id == payload.league_id).first()
-    if not league:
+async def join_league(
+    payload: schemas.LeagueJoinRequest,
+    db: AsyncSession = Depends(get_async_write_db),
+    user: AuthUser = Depends(get_current_user),
+):
+    access = await db.run_sync(lineups.load_access, user.id, [payload.league_id])
+    if payload.league_id not in access:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="League not found")
-    membership = db.query(Membership).filter(Membership.user_id == user.id, Membership.league_id == payload.league_id).first()
-    if membership:
+    if access[payload.league_id]:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Already a member")
     membership = Membership(user_id=user.id, league_id=payload.league_id)
     db.add(membership)
-    db.commit()
-    db.refresh(membership)
+    await db.flush()
+    await db.run_sync(lambda session: standings.add_standing(session, membership, user))
+    await db.commit()
     return schemas.MembershipOut(membership_id=membership.id)
 
 
 @app.get("/api/leagues/mine", response_model=List[schemas.LeagueOut])
-def list_my_leagues(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    memberships = (
-        db.query(Membership)
-        .filter(Membership.user_id == user.id)
-        .join(League, Membership.league_id == League.id)
-        .all()
+async def list_my_leagues(db: AsyncSession = Depends(get_async_db), user: AuthUser = Depends(get_current_user)):
+    rows = await db.execute(
+        select(League.id, League.name)
+        .join(Membership, Membership.league_id == League.id)
+        .where(Membership.user_id == user.id)
+        .order_by(Membership.id)
     )
-    return [schemas.LeagueOut(league_id=m.league.id, name=m.league.name) for m in memberships]
+    return RowsResponse([{"league_id": league_id, "name": name} for league_id, name in rows])
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
 
 
 @app.get("/api/players", response_model=List[schemas.PlayerOut])
-def list_players(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    players = db.query(Player).order_by(Player.position, Player.cost.desc()).all()
-    return [serialize_player(player) for player in players]
+async def list_players(
+    position: List[str] = Query([]),
+    team: List[str] = Query([]),
+    min_cost: Optional[Decimal] = None,
+    max_cost: Optional[Decimal] = None,
+    q: Optional[str] = None,
+    sort: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    user: AuthUser = Depends(get_current_user),
+):
+    if not any([position, team, min_cost is not None, max_cost is not None, q, sort, after, limit]):
+        snapshot = await player_catalog.get_async(db)
+        headers = {"ETag": snapshot.etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(if_none_match, snapshot.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=snapshot.body, media_type="application/json", headers=headers)
+    filters = player_search.PlayerFilters(
+        positions=[p.upper() for p in position],
+        teams=[t.upper() for t in team],
+        min_cost=min_cost,
+        max_cost=max_cost,
+        name_prefix=q,
+        sort=sort or player_search.DEFAULT_SORT,
+    )
+    try:
+        players = await db.run_sync(player_search.search_players, filters, after, limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    headers = {}
+    if limit is not None and len(players) == limit:
+        headers["X-Next-Cursor"] = player_search.encode_cursor(players[-1], filters.sort)
+    return RowsResponse([serialize_player(player) for player in players], headers=headers)
+
+
+@app.get("/api/players/{player_id}/history", response_model=schemas.PlayerHistoryResponse)
+async def get_player_history(
+    player_id: int, db: AsyncSession = Depends(get_async_db), user: AuthUser = Depends(get_current_user)
+):
+    player = await db.get(Player, player_id)
+    if player is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Player not found")
+    history = await db.run_sync(player_history.player_series, player_id)
+    return RowsResponse(
+        {"player_id": player.id, "form": player.form, "trend": player.trend, "value": player.value, "history": history}
+    )
+
+
+async def ensure_transfers_open(db: AsyncSession, player_ids: set) -> None:
+    """Refuse to move players in or out of a squad once their game in the live gameweek has kicked off."""
+    index = await kickoff_schedule.get_async(db)
+    now = clock.now()
+    gw = index.live_gameweek(now)
+    if gw is None or not player_ids:
+        return
+    teams = (await player_catalog.get_async(db)).teams
+    locked = schedule.locked_players(index, gw, player_ids, teams, now)
+    if locked:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Gameweek {gw} locked for players: " + ", ".join(str(player_id) for player_id in locked),
+        )
+
+
+async def open_gameweek(db: AsyncSession, requested: Optional[int]) -> int:
+    """The gameweek squad changes made now count against; a ``gw`` sent by the client must name it."""
+    gw = (await kickoff_schedule.get_async(db)).open_gameweek(clock.now())
+    if requested is not None and requested != gw:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Transfers are open for gameweek {gw}, not {requested}"
+        )
+    return gw
 
 
 @app.post("/api/squad/save", response_model=schemas.SquadResponse)
-def save_squad(payload: schemas.SquadSaveRequest, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    league = ensure_membership(db, user, payload.league_id)
+async def save_squad(
+    payload: schemas.SquadSaveRequest,
+    db: AsyncSession = Depends(get_async_write_db),
+    user: AuthUser = Depends(get_current_user),
+):
+    await ensure_membership(db, user, payload.league_id)
+    gw = await open_gameweek(db, payload.gw)
     if len(payload.player_ids) != 15:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Squad must have exactly 15 players")
-    players = db.query(Player).filter(Player.id.in_(payload.player_ids)).all()
+    players = (await db.scalars(select(Player).where(Player.id.in_(payload.player_ids)))).all()
     if len(players) != 15:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid player selection")
     total_cost = sum(Decimal(player.cost) for player in players)
-    if total_cost > Decimal("100.0"):
+    if total_cost > optimizer.SQUAD_BUDGET:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Budget exceeded")
     for player in players:
         if player.position not in {"QB", "RB", "WR", "TE", "K", "DST"}:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid player position")
-    squad = db.query(Squad).filter(Squad.user_id == user.id, Squad.league_id == league.id).first()
-    if not squad:
-        squad = Squad(user_id=user.id, league_id=league.id)
+    bank = optimizer.SQUAD_BUDGET - total_cost
+    squad_id = await db.scalar(
+        select(Squad.id).where(Squad.user_id == user.id, Squad.league_id == payload.league_id)
+    )
+    if squad_id is None:
+        squad = Squad(user_id=user.id, league_id=payload.league_id, budget_used=total_cost, bank=bank)
         db.add(squad)
-        db.commit()
-        db.refresh(squad)
-    squad.budget_used = total_cost
-    squad.squad_players.clear()
-    db.commit()
-    for player in players:
-        squad_player = SquadPlayer(squad_id=squad.id, player_id=player.id)
-        db.add(squad_player)
-    db.commit()
-    db.refresh(squad)
+        await db.flush()
+        squad_id = squad.id
+        current_ids = set()
+    else:
+        await db.execute(update(Squad).where(Squad.id == squad_id).values(budget_used=total_cost, bank=bank))
+        current_ids = set(
+            (await db.scalars(select(SquadPlayer.player_id).where(SquadPlayer.squad_id == squad_id))).all()
+        )
+    selected_ids = {player.id for player in players}
+    removed_ids = current_ids - selected_ids
+    added_ids = selected_ids - current_ids
+    await ensure_transfers_open(db, added_ids | removed_ids)
+    if added_ids or removed_ids:
+        try:
+            state = await db.run_sync(transfers.log_state, squad_id, gw)
+        except transfers.TransferRejected as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+        added_costs = {player.id: Decimal(player.cost) for player in players if player.id in added_ids}
+        # A squad saved before the log existed is logged in full first, so replays start from it.
+        baseline = set() if state.rows else current_ids
+        # Once the season has kicked off, changes to an existing squad are transfers like any other.
+        hit = None
+        if current_ids and (await kickoff_schedule.get_async(db)).season_started(clock.now()):
+            hit = transfers.hit_points(state.made, len(added_ids))
+        await db.run_sync(transfers.log_squad_save, squad_id, gw, added_costs, removed_ids, baseline, hit)
+        if hit:
+            await db.run_sync(lambda session: transfers.charge_hit(session, user.id, payload.league_id, hit))
+    if removed_ids:
+        await db.execute(
+            delete(SquadPlayer).where(SquadPlayer.squad_id == squad_id, SquadPlayer.player_id.in_(removed_ids))
+        )
+    if added_ids:
+        await db.execute(
+            insert(SquadPlayer), [{"squad_id": squad_id, "player_id": player_id} for player_id in added_ids]
+        )
+    players_by_id = {player.id: serialize_player(player) for player in players}
+    await db.commit()
     return schemas.SquadResponse(
-        squad_id=squad.id,
-        league_id=league.id,
-        budget_used=float(squad.budget_used or 0),
-        players=[serialize_player(player) for player in squad.players],
+        squad_id=squad_id,
+        league_id=payload.league_id,
+        budget_used=float(total_cost),
+        bank=float(bank),
+        players=[players_by_id[player_id] for player_id in payload.player_ids],
+    )
+
+
+@app.post("/api/squad/transfers", response_model=schemas.TransferResponse)
+async def transfer_players(
+    payload: schemas.TransferRequest,
+    db: AsyncSession = Depends(get_async_write_db),
+    user: AuthUser = Depends(get_current_user),
+):
+    await ensure_membership(db, user, payload.league_id)
+    gw = await open_gameweek(db, payload.gw)
+    moves = [(item.player_out_id, item.player_in_id) for item in payload.transfers]
+    await ensure_transfers_open(db, {player_id for move in moves for player_id in move})
+    try:
+        result = await db.run_sync(transfers.make_transfers, user.id, payload.league_id, gw, moves)
+    except transfers.TransferRejected as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    await db.commit()
+    snapshot = await player_catalog.get_async(db)
+    players_by_id = {player["id"]: player for player in snapshot.players}
+    return schemas.TransferResponse(
+        squad_id=result.squad_id,
+        league_id=payload.league_id,
+        budget_used=float(result.budget_used),
+        bank=float(result.bank),
+        players=[players_by_id[player_id] for player_id in result.player_ids],
+        free_transfers_left=result.free_transfers_left,
+        hit_points=result.hit_points,
+        transfers=result.log,
+    )
+
+
+@app.get("/api/squad/transfers", response_model=schemas.TransferLogResponse)
+async def get_transfers(
+    league_id: int,
+    gw: int = Query(..., ge=0),
+    db: AsyncSession = Depends(get_async_db),
+    user: AuthUser = Depends(get_current_user),
+):
+    await ensure_membership(db, user, league_id)
+    squad_id = await db.scalar(select(Squad.id).where(Squad.user_id == user.id, Squad.league_id == league_id))
+    if squad_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Squad not found")
+    player_ids, log = await db.run_sync(transfers.squad_at, squad_id, gw)
+    return schemas.TransferLogResponse(league_id=league_id, gw=gw, player_ids=sorted(player_ids), transfers=log)
+
+
+@app.post("/api/squad/optimize", response_model=schemas.SquadOptimizeResponse)
+async def optimize_squad(
+    payload: schemas.SquadOptimizeRequest,
+    db: AsyncSession = Depends(get_async_db),
+    user: AuthUser = Depends(get_current_user),
+):
+    snapshot = await player_catalog.get_async(db)
+    projections = await db.run_sync(optimizer.projected_points)
+    projections.update(payload.projections)
+    candidates = [
+        optimizer.Candidate(
+            id=player["id"],
+            position=player["position"],
+            cost=optimizer.to_cents(player["cost"]),
+            points=projections.get(player["id"], 0.0),
+        )
+        for player in snapshot.players
+    ]
+    try:
+        # CPU-bound search; keep it off the event loop.
+        result = await run_in_threadpool(
+            optimizer.optimize_squad, candidates, locked=payload.locked, excluded=payload.excluded
+        )
+    except optimizer.InfeasibleSquad as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    players_by_id = {player["id"]: player for player in snapshot.players}
+    return schemas.SquadOptimizeResponse(
+        players=[players_by_id[player_id] for player_id in result.player_ids],
+        budget_used=result.cost / 100,
+        projected_points=round(result.points, 2),
     )
 
 
 @app.get("/api/squad", response_model=Optional[schemas.SquadResponse])
-def get_squad(league_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    ensure_membership(db, user, league_id)
-    squad = db.query(Squad).filter(Squad.user_id == user.id, Squad.league_id == league_id).first()
-    if not squad:
+async def get_squad(league_id: int, db: AsyncSession = Depends(get_async_db), user: AuthUser = Depends(get_current_user)):
+    await ensure_membership(db, user, league_id)
+    # One statement for the squad and its players; relationships are never lazy-loaded here.
+    rows = (
+        await db.execute(
+            select(Squad.id, Squad.budget_used, Squad.bank, Player)
+            .outerjoin(SquadPlayer, SquadPlayer.squad_id == Squad.id)
+            .outerjoin(Player, Player.id == SquadPlayer.player_id)
+            .where(Squad.user_id == user.id, Squad.league_id == league_id)
+            .order_by(SquadPlayer.id)
+        )
+    ).all()
+    if not rows:
         return None
+    squad_id, budget_used, bank, _ = rows[0]
     return schemas.SquadResponse(
-        squad_id=squad.id,
+        squad_id=squad_id,
         league_id=league_id,
-        budget_used=float(squad.budget_used or 0),
-        players=[serialize_player(player) for player in squad.players],
+        budget_used=float(budget_used or 0),
+        bank=float(bank or 0),
+        players=[serialize_player(player) for _, _, _, player in rows if player is not None],
     )
 
 
+async def lineup_lock_errors(db: AsyncSession, user_id: int, entries: List[schemas.LineupSetRequest]) -> List[Optional[str]]:
+    """Lock check for each entry; saved lineups are only loaded for gameweeks that have kicked off."""
+    index = await kickoff_schedule.get_async(db)
+    now = clock.now()
+    started = [entry for entry in entries if index.gameweek_started(entry.gw, now)]
+    if not started:
+        return [None] * len(entries)
+    teams = (await player_catalog.get_async(db)).teams
+    saved = await db.run_sync(lineups.load_saved_lineups, user_id, [(entry.league_id, entry.gw) for entry in started])
+    return [
+        lineups.lock_error(entry, saved.get((entry.league_id, entry.gw)), index, teams, now)
+        if index.gameweek_started(entry.gw, now)
+        else None
+        for entry in entries
+    ]
+
+
 @app.post("/api/lineup/set", response_model=schemas.LineupResponse)
-def set_lineup(payload: schemas.LineupSetRequest, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    ensure_membership(db, user, payload.league_id)
-    squad = db.query(Squad).filter(Squad.user_id == user.id, Squad.league_id == payload.league_id).first()
-    if not squad:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Squad not found")
-    starter_ids = set(payload.starters)
-    if payload.captain not in starter_ids or payload.vice not in starter_ids:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Captain and vice must be starters")
-    if payload.captain == payload.vice:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Captain and vice must differ")
-    squad_player_ids = {player.id for player in squad.players}
-    if not starter_ids.issubset(squad_player_ids):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Starters must be in squad")
-    lineup = (
-        db.query(Lineup)
-        .filter(Lineup.user_id == user.id, Lineup.league_id == payload.league_id, Lineup.gw == payload.gw)
-        .first()
-    )
-    if not lineup:
-        lineup = Lineup(
-            user_id=user.id,
-            league_id=payload.league_id,
-            gw=payload.gw,
-            captain_player_id=payload.captain,
-            vice_captain_player_id=payload.vice,
+async def set_lineup(
+    payload: schemas.LineupSetRequest,
+    db: AsyncSession = Depends(get_async_write_db),
+    user: AuthUser = Depends(get_current_user),
+):
+    await ensure_membership(db, user, payload.league_id)
+    squads = await db.run_sync(lineups.load_squad_player_ids, user.id, [payload.league_id])
+    error = lineups.lineup_error(payload, squads.get(payload.league_id))
+    if error is None:
+        [error] = await lineup_lock_errors(db, user.id, [payload])
+    if error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
+    lineup_ids = await db.run_sync(lineups.write_lineups, user.id, [payload])
+    await db.commit()
+    return schemas.LineupResponse(lineup_id=lineup_ids[(payload.league_id, payload.gw)])
+
+
+@app.post("/api/lineup/batch", response_model=schemas.LineupBatchResponse)
+async def set_lineups_batch(
+    payload: schemas.LineupBatchRequest,
+    db: AsyncSession = Depends(get_async_write_db),
+    user: AuthUser = Depends(get_current_user),
+):
+    league_ids = {entry.league_id for entry in payload.entries}
+    access = await membership_cache.access(db, user.id, league_ids)
+    squads = await db.run_sync(lineups.load_squad_player_ids, user.id, league_ids)
+    errors = {}
+    seen = set()
+    checked = []
+    for index, entry in enumerate(payload.entries):
+        key = (entry.league_id, entry.gw)
+        if entry.league_id not in access:
+            errors[index] = "League not found"
+        elif not access[entry.league_id]:
+            errors[index] = "Not a member of this league"
+        elif key in seen:
+            errors[index] = "Duplicate lineup in batch"
+        else:
+            errors[index] = lineups.lineup_error(entry, squads.get(entry.league_id))
+        seen.add(key)
+        if errors[index] is None:
+            checked.append(index)
+    lock_errors = await lineup_lock_errors(db, user.id, [payload.entries[index] for index in checked])
+    for index, error in zip(checked, lock_errors):
+        errors[index] = error
+    valid = [payload.entries[index] for index in checked if errors[index] is None]
+    lineup_ids = await db.run_sync(lineups.write_lineups, user.id, valid)
+    await db.commit()
+    results = [
+        schemas.LineupBatchResult(
+            league_id=entry.league_id,
+            gw=entry.gw,
+            lineup_id=None if errors[index] else lineup_ids[(entry.league_id, entry.gw)],
+            error=errors[index],
         )
-        db.add(lineup)
-        db.commit()
-        db.refresh(lineup)
-    else:
-        lineup.captain_player_id = payload.captain
-        lineup.vice_captain_player_id = payload.vice
-        lineup.slots.clear()
-        db.commit()
-    for starter_id in starter_ids:
-        slot = LineupSlot(lineup_id=lineup.id, player_id=starter_id, starter=True)
-        db.add(slot)
-    db.commit()
-    db.refresh(lineup)
-    return schemas.LineupResponse(lineup_id=lineup.id)
+        for index, entry in enumerate(payload.entries)
+    ]
+    return schemas.LineupBatchResponse(results=results)
 
 
 @app.get("/api/standings/{league_id}", response_model=schemas.StandingsResponse)
-def get_standings(league_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    ensure_membership(db, user, league_id)
-    memberships = (
-        db.query(Membership)
-        .filter(Membership.league_id == league_id)
-        .join(User, Membership.user_id == User.id)
-        .all()
+async def get_standings(
+    league_id: int,
+    after: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    around_me: Optional[int] = Query(None, ge=0, le=50),
+    db: AsyncSession = Depends(get_async_db),
+    user: AuthUser = Depends(get_current_user),
+):
+    await ensure_membership(db, user, league_id)
+    if around_me is not None:
+        rows = await db.run_sync(standings.around, league_id, user.id, around_me)
+    else:
+        try:
+            rows = await db.run_sync(standings.page, league_id, limit, after)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    entries = [
+        {"rank": row.rank, "user_id": row.user_id, "team_name": row.team_name, "points": row.total_points}
+        for row in rows
+    ]
+    next_cursor = standings.encode_cursor(rows[-1]) if rows and around_me is None and len(rows) == limit else None
+    return RowsResponse({"standings": entries, "next_cursor": next_cursor})
+
+
+async def forward(websocket: WebSocket, subscription: Subscription) -> None:
+    """Send the subscription's messages until it closes or the client goes away."""
+
+    async def send() -> None:
+        while (message := await subscription.get()) is not None:
+            await websocket.send_text(message)
+
+    async def receive() -> None:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = [asyncio.create_task(send()), asyncio.create_task(receive())]
+    await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@app.websocket("/api/standings/{league_id}/live")
+async def standings_live(websocket: WebSocket, league_id: int, token: Optional[str] = None):
+    """A snapshot of the league's standings, then a diff each time a commit changes them.
+
+    Browsers cannot set headers on a WebSocket, so the access token travels in
+    the ``token`` query parameter. Clients that fall too far behind are closed
+    with 1013 and should reconnect for a fresh snapshot.
+    """
+    try:
+        user = await get_current_user(f"Bearer {token}" if token else None)
+        async with AsyncSessionLocal() as db:
+            await ensure_membership(db, user, league_id)
+            subscription, snapshot = await standings_feed.subscribe(league_id, db)
+    except HTTPException as exc:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=exc.detail)
+        return
+    try:
+        await websocket.accept()
+        await websocket.send_text(snapshot)
+        await forward(websocket, subscription)
+        if subscription.dropped:
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Too far behind")
+    finally:
+        standings_feed.unsubscribe(subscription)
+
+
+@app.post("/api/admin/stats", response_model=schemas.StatsUploadResponse, dependencies=[Depends(require_admin)])
+async def upload_stats(payload: schemas.StatsUploadRequest, db: AsyncSession = Depends(get_async_write_db)):
+    lines = [line.dict() for line in payload.stats]
+    changed = await db.run_sync(apply_stat_lines, payload.gw, lines)
+    await db.commit()
+    return schemas.StatsUploadResponse(gw=payload.gw, changed_player_ids=sorted(changed))
+
+
+@app.post("/api/admin/ingest", response_model=schemas.IngestResponse, dependencies=[Depends(require_admin)])
+async def ingest_feed(
+    request: Request,
+    fmt: str = Query(..., alias="format", pattern="^(csv|ndjson)$"),
+    batch_size: int = Query(ingest.INGEST_BATCH_SIZE, ge=1, le=50000),
+    db: AsyncSession = Depends(get_async_write_db),
+):
+    """Stream a CSV or NDJSON feed from the request body, committing once per batch."""
+    started = time.perf_counter()
+    ingestor = ingest.Ingestor(ingest.RecordParser(fmt), batch_size)
+    async for lines in ingest.read_blocks_async(request.stream()):
+        for batch in ingestor.feed(lines):
+            await db.run_sync(ingest.write_batch, batch, ingestor.report)
+            await db.commit()
+    for batch in ingestor.finish():
+        await db.run_sync(ingest.write_batch, batch, ingestor.report)
+        await db.commit()
+    report = ingestor.report
+    report.seconds = time.perf_counter() - started
+    return schemas.IngestResponse(**vars(report), rows_per_second=report.rows_per_second)
+
+
+@app.put("/api/admin/schedule/{gw}", response_model=schemas.ScheduleResponse, dependencies=[Depends(require_admin)])
+async def set_schedule(gw: int, payload: schemas.ScheduleSetRequest, db: AsyncSession = Depends(get_async_write_db)):
+    rows = sorted(
+        ({"gw": gw, "team": item.team, "kickoff": schedule.to_utc(item.kickoff)} for item in payload.kickoffs),
+        key=lambda row: (row["kickoff"], row["team"]),
+    )
+    await db.execute(delete(Kickoff).where(Kickoff.gw == gw))
+    if rows:
+        await db.execute(insert(Kickoff), rows)
+    # Core writes bypass the schedule's change tracking; flag them so the lock index rebuilds on commit.
+    db.info["schedule_changed"] = True
+    await db.commit()
+    return schemas.ScheduleResponse(
+        gw=gw, kickoffs=[schemas.KickoffIn(team=row["team"], kickoff=row["kickoff"]) for row in rows]
     )
-    standings = [schemas.StandingOut(team_name=m.user.name, points=0) for m in memberships]
-    return schemas.StandingsResponse(standings=standings)
+
+
+@app.post(
+    "/api/admin/gameweeks/{gw}/lock", response_model=schemas.GameweekLockResponse, dependencies=[Depends(require_admin)]
+)
+async def lock_gameweek(gw: int, db: AsyncSession = Depends(get_async_write_db)):
+    created = await db.run_sync(autolineup.lock_gameweek, gw)
+    await db.commit()
+    return schemas.GameweekLockResponse(gw=gw, lineups_created=created)
+
+
+@app.post(
+    "/api/admin/gameweeks/{gw}/substitutions",
+    response_model=schemas.SubstitutionResponse,
+    dependencies=[Depends(require_admin)],
+)
+async def substitute_zero_scorers(gw: int, db: AsyncSession = Depends(get_async_write_db)):
+    summary = await db.run_sync(autolineup.substitute_zero_scorers, gw)
+    await db.commit()
+    return schemas.SubstitutionResponse(gw=gw, substitutions=summary.substitutions, lineup_ids=sorted(summary.lineup_ids))
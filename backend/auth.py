@@ -1,6 +1,11 @@
+import asyncio
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Dict
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple, TypeVar
 
 import bcrypt
 import jwt
@@ -8,10 +13,30 @@ import jwt
 JWT_SECRET = os.getenv("JWT_SECRET", "supersecret")
 JWT_ALGORITHM = "HS256"
 TOKEN_EXPIRE_DAYS = 7
+TOKEN_REVOCATION_CACHE_SIZE = int(os.getenv("TOKEN_REVOCATION_CACHE_SIZE", "10000"))
+TOKEN_REVOCATION_TTL_SECONDS = float(os.getenv("TOKEN_REVOCATION_TTL_SECONDS", "60"))
+VERIFIED_TOKEN_CACHE_SIZE = int(os.getenv("VERIFIED_TOKEN_CACHE_SIZE", "10000"))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "32"))
+
+T = TypeVar("T")
 
 
 def get_password_hash(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(BCRYPT_ROUNDS)).decode("utf-8")
+
+
+def password_hash_rounds(hashed_password: str) -> int:
+    """Return the bcrypt cost encoded in a hash such as ``$2b$12$...``."""
+    try:
+        return int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return 0
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    return password_hash_rounds(hashed_password) != BCRYPT_ROUNDS
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -28,5 +53,151 @@ def create_access_token(data: Dict[str, Any]) -> str:
     return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 
+class VerifiedTokens:
+    """Bounded cache of tokens whose signature has been checked, oldest first out.
+
+    The rate limiter and the auth dependency both read the bearer token of
+    every request; a cached token costs a dict lookup and an expiry check
+    instead of an HMAC and a JSON parse. Expired tokens are refused as PyJWT
+    would refuse them. Payloads are shared between callers; do not mutate them.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._tokens: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        entry = self._tokens.get(token)
+        if entry is not None:
+            if entry[0] <= time.time():
+                raise jwt.ExpiredSignatureError("Signature has expired")
+            return entry[1]
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        with self._lock:
+            self._tokens[token] = (payload.get("exp", float("inf")), payload)
+            while len(self._tokens) > self.maxsize:
+                self._tokens.popitem(last=False)
+        return payload
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+
+
+verified_tokens = VerifiedTokens(VERIFIED_TOKEN_CACHE_SIZE)
+
+
 def decode_access_token(token: str) -> Dict[str, Any]:
-    return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    return verified_tokens.decode(token)
+
+
+def create_user_token(user_id: int, name: str, token_version: int) -> str:
+    """Issue a token whose claims are enough to authenticate without loading the user row."""
+    return create_access_token({"sub": user_id, "name": name, "tv": token_version})
+
+
+class AuthUser(NamedTuple):
+    id: int
+    name: str
+
+
+class TokenVersions:
+    """Bounded LRU of each user's current token version, trusted for ``ttl`` seconds.
+
+    A token is valid while its ``tv`` claim is still the user's
+    ``User.token_version``; logout and password changes bump that column and
+    record the new version here. Users missing from the LRU (evicted, or never
+    seen by this process) and entries older than ``ttl`` are looked up in the
+    database again, so a revocation made by another worker or before a restart
+    takes effect within ``ttl`` seconds rather than when the token expires.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # user id -> (version, monotonic time it was read or written)
+        self._versions: "OrderedDict[int, Tuple[int, float]]" = OrderedDict()
+
+    def get(self, user_id: int) -> Optional[int]:
+        """The user's token version if this process knows it and it is fresh, else None."""
+        with self._lock:
+            entry = self._versions.get(user_id)
+            if entry is None or time.monotonic() - entry[1] >= self.ttl:
+                return None
+            self._versions.move_to_end(user_id)
+            return entry[0]
+
+    def record(self, user_id: int, version: int) -> None:
+        with self._lock:
+            previous = self._versions.pop(user_id, None)
+            self._versions[user_id] = (max(version, previous[0]) if previous else version, time.monotonic())
+            while len(self._versions) > self.maxsize:
+                self._versions.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._versions.clear()
+
+
+token_versions = TokenVersions(TOKEN_REVOCATION_CACHE_SIZE, TOKEN_REVOCATION_TTL_SECONDS)
+
+
+class HasherBusy(Exception):
+    """Raised when the password hashing queue is full."""
+
+
+class PasswordHasher:
+    """Runs bcrypt on its own small executor so logins cannot starve the request threadpool.
+
+    At most ``workers + queue_size`` jobs are admitted at once; further calls
+    raise ``HasherBusy`` immediately instead of queueing without bound.
+    """
+
+    def __init__(self, workers: int, queue_size: int) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._capacity = workers + queue_size
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def saturated(self) -> bool:
+        """Cheap pre-check so callers can shed load before doing any other work."""
+        return self._pending >= self._capacity
+
+    @property
+    def pending(self) -> int:
+        """Jobs running or queued."""
+        return self._pending
+
+    def _admit(self) -> bool:
+        with self._lock:
+            if self._pending >= self._capacity:
+                return False
+            self._pending += 1
+            return True
+
+    def _done(self, _=None) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        if not self._admit():
+            raise HasherBusy()
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._done()
+            raise
+        future.add_done_callback(self._done)
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        return await self.run(get_password_hash, password)
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_SIZE)
@@ -0,0 +1,302 @@
+from contextlib import contextmanager
+from typing import Dict, Iterator, NamedTuple, Set
+
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    Table,
+    UniqueConstraint,
+    and_,
+    case,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    true,
+    update,
+)
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ColumnElement, Subquery
+
+from .models import Lineup, LineupSlot, Player, PlayerGameweekStat, Squad, SquadPlayer
+from .scoring import rescore_lineups
+
+# Starting slots per position: QB, 2 RB, 3 WR, TE, K, DST.
+STARTER_SLOTS: Dict[str, int] = {"QB": 1, "RB": 2, "WR": 3, "TE": 1, "K": 1, "DST": 1}
+STARTERS = sum(STARTER_SLOTS.values())
+
+# Scratch tables for the set-based passes. Each is created on the session's connection for one
+# call and dropped after, so a result computed once can feed several statements.
+scratch = MetaData()
+locked_starters = Table(
+    "locked_starters",
+    scratch,
+    Column("squad_id", Integer, primary_key=True),
+    Column("rank", Integer, primary_key=True),
+    Column("player_id", Integer, nullable=False),
+    prefixes=["TEMPORARY"],
+)
+substitutions = Table(
+    "substitutions",
+    scratch,
+    Column("slot_id", Integer, primary_key=True),
+    Column("lineup_id", Integer, nullable=False),
+    Column("player_out", Integer, nullable=False),
+    Column("player_in", Integer, nullable=False),
+    UniqueConstraint("lineup_id", "player_out"),
+    prefixes=["TEMPORARY"],
+)
+
+
+class SubstitutionSummary(NamedTuple):
+    substitutions: int
+    lineup_ids: Set[int]
+    league_ids: Set[int]
+
+
+@contextmanager
+def scratch_table(connection: Connection, table: Table) -> Iterator[Table]:
+    """Create ``table`` on ``connection`` for the duration of the block."""
+    # The drop is transactional but the create is not, so a call whose transaction was
+    # rolled back leaves its table on the pooled connection.
+    table.drop(connection, checkfirst=True)
+    table.create(connection)
+    yield table
+    table.drop(connection)
+
+
+def starter_picks(gw: int, squads: ColumnElement) -> Subquery:
+    """Each matching squad's starters for ``gw`` with their players' rank, chosen in SQL.
+
+    Players are ranked once by their mean points before ``gw`` (ties go to
+    the more expensive player, then the lower id, so picks are
+    deterministic and ranks unique). Within a squad, each position's best
+    players fill its slots; slots the squad cannot fill go to the best
+    remaining players of any position, so a full squad always fields nine.
+    Filling each position's slots with its best players is optimal because
+    a slot accepts a single position.
+    """
+    projections = (
+        select(PlayerGameweekStat.player_id, func.avg(PlayerGameweekStat.points).label("points"))
+        .where(PlayerGameweekStat.gw < gw)
+        .group_by(PlayerGameweekStat.player_id)
+        .subquery()
+    )
+    ranked = (
+        select(
+            Player.id,
+            Player.position,
+            func.row_number()
+            .over(order_by=(func.coalesce(projections.c.points, 0).desc(), Player.cost.desc(), Player.id))
+            .label("rank"),
+        )
+        .outerjoin(projections, projections.c.player_id == Player.id)
+        .subquery()
+    )
+    slots = case(STARTER_SLOTS, value=ranked.c.position, else_=0)
+    in_position = func.row_number().over(partition_by=(SquadPlayer.squad_id, ranked.c.position), order_by=ranked.c.rank)
+    candidates = (
+        select(SquadPlayer.squad_id, SquadPlayer.player_id, ranked.c.rank, (in_position <= slots).label("fills_slot"))
+        .join(Squad, Squad.id == SquadPlayer.squad_id)
+        .join(ranked, ranked.c.id == SquadPlayer.player_id)
+        .where(squads)
+        .subquery()
+    )
+    picked = select(
+        candidates,
+        func.row_number()
+        .over(partition_by=candidates.c.squad_id, order_by=(candidates.c.fills_slot.desc(), candidates.c.rank))
+        .label("pick"),
+    ).subquery()
+    return select(picked.c.squad_id, picked.c.rank, picked.c.player_id).where(picked.c.pick <= STARTERS).subquery()
+
+
+def lock_gameweek(db: Session, gw: int) -> int:
+    """Give every squad without a lineup for ``gw`` the lineup with the most projected points.
+
+    Projections are each player's mean points before ``gw``. Starters are
+    chosen once by ``starter_picks`` into a scratch table, from which the
+    lineups and their slots are each written with one INSERT ... SELECT, so
+    no squad passes through Python. The two best-ranked starters are
+    captain and vice. Lineups users already set are left
+    alone, as are squads with fewer than two players to name captain and
+    vice. When the gameweek already has stat lines the gameweek is
+    rescored. Returns the number of lineups created; the caller commits.
+    """
+    has_lineup = (
+        select(Lineup.id)
+        .where(Lineup.user_id == Squad.user_id, Lineup.league_id == Squad.league_id, Lineup.gw == gw)
+        .exists()
+    )
+
+    def role(order: int) -> ColumnElement:
+        """The squad's ``order``-th best starter: 0 is the captain and 1 the vice."""
+        return (
+            select(locked_starters.c.player_id)
+            .where(locked_starters.c.squad_id == Squad.id)
+            .order_by(locked_starters.c.rank)
+            .limit(1)
+            .offset(order)
+            .scalar_subquery()
+        )
+
+    # Core execution on the session's connection: with 100k squads this is a million-row
+    # write, where ORM bulk bookkeeping costs more than SQLite does.
+    connection = db.connection()
+    lineup_table, slot_table = Lineup.__table__, LineupSlot.__table__
+    with scratch_table(connection, locked_starters):
+        picks = starter_picks(gw, ~has_lineup)
+        connection.execute(insert(locked_starters).from_select(["squad_id", "rank", "player_id"], picks))
+        # Squads that were not picked have no captain, and squads of one player have no vice.
+        roles = select(
+            Squad.user_id, Squad.league_id, literal(gw), role(0).label("captain"), role(1).label("vice")
+        ).subquery()
+        created = connection.execute(
+            insert(lineup_table).from_select(
+                ["user_id", "league_id", "gw", "captain_player_id", "vice_captain_player_id"],
+                select(roles).where(roles.c.vice.is_not(None)),
+            )
+        ).rowcount
+        if not created:
+            return 0
+        # Only squads without a lineup were picked, so every lineup they reach is one just created.
+        connection.execute(
+            insert(slot_table).from_select(
+                ["lineup_id", "player_id", "starter"],
+                select(Lineup.id, locked_starters.c.player_id, true())
+                .join(Squad, Squad.id == locked_starters.c.squad_id)
+                .join(
+                    Lineup, and_(Lineup.user_id == Squad.user_id, Lineup.league_id == Squad.league_id, Lineup.gw == gw)
+                ),
+            )
+        )
+    # Locking usually comes before the gameweek's stats. When it does not, the new lineups touch
+    # most of the gameweek, so it is rescored whole as after substitutions rather than by id.
+    if connection.execute(select(PlayerGameweekStat.id).where(PlayerGameweekStat.gw == gw).limit(1)).first():
+        rescore_lineups(db, gw)
+    return created
+
+
+def substitute_zero_scorers(db: Session, gw: int) -> SubstitutionSummary:
+    """Swap each starter who scored zero in ``gw`` for the best-scoring bench player at the same position.
+
+    Only same-position swaps are made so the lineup keeps its shape. When the
+    captain goes off the vice takes the armband and the substitute becomes
+    vice; otherwise a substituted captain or vice hands the role to their
+    replacement. Swaps are paired in SQL: a lineup's zero scorers at a
+    position, in slot order, meet its bench at that position, best first,
+    by row number. They are written once to a scratch table that drives a
+    bulk update of slots and roles, and the gameweek is rescored. The caller
+    commits.
+    """
+    scored = and_(PlayerGameweekStat.player_id == Player.id, PlayerGameweekStat.gw == gw)
+    zero_ids = list(
+        db.scalars(
+            select(Player.id).outerjoin(PlayerGameweekStat, scored).where(func.coalesce(PlayerGameweekStat.points, 0) == 0)
+        )
+    )
+    if not zero_ids:
+        return SubstitutionSummary(0, set(), set())
+    zero_slots = and_(LineupSlot.player_id.in_(zero_ids), LineupSlot.starter.is_(True))
+    going_off = (
+        select(
+            LineupSlot.id,
+            LineupSlot.lineup_id,
+            LineupSlot.player_id,
+            Player.position,
+            func.row_number()
+            .over(partition_by=(LineupSlot.lineup_id, Player.position), order_by=LineupSlot.id)
+            .label("n"),
+        )
+        .join(Lineup, Lineup.id == LineupSlot.lineup_id)
+        .join(Player, Player.id == LineupSlot.player_id)
+        .where(zero_slots, Lineup.gw == gw)
+        .subquery()
+    )
+    in_lineup = (
+        select(LineupSlot.id)
+        .where(LineupSlot.lineup_id == Lineup.id, LineupSlot.player_id == SquadPlayer.player_id)
+        .exists()
+    )
+    bench = (
+        select(
+            Lineup.id.label("lineup_id"),
+            SquadPlayer.player_id,
+            Player.position,
+            func.row_number()
+            .over(
+                partition_by=(Lineup.id, Player.position),
+                order_by=(PlayerGameweekStat.points.desc(), SquadPlayer.player_id),
+            )
+            .label("n"),
+        )
+        .join(Squad, and_(Squad.user_id == Lineup.user_id, Squad.league_id == Lineup.league_id))
+        .join(SquadPlayer, SquadPlayer.squad_id == Squad.id)
+        .join(Player, Player.id == SquadPlayer.player_id)
+        .join(PlayerGameweekStat, scored)
+        .where(
+            Lineup.gw == gw,
+            Lineup.id.in_(select(LineupSlot.lineup_id).where(zero_slots)),
+            PlayerGameweekStat.points > 0,
+            ~in_lineup,
+        )
+        .subquery()
+    )
+
+    slot_table, lineup_table = LineupSlot.__table__, Lineup.__table__
+
+    def replacement(player: ColumnElement) -> ColumnElement:
+        return (
+            select(substitutions.c.player_in)
+            .where(substitutions.c.lineup_id == lineup_table.c.id, substitutions.c.player_out == player)
+            .scalar_subquery()
+        )
+
+    # Core execution on the session's connection, as in lock_gameweek: a gameweek's
+    # substitutions run to hundreds of thousands of rows.
+    connection = db.connection()
+    with scratch_table(connection, substitutions):
+        made = connection.execute(
+            insert(substitutions).from_select(
+                ["slot_id", "lineup_id", "player_out", "player_in"],
+                select(going_off.c.id, going_off.c.lineup_id, going_off.c.player_id, bench.c.player_id).join(
+                    bench,
+                    and_(
+                        bench.c.lineup_id == going_off.c.lineup_id,
+                        bench.c.position == going_off.c.position,
+                        bench.c.n == going_off.c.n,
+                    ),
+                ),
+            )
+        ).rowcount
+        if not made:
+            return SubstitutionSummary(0, set(), set())
+        connection.execute(
+            update(slot_table)
+            .where(slot_table.c.id == substitutions.c.slot_id)
+            .values(player_id=substitutions.c.player_in)
+        )
+        captain, vice = lineup_table.c.captain_player_id, lineup_table.c.vice_captain_player_id
+        captain_in, vice_in = replacement(captain), replacement(vice)
+        captain_off_alone = and_(captain_in.is_not(None), vice_in.is_(None))
+        connection.execute(
+            update(lineup_table)
+            .where(
+                lineup_table.c.id.in_(select(substitutions.c.lineup_id)),
+                or_(captain_in.is_not(None), vice_in.is_not(None)),
+            )
+            .values(
+                captain_player_id=case((captain_off_alone, vice), else_=func.coalesce(captain_in, captain)),
+                vice_captain_player_id=case((captain_off_alone, captain_in), else_=func.coalesce(vice_in, vice)),
+            )
+        )
+        changed = connection.execute(
+            select(substitutions.c.lineup_id, Lineup.league_id).join(Lineup, Lineup.id == substitutions.c.lineup_id)
+        ).all()
+    # Substitutions touch most lineups of a gameweek, so rescoring it whole beats a per-player filter.
+    rescore_lineups(db, gw)
+    return SubstitutionSummary(made, {lineup_id for lineup_id, _ in changed}, {league_id for _, league_id in changed})
+
@@ -0,0 +1,179 @@
+"""Requests/second of the async read endpoints versus their sync threadpool equivalents.
+
+Both variants run in-process over ASGITransport against the same throwaway
+SQLite file. The sync variant mounts copies of the previous ``def`` handlers
+(run by Starlette's threadpool on the sync engine); the async variant is the
+real app on the aiosqlite engine. Each client loops over leagues/mine, squad
+and standings with its own token, with rate limits off unless
+``RATE_LIMITS_ENABLED=1``.
+
+The sync copies open their session inside the handler. With a ``get_db``
+yield dependency the session is closed in a later threadpool hop, and at 500
+clients every worker thread ends up blocked on pool checkout while the
+teardowns that would return connections wait for a free thread.
+
+    python -m backend.benchmarks.async_rps --clients 500 --requests 5000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import List, Optional
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="gridcap-bench-"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+os.environ.setdefault("RATE_LIMITS_ENABLED", "0")
+
+from fastapi import Depends, FastAPI, HTTPException  # noqa: E402
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from .. import schemas, standings  # noqa: E402
+from ..app import app, get_current_user  # noqa: E402
+from ..auth import AuthUser, create_user_token  # noqa: E402
+from ..catalog import serialize_player  # noqa: E402
+from ..db import Base, SessionLocal, engine  # noqa: E402
+from ..models import League, Membership, Player, Squad, SquadPlayer, User  # noqa: E402
+from ..seed_players import seed_players  # noqa: E402
+from .login_flood import percentile  # noqa: E402
+
+LEAGUES = 10
+
+sync_app = FastAPI()
+
+
+def sync_ensure_membership(db: Session, user: AuthUser, league_id: int) -> None:
+    if not db.query(League).filter(League.id == league_id).first():
+        raise HTTPException(status_code=404, detail="League not found")
+    if not db.query(Membership).filter(Membership.user_id == user.id, Membership.league_id == league_id).first():
+        raise HTTPException(status_code=403, detail="Not a member of this league")
+
+
+@sync_app.get("/api/leagues/mine", response_model=List[schemas.LeagueOut])
+def sync_leagues(user: AuthUser = Depends(get_current_user)):
+    with SessionLocal() as db:
+        return list_leagues(db, user)
+
+
+def list_leagues(db: Session, user: AuthUser) -> List[schemas.LeagueOut]:
+    memberships = db.query(Membership).filter(Membership.user_id == user.id).join(League).all()
+    return [schemas.LeagueOut(league_id=m.league.id, name=m.league.name) for m in memberships]
+
+
+@sync_app.get("/api/squad", response_model=Optional[schemas.SquadResponse])
+def sync_squad(league_id: int, user: AuthUser = Depends(get_current_user)):
+    with SessionLocal() as db:
+        return load_squad(db, user, league_id)
+
+
+def load_squad(db: Session, user: AuthUser, league_id: int) -> Optional[schemas.SquadResponse]:
+    sync_ensure_membership(db, user, league_id)
+    squad = db.query(Squad).filter(Squad.user_id == user.id, Squad.league_id == league_id).first()
+    if not squad:
+        return None
+    return schemas.SquadResponse(
+        squad_id=squad.id,
+        league_id=league_id,
+        budget_used=float(squad.budget_used or 0),
+        bank=float(squad.bank or 0),
+        players=[serialize_player(player) for player in squad.players],
+    )
+
+
+@sync_app.get("/api/standings/{league_id}", response_model=schemas.StandingsResponse)
+def sync_standings(league_id: int, user: AuthUser = Depends(get_current_user)):
+    with SessionLocal() as db:
+        return load_standings(db, user, league_id)
+
+
+def load_standings(db: Session, user: AuthUser, league_id: int) -> schemas.StandingsResponse:
+    sync_ensure_membership(db, user, league_id)
+    rows = standings.page(db, league_id, 100)
+    entries = [
+        schemas.StandingOut(rank=row.rank, user_id=row.user_id, team_name=row.team_name, points=float(row.total_points))
+        for row in rows
+    ]
+    return schemas.StandingsResponse(standings=entries, next_cursor=None)
+
+
+def setup(clients: int) -> List[tuple]:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        seed_players(db)
+        player_ids = [player_id for (player_id,) in db.query(Player.id).order_by(Player.cost).limit(15)]
+        users = [User(name=f"User {index}", email=f"user{index}@example.com", password_hash="x") for index in range(clients)]
+        db.add_all(users)
+        db.flush()
+        leagues = [League(name=f"League {index}", created_by_user_id=users[0].id) for index in range(LEAGUES)]
+        db.add_all(leagues)
+        db.flush()
+        sessions = []
+        for index, user in enumerate(users):
+            league = leagues[index % LEAGUES]
+            membership = Membership(user_id=user.id, league_id=league.id)
+            squad = Squad(user_id=user.id, league_id=league.id, budget_used=0)
+            db.add_all([membership, squad])
+            db.flush()
+            standings.add_standing(db, membership, AuthUser(id=user.id, name=user.name))
+            db.add_all([SquadPlayer(squad_id=squad.id, player_id=player_id) for player_id in player_ids])
+            sessions.append((create_user_token(user.id, user.name, 0), league.id))
+        db.commit()
+        return sessions
+    finally:
+        db.close()
+
+
+async def drive(target: FastAPI, sessions: List[tuple], requests: int) -> dict:
+    latencies: List[float] = []
+    errors = Counter()
+    per_client = max(1, requests // len(sessions))
+    async with AsyncClient(transport=ASGITransport(app=target), base_url="http://bench") as client:
+
+        async def worker(token: str, league_id: int) -> None:
+            headers = {"Authorization": f"Bearer {token}"}
+            paths = ["/api/leagues/mine", f"/api/squad?league_id={league_id}", f"/api/standings/{league_id}"]
+            for index in range(per_client):
+                start = time.perf_counter()
+                try:
+                    response = await client.get(paths[index % len(paths)], headers=headers)
+                except Exception as exc:  # pool timeouts surface as exceptions through ASGITransport
+                    errors[type(exc).__name__] += 1
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    errors[response.status_code] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(token, league_id) for token, league_id in sessions))
+        elapsed = time.perf_counter() - started
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": percentile(latencies, 99),
+        "errors": dict(errors),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    sessions = setup(args.clients)
+    for label, target in (("sync", sync_app), ("async", app)):
+        result = asyncio.run(drive(target, sessions, args.requests))
+        print(
+            f"{label:6} clients={args.clients}  rps={result['rps']:8.1f}  p50={result['p50']:8.2f} ms  "
+            f"p99={result['p99']:8.2f} ms  errors={result['errors']}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Gameweek lock and auto-substitution over a large number of squads.
+
+Builds ``--squads`` squads of 15 players from a synthetic pool in a throwaway
+SQLite file, then times ``lock_gameweek`` (best lineup for every squad, bulk
+inserted) and ``substitute_zero_scorers`` after a gameweek of stats in which
+roughly one player in six scores nothing.
+
+    python -m backend.benchmarks.autolineup --squads 100000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="gridcap-bench-"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+from sqlalchemy import insert  # noqa: E402
+
+from ..autolineup import lock_gameweek, substitute_zero_scorers  # noqa: E402
+from ..db import Base, SessionLocal, engine  # noqa: E402
+from ..models import League, Lineup, LineupSlot, Player, PlayerGameweekStat, Squad, SquadPlayer, User  # noqa: E402
+from .synthetic import make_players  # noqa: E402
+
+MEMBERS_PER_LEAGUE = 1000
+
+
+def setup(squads: int, players: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.add_all(make_players(players))
+        db.flush()
+        player_ids = [player_id for (player_id,) in db.query(Player.id)]
+        db.execute(
+            insert(User), [{"name": f"User {i}", "email": f"user{i}@example.com", "password_hash": "x"} for i in range(squads)]
+        )
+        leagues = (squads + MEMBERS_PER_LEAGUE - 1) // MEMBERS_PER_LEAGUE
+        db.execute(insert(League), [{"name": f"League {i}", "created_by_user_id": 1} for i in range(leagues)])
+        db.execute(
+            insert(Squad),
+            [{"user_id": i + 1, "league_id": i // MEMBERS_PER_LEAGUE + 1, "budget_used": 0} for i in range(squads)],
+        )
+        db.execute(
+            insert(SquadPlayer),
+            [{"squad_id": i + 1, "player_id": player_id} for i in range(squads) for player_id in rng.sample(player_ids, 15)],
+        )
+        db.execute(
+            insert(PlayerGameweekStat),
+            [{"player_id": player_id, "gw": 0, "points": rng.randint(0, 30)} for player_id in player_ids],
+        )
+        db.commit()
+
+
+def record_gameweek(gw: int, seed: int = 11) -> None:
+    rng = random.Random(seed)
+    with SessionLocal() as db:
+        player_ids = [player_id for (player_id,) in db.query(Player.id)]
+        db.execute(
+            insert(PlayerGameweekStat),
+            [{"player_id": player_id, "gw": gw, "points": 0 if rng.random() < 1 / 6 else rng.randint(1, 30)} for player_id in player_ids],
+        )
+        db.commit()
+
+
+def timed(work) -> tuple:
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        result = work(db)
+        db.commit()
+        return result, time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--squads", type=int, default=100000)
+    parser.add_argument("--players", type=int, default=600)
+    args = parser.parse_args()
+    started = time.perf_counter()
+    setup(args.squads, args.players)
+    print(f"setup        {time.perf_counter() - started:7.2f} s  {args.squads} squads, {args.players} players")
+    created, elapsed = timed(lambda db: lock_gameweek(db, 1))
+    print(f"lock         {elapsed:7.2f} s  {created} lineups, {created / elapsed:,.0f} squads/s")
+    record_gameweek(1)
+    summary, elapsed = timed(lambda db: substitute_zero_scorers(db, 1))
+    print(f"substitute   {elapsed:7.2f} s  {summary.substitutions} substitutions in {len(summary.lineup_ids)} lineups")
+    with SessionLocal() as db:
+        print(f"stored       {db.query(Lineup).count()} lineups, {db.query(LineupSlot).count()} slots")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""EXPLAIN QUERY PLAN check for the /api/players search path.
+
+Builds a synthetic pool in an in-memory SQLite database, prints the plan and
+timing of representative searches and exits non-zero if any filtered search
+has a ``SCAN players`` step, with or without an index: walking an index that
+does not match the filters reads the whole table in index order. Only the
+unfiltered sorts may scan, since they walk their sort index and stop at the
+limit.
+
+    python -m backend.benchmarks.explain_players --players 2500
+"""
+import argparse
+import sys
+import time
+from decimal import Decimal
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from ..db import Base
+from ..player_search import PlayerFilters, build_query
+from .synthetic import make_players
+
+SCENARIOS = {
+    "positions": PlayerFilters(positions=["RB", "WR"]),
+    "position + cost range": PlayerFilters(positions=["QB"], min_cost=Decimal("8"), max_cost=Decimal("11")),
+    "teams": PlayerFilters(teams=["KC", "BUF", "SF"], sort="name"),
+    "name prefix": PlayerFilters(name_prefix="jal"),
+    "cost range only": PlayerFilters(min_cost=Decimal("12"), sort="-cost"),
+    "sort by name": PlayerFilters(sort="name"),
+    "sort by cost": PlayerFilters(sort="cost"),
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=2500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = Session(bind=engine)
+    db.add_all(make_players(args.players))
+    db.commit()
+    db.execute(text("ANALYZE"))
+
+    failures = 0
+    for label, filters in SCENARIOS.items():
+        query = build_query(db, filters).limit(50)
+        compiled = query.statement.compile(engine, compile_kwargs={"literal_binds": True})
+        plan = [row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))]
+        filtered = filters != PlayerFilters(sort=filters.sort)
+        scan = filtered and any(step.startswith("SCAN players") for step in plan)
+        failures += scan
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            query.all()
+        per_query = (time.perf_counter() - start) / args.repeat * 1000
+        print(f"{'SCAN' if scan else 'ok':4} {label:22} {per_query:7.3f} ms  {' | '.join(plan)}")
+    db.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Stat-feed ingestion throughput: first load, replay and a price/stat correction pass.
+
+Writes a synthetic feed of ``--players`` players with a stat line for each
+of ``--gameweeks`` gameweeks (plus ``--duplicates`` of the rows repeated) to
+a throwaway file, loads it into a throwaway SQLite database, loads it again
+(every row unchanged, so nothing is written) and then loads a correction
+file that moves one row in ten.
+
+    python -m backend.benchmarks.ingest_feed --players 5000 --gameweeks 18 --format ndjson
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+
+DB_DIR = tempfile.mkdtemp(prefix="gridcap-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(DB_DIR, 'bench.db')}")
+
+from ..db import Base, WriteSessionLocal, engine  # noqa: E402
+from ..ingest import ingest_lines, print_report  # noqa: E402
+from ..scoring import STAT_FIELDS  # noqa: E402
+from .synthetic import make_players  # noqa: E402
+
+COLUMNS = ["external_id", "name", "position", "team", "cost", "gw", *STAT_FIELDS]
+
+
+def feed_rows(players: int, gameweeks: int, duplicates: float, seed: int, corrections: float = 0.0):
+    rng = random.Random(seed)
+    pool = make_players(players)
+    for gw in range(1, gameweeks + 1):
+        for index, player in enumerate(pool):
+            stat_rng = random.Random(gw * 1_000_003 + index)
+            row = {
+                "external_id": f"ext-{index:06d}",
+                "name": player.name,
+                "position": player.position,
+                "team": player.team,
+                "cost": str(player.cost),
+                "gw": gw,
+                **{name: stat_rng.randint(0, 3) for name in STAT_FIELDS},
+            }
+            if corrections and rng.random() < corrections:
+                row["rec_yards"] += 10
+                row["cost"] = str(player.cost + 1)
+            yield row
+            if rng.random() < duplicates:
+                yield row
+
+
+def write_feed(path: str, fmt: str, rows) -> int:
+    count = 0
+    with open(path, "w", newline="") as handle:
+        writer = csv.DictWriter(handle, COLUMNS) if fmt == "csv" else None
+        if writer:
+            writer.writeheader()
+        for row in rows:
+            if writer:
+                writer.writerow(row)
+            else:
+                handle.write(json.dumps(row) + "\n")
+            count += 1
+    return count
+
+
+def load(path: str, fmt: str, batch_size: int, label: str) -> None:
+    with open(path, newline="") as handle:
+        report = ingest_lines(WriteSessionLocal, handle, fmt, batch_size)
+    print(f"-- {label}")
+    print_report(report)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=5000)
+    parser.add_argument("--gameweeks", type=int, default=18)
+    parser.add_argument("--duplicates", type=float, default=0.05)
+    parser.add_argument("--format", choices=("csv", "ndjson"), default="csv")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    feed = os.path.join(DB_DIR, f"feed.{args.format}")
+    rows = write_feed(feed, args.format, feed_rows(args.players, args.gameweeks, args.duplicates, seed=1))
+    print(f"feed: {rows} rows, {os.path.getsize(feed) / 1e6:.1f} MB of {args.format}")
+    load(feed, args.format, args.batch_size, "first load")
+    load(feed, args.format, args.batch_size, "replay")
+    corrections = os.path.join(DB_DIR, f"corrections.{args.format}")
+    write_feed(corrections, args.format, feed_rows(args.players, args.gameweeks, 0.0, seed=2, corrections=0.1))
+    load(corrections, args.format, args.batch_size, "corrections")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
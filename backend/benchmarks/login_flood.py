@@ -0,0 +1,112 @@
+"""Measure /api/players latency while /api/auth/login is flooded.
+
+Runs the app in-process over ASGITransport against a throwaway SQLite file
+and prints p50/p99 latency of /api/players with and without a concurrent
+login flood, plus the status codes the flood received.
+Rate limits are off unless ``RATE_LIMITS_ENABLED=1``; with them on, most of
+the flood is refused before it reaches the password hasher.
+
+    python -m backend.benchmarks.login_flood --logins 64 --requests 300
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import List
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="gridcap-bench-"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+os.environ.setdefault("RATE_LIMITS_ENABLED", "0")
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+
+from ..app import app  # noqa: E402
+from ..auth import create_user_token, get_password_hash  # noqa: E402
+from ..db import Base, SessionLocal, engine  # noqa: E402
+from ..models import User  # noqa: E402
+from ..seed_players import seed_players  # noqa: E402
+
+PASSWORD = "benchmark-password"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def setup() -> str:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        seed_players(db)
+        user = User(name="Bench", email="bench@example.com", password_hash=get_password_hash(PASSWORD))
+        db.add(user)
+        db.commit()
+        return create_user_token(user.id, user.name, user.token_version)
+    finally:
+        db.close()
+
+
+async def sample_players(client: AsyncClient, token: str, requests: int, concurrency: int) -> List[float]:
+    latencies: List[float] = []
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async def worker(count: int) -> None:
+        for _ in range(count):
+            start = time.perf_counter()
+            response = await client.get("/api/players", headers=headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200
+
+    await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+    return latencies
+
+
+async def flood_logins(client: AsyncClient, stop: asyncio.Event, outcomes: Counter) -> None:
+    body = {"email": "bench@example.com", "password": PASSWORD}
+    while not stop.is_set():
+        response = await client.post("/api/auth/login", json=body)
+        outcomes[response.status_code] += 1
+        if response.status_code == 429:
+            await asyncio.sleep(0.01)
+
+
+def report(label: str, latencies: List[float]) -> None:
+    print(
+        f"{label:14} n={len(latencies):4}  p50={statistics.median(latencies):7.2f} ms  "
+        f"p99={percentile(latencies, 99):7.2f} ms  max={max(latencies):7.2f} ms"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    token = setup()
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        report("idle", await sample_players(client, token, args.requests, args.concurrency))
+
+        stop = asyncio.Event()
+        outcomes: Counter = Counter()
+        flood = [asyncio.ensure_future(flood_logins(client, stop, outcomes)) for _ in range(args.logins)]
+        await asyncio.sleep(0.5)
+        report("login flood", await sample_players(client, token, args.requests, args.concurrency))
+        stop.set()
+        await asyncio.gather(*flood)
+    print("login responses:", dict(outcomes))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=64, help="concurrent login loops")
+    parser.add_argument("--requests", type=int, default=300, help="/api/players requests per phase")
+    parser.add_argument("--concurrency", type=int, default=10)
+    asyncio.run(run(parser.parse_args()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Cost of request metrics: middleware per request, engine listeners per statement, and a scrape.
+
+The middleware is timed around a bare ASGI app that answers at once, called
+directly so no client or server time is included; the listeners around
+``SELECT 1`` on a throwaway SQLite file, with and without instrumentation;
+the scrape by rendering a registry holding ``--routes`` routes. Each
+comparison alternates the two variants for ``--rounds`` rounds and keeps the
+fastest round of each, since single runs on a shared machine are noisy.
+
+    python -m backend.benchmarks.metrics_overhead --requests 100000 --statements 20000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+DB_DIR = tempfile.mkdtemp(prefix="gridcap-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(DB_DIR, 'bench.db')}")
+
+from sqlalchemy import create_engine, text  # noqa: E402
+
+from ..metrics import Metrics, MetricsMiddleware, RequestStats, current_request, instrument_engines  # noqa: E402
+
+
+class Route:
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+
+async def bare_app(scope, receive, send) -> None:
+    scope["route"] = ROUTE
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+ROUTE = Route("/api/players/{player_id}/history")
+
+
+async def drive(app, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message) -> None:
+        pass
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app({"type": "http", "method": "GET", "path": "/api/players/1/history"}, receive, send)
+    return time.perf_counter() - started
+
+
+def time_statements(engine, statements: int, instrumented: bool) -> float:
+    token = current_request.set(RequestStats()) if instrumented else None
+    try:
+        with engine.connect() as conn:
+            query = text("SELECT 1")
+            started = time.perf_counter()
+            for _ in range(statements):
+                conn.execute(query)
+            return time.perf_counter() - started
+    finally:
+        if token is not None:
+            current_request.reset(token)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--statements", type=int, default=20_000)
+    parser.add_argument("--routes", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    registry = Metrics()
+    middleware = MetricsMiddleware(bare_app, registry)
+    bare = wrapped = float("inf")
+    for _ in range(args.rounds):
+        bare = min(bare, asyncio.run(drive(bare_app, args.requests)))
+        wrapped = min(wrapped, asyncio.run(drive(middleware, args.requests)))
+    per_request = (wrapped - bare) / args.requests * 1e6
+    print(f"middleware: {bare / args.requests * 1e6:.2f} µs bare, {wrapped / args.requests * 1e6:.2f} µs wrapped")
+    print(f"  overhead {per_request:.2f} µs per request")
+
+    plain = create_engine(f"sqlite:///{os.path.join(DB_DIR, 'plain.db')}")
+    hooked = create_engine(f"sqlite:///{os.path.join(DB_DIR, 'hooked.db')}")
+    instrument_engines([hooked])
+    base = timed = float("inf")
+    for _ in range(args.rounds):
+        base = min(base, time_statements(plain, args.statements, False))
+        timed = min(timed, time_statements(hooked, args.statements, True))
+    print(f"SELECT 1: {base / args.statements * 1e6:.2f} µs plain, {timed / args.statements * 1e6:.2f} µs instrumented")
+    print(f"  overhead {(timed - base) / args.statements * 1e6:.2f} µs per statement")
+
+    for index in range(args.routes):
+        stats = registry.route("GET", f"/api/route/{index}")
+        for value in range(100):
+            stats.latency.observe(value / 1000)
+        stats.statuses[200] = 100
+    started = time.perf_counter()
+    body = registry.render()
+    rendered = time.perf_counter() - started
+    print(f"scrape: {rendered * 1000:.2f} ms for {args.routes + 1} routes, {len(body) / 1024:.0f} KiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Cost of rate limiting per request, keyed by user token and by client IP.
+
+The limiter runs inside ``IdempotencyMiddleware``, so that middleware is
+timed around a bare ASGI app that answers at once, with and without a
+limiter, called directly so no client or server time is included, and with
+limits high enough that nothing is refused. Requests cycle through ``--users`` signed tokens
+(each verified once, then recognised by its header value as in the app) or
+as many client addresses. Each comparison alternates the two variants for
+``--rounds`` rounds and keeps the fastest round of each.
+
+    python -m backend.benchmarks.ratelimit_overhead --requests 200000
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import List
+
+from ..auth import create_user_token
+from ..idempotency import IdempotencyMiddleware, IdempotencyStore
+from ..ratelimit import Limit, RateLimiter, StripedMemoryBackend
+
+
+async def bare_app(scope, receive, send) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def scopes(users: int, tokens: bool) -> List[dict]:
+    made = []
+    for index in range(users):
+        headers = [(b"host", b"bench"), (b"user-agent", b"bench"), (b"accept", b"*/*")]
+        if tokens:
+            headers.append((b"authorization", f"Bearer {create_user_token(index + 1, 'Bench', 0)}".encode()))
+        made.append(
+            {
+                "type": "http",
+                "method": "POST",
+                "path": "/api/lineup/set",
+                "headers": headers,
+                "client": (f"10.0.{index // 256}.{index % 256}", 40000),
+            }
+        )
+    return made
+
+
+async def drive(app, requests: List[dict], count: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message) -> None:
+        pass
+
+    total = len(requests)
+    started = time.perf_counter()
+    for index in range(count):
+        await app(requests[index % total], receive, send)
+    return time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    generous = Limit.of(rate=1e9, burst=1e9)
+    limiter = RateLimiter(
+        limits={"auth": generous, "reads": generous, "writes": generous},
+        backend=StripedMemoryBackend(),
+        enabled=True,
+    )
+    unlimited_app = IdempotencyMiddleware(bare_app, IdempotencyStore())
+    limited_app = IdempotencyMiddleware(bare_app, IdempotencyStore(), limiter)
+    for label, tokens in (("user token", True), ("client IP", False)):
+        requests = scopes(args.users, tokens)
+        asyncio.run(drive(limited_app, requests, len(requests)))  # verify each token once, as a warm app has
+        unlimited = limited = float("inf")
+        for _ in range(args.rounds):
+            unlimited = min(unlimited, asyncio.run(drive(unlimited_app, requests, args.requests)))
+            limited = min(limited, asyncio.run(drive(limited_app, requests, args.requests)))
+        print(
+            f"{label}: {unlimited / args.requests * 1e6:.3f} µs unlimited, "
+            f"{limited / args.requests * 1e6:.3f} µs limited, "
+            f"overhead {(limited - unlimited) / args.requests * 1e6:.3f} µs per request"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
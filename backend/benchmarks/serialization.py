@@ -0,0 +1,107 @@
+"""Response serialization cost per 1,000 rows: pydantic models and response_model validation vs RowsResponse.
+
+For player and standings rows, times the path the list endpoints used to take
+(a pydantic model per row, then FastAPI's ``serialize_response`` validating
+the ``response_model`` again and ``JSONResponse`` encoding with the stdlib)
+against ``RowsResponse`` encoding the same dicts with orjson. No request or
+database time is included. Each variant keeps its fastest of ``--rounds``.
+
+    python -m backend.benchmarks.serialization --rows 1000 --rounds 20
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from decimal import Decimal
+from typing import Callable, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from .. import schemas
+from ..responses import RowsResponse
+
+POSITIONS = ("QB", "RB", "WR", "TE", "K", "DST")
+
+
+def player_rows(count: int) -> List[dict]:
+    return [
+        {
+            "id": index,
+            "name": f"Player {index}",
+            "position": POSITIONS[index % len(POSITIONS)],
+            "team": "KC",
+            "cost": 4.5 + index % 90 / 10,
+            "form": index % 17 / 2,
+            "trend": index % 7 - 3.0,
+            "value": index % 13 / 10,
+        }
+        for index in range(count)
+    ]
+
+
+def standing_rows(count: int) -> List[dict]:
+    return [
+        {"rank": index + 1, "user_id": index, "team_name": f"Team {index}", "points": Decimal(2000 - index) / 4}
+        for index in range(count)
+    ]
+
+
+def validated(model, response_model) -> Callable[[List[dict]], bytes]:
+    field = create_response_field(name="response", type_=response_model)
+
+    def encode(rows: List[dict]) -> bytes:
+        if model is schemas.StandingOut:
+            content = schemas.StandingsResponse(
+                standings=[model(**{**row, "points": float(row["points"])}) for row in rows]
+            )
+        else:
+            content = [model(**row) for row in rows]
+        data = asyncio.run(serialize_response(field=field, response_content=content))
+        return JSONResponse(data).body
+
+    return encode
+
+
+def fast(wrap: bool) -> Callable[[List[dict]], bytes]:
+    def encode(rows: List[dict]) -> bytes:
+        return RowsResponse({"standings": rows, "next_cursor": None} if wrap else rows).body
+
+    return encode
+
+
+def best(encode: Callable[[List[dict]], bytes], rows: List[dict], rounds: int) -> float:
+    fastest = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        encode(rows)
+        fastest = min(fastest, time.perf_counter() - started)
+    return fastest
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    cases = [
+        ("players", player_rows(args.rows), validated(schemas.PlayerOut, List[schemas.PlayerOut]), fast(False)),
+        ("standings", standing_rows(args.rows), validated(schemas.StandingOut, schemas.StandingsResponse), fast(True)),
+    ]
+    per_thousand = 1000 / args.rows * 1000
+    for name, rows, old, new in cases:
+        assert json.loads(old(rows)) == json.loads(new(rows)), f"{name}: encodings differ"
+        before = best(old, rows, args.rounds)
+        after = best(new, rows, args.rounds)
+        print(
+            f"{name}: {before * per_thousand:.2f} ms per 1,000 rows validated, "
+            f"{after * per_thousand:.2f} ms with RowsResponse ({before / after:.1f}x)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
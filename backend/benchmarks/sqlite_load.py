@@ -0,0 +1,118 @@
+"""Concurrent read/write throughput of the bare SQLite engine versus the tuned profile.
+
+Each run uses a fresh database file and the same mixed workload: reader
+threads page through a league leaderboard while writer threads insert and
+update rows in short transactions.
+
+    python -m backend.benchmarks.sqlite_load --readers 8 --writers 4 --seconds 5
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+from ..db import make_engine
+
+LEAGUES = 50
+ROWS = 20000
+
+
+def baseline_engines(url: str) -> Tuple[Engine, Engine]:
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    return engine, engine
+
+
+def tuned_engines(url: str) -> Tuple[Engine, Engine]:
+    return make_engine(url), make_engine(url, writer=True)
+
+
+def prepare(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE entries (id INTEGER PRIMARY KEY, league_id INTEGER, points INTEGER)"))
+        conn.execute(text("CREATE INDEX ix_entries_league_points ON entries (league_id, points)"))
+        conn.execute(
+            text("INSERT INTO entries (league_id, points) VALUES (:league_id, :points)"),
+            [{"league_id": i % LEAGUES, "points": random.randint(0, 500)} for i in range(ROWS)],
+        )
+
+
+def run_profile(name: str, factory: Callable[[str], Tuple[Engine, Engine]], args: argparse.Namespace) -> Dict[str, float]:
+    path = os.path.join(tempfile.mkdtemp(prefix="gridcap-sqlite-"), "load.db")
+    url = f"sqlite:///{path}"
+    reader, writer = factory(url)
+    prepare(writer)
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def bump(key: str) -> None:
+        with lock:
+            counts[key] += 1
+
+    def read_loop() -> None:
+        rng = random.Random()
+        while time.perf_counter() < deadline:
+            try:
+                with reader.connect() as conn:
+                    conn.execute(
+                        text("SELECT id, points FROM entries WHERE league_id = :league ORDER BY points DESC LIMIT 25"),
+                        {"league": rng.randrange(LEAGUES)},
+                    ).all()
+                bump("reads")
+            except OperationalError:
+                bump("errors")
+
+    def write_loop() -> None:
+        rng = random.Random()
+        while time.perf_counter() < deadline:
+            try:
+                with writer.begin() as conn:
+                    points = conn.execute(
+                        text("SELECT points FROM entries WHERE id = :id"), {"id": rng.randint(1, ROWS)}
+                    ).scalar()
+                    conn.execute(
+                        text("UPDATE entries SET points = :points WHERE id = :id"),
+                        {"points": (points or 0) + 1, "id": rng.randint(1, ROWS)},
+                    )
+                    conn.execute(
+                        text("INSERT INTO entries (league_id, points) VALUES (:league, 0)"),
+                        {"league": rng.randrange(LEAGUES)},
+                    )
+                bump("writes")
+            except OperationalError:
+                bump("errors")
+
+    threads = [threading.Thread(target=read_loop) for _ in range(args.readers)]
+    threads += [threading.Thread(target=write_loop) for _ in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    reader.dispose()
+    writer.dispose()
+    result = {key: value / args.seconds for key, value in counts.items()}
+    print(f"{name:9} reads/s={result['reads']:9.1f}  writes/s={result['writes']:8.1f}  errors/s={result['errors']:6.2f}")
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    run_profile("baseline", baseline_engines, args)
+    run_profile("tuned", tuned_engines, args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
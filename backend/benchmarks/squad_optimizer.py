@@ -0,0 +1,113 @@
+"""Squad optimizer: agreement with exhaustive search and solve time on large pools.
+
+The exhaustive check enumerates every squad of the seed catalog that fits the
+position limits, pruning only on budget and squad size, and compares the best
+one with the optimizer under random projections. The timing run solves
+synthetic pools of ``--players`` players.
+
+    python -m backend.benchmarks.squad_optimizer --players 2000 --runs 3
+"""
+import argparse
+import itertools
+import random
+import statistics
+import sys
+import time
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+
+from ..optimizer import POSITION_LIMITS, SQUAD_BUDGET, SQUAD_SIZE, Candidate, optimize_squad, to_cents
+from ..seed_players import PLAYERS
+from .synthetic import make_players
+
+
+def with_projections(pool: List[Tuple[int, str, int]], seed: int) -> List[Candidate]:
+    rng = random.Random(seed)
+    return [Candidate(id=i, position=position, cost=cost, points=round(rng.uniform(0, 25), 1)) for i, position, cost in pool]
+
+
+def exhaustive(candidates: List[Candidate], budget: int) -> Optional[Tuple[float, int]]:
+    """(points, cost) of the best squad found by enumerating every per-position combination."""
+    per_position: List[List[Tuple[int, int, float]]] = []
+    for position, (low, high) in POSITION_LIMITS.items():
+        players = [c for c in candidates if c.position == position]
+        per_position.append(
+            [
+                (count, sum(c.cost for c in picked), sum(c.points for c in picked))
+                for count in range(low, high + 1)
+                for picked in itertools.combinations(players, count)
+            ]
+        )
+    # The last position only has to contribute its best affordable option of the exact size left.
+    last: Dict[int, Tuple[List[int], List[Tuple[float, int]]]] = {}
+    for count, cost, points in sorted(per_position.pop(), key=lambda option: (option[1], -option[2])):
+        costs, best_so_far = last.setdefault(count, ([], []))
+        running = best_so_far[-1] if best_so_far else None
+        costs.append(cost)
+        best_so_far.append((points, cost) if running is None or points > running[0] else running)
+    best: Optional[Tuple[float, int]] = None
+
+    def walk(index: int, count: int, cost: int, points: float) -> None:
+        nonlocal best
+        if index == len(per_position):
+            costs, best_so_far = last.get(SQUAD_SIZE - count, ([], []))
+            position = bisect_right(costs, budget - cost)
+            if position:
+                option_points, option_cost = best_so_far[position - 1]
+                if best is None or (points + option_points, -cost - option_cost) > (best[0], -best[1]):
+                    best = (points + option_points, cost + option_cost)
+            return
+        for picked, option_cost, option_points in per_position[index]:
+            if count + picked <= SQUAD_SIZE and cost + option_cost <= budget:
+                walk(index + 1, count + picked, cost + option_cost, points + option_points)
+
+    walk(0, 0, 0, 0.0)
+    return best
+
+
+def check_seed_catalog(rounds: int) -> int:
+    pool = [(i, position, to_cents(cost)) for i, (_, position, _, cost) in enumerate(PLAYERS)]
+    budget = to_cents(SQUAD_BUDGET)
+    mismatches = 0
+    for seed in range(rounds):
+        candidates = with_projections(pool, seed)
+        started = time.perf_counter()
+        expected = exhaustive(candidates, budget)
+        brute_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        result = optimize_squad(candidates)
+        optimizer_ms = (time.perf_counter() - started) * 1000
+        ok = expected is not None and abs(result.points - expected[0]) < 1e-6 and result.cost == expected[1]
+        mismatches += not ok
+        print(
+            f"seed catalog #{seed}: exhaustive={expected[0]:7.1f} in {brute_ms:8.1f} ms  "
+            f"optimizer={result.points:7.1f} in {optimizer_ms:6.1f} ms  {'ok' if ok else 'MISMATCH'}"
+        )
+    return mismatches
+
+
+def time_large_pool(players: int, runs: int) -> Dict[str, float]:
+    pool = [(i, player.position, to_cents(player.cost)) for i, player in enumerate(make_players(players))]
+    timings = []
+    for seed in range(runs):
+        candidates = with_projections(pool, seed)
+        started = time.perf_counter()
+        result = optimize_squad(candidates)
+        timings.append((time.perf_counter() - started) * 1000)
+        print(f"{players} players #{seed}: {result.points:7.1f} points, cost {result.cost / 100:5.1f} in {timings[-1]:6.1f} ms")
+    return {"median": statistics.median(timings), "max": max(timings)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    mismatches = check_seed_catalog(args.runs)
+    timing = time_large_pool(args.players, args.runs)
+    print(f"{args.players} players: median {timing['median']:.1f} ms, max {timing['max']:.1f} ms")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
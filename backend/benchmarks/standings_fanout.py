@@ -0,0 +1,73 @@
+"""Standings push: diff once per league, fan out to many subscribers.
+
+Subscribes ``--subscribers`` clients spread over ``--leagues`` leagues of
+``--members`` teams to an in-process broker, then runs ``--rounds`` score
+updates that move every team's points. Each round diffs every league once
+and queues the serialized diff for its subscribers; one subscriber per
+league never reads, so it is dropped once its queue fills.
+
+    python -m backend.benchmarks.standings_fanout --subscribers 10000 --leagues 100
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+from ..broker import InProcessBroker
+from ..standings_feed import StandingsFeed, channel
+
+
+def league_rows(members: int, rng: random.Random) -> dict:
+    points = sorted((round(rng.uniform(0, 500), 1) for _ in range(members)), reverse=True)
+    return {user_id: (rank, user_id, f"Team {user_id}", value) for rank, (user_id, value) in enumerate(enumerate(points, 1), 1)}
+
+
+def rescored(rows: dict, rng: random.Random) -> dict:
+    moved = {user_id: points + rng.randint(0, 25) for user_id, (_, _, _, points) in rows.items()}
+    ordered = sorted(moved.items(), key=lambda item: (-item[1], item[0]))
+    return {user_id: (rank, user_id, f"Team {user_id}", value) for rank, (user_id, value) in enumerate(ordered, 1)}
+
+
+async def run(subscribers: int, leagues: int, members: int, rounds: int, queue_size: int) -> int:
+    rng = random.Random(5)
+    broker = InProcessBroker(queue_size=queue_size)
+    feed = StandingsFeed(broker)
+    feed._rows = {league_id: league_rows(members, rng) for league_id in range(1, leagues + 1)}
+    readers = []
+    for index in range(subscribers):
+        subscription = broker.subscribe(channel(index % leagues + 1))
+        if index >= leagues:  # the first subscriber of each league never reads
+            readers.append(subscription)
+    diff_ms, publish_ms, received = [], [], 0
+    for _ in range(rounds):
+        current = {league_id: rescored(rows, rng) for league_id, rows in feed._rows.items()}
+        started = time.perf_counter()
+        feed.publish_changes(current)
+        publish_ms.append((time.perf_counter() - started) * 1000)
+        for subscription in readers:
+            while subscription.pending():
+                await subscription.get()
+                received += 1
+    per_round = sum(publish_ms) / len(publish_ms)
+    print(
+        f"{subscribers} subscribers, {leagues} leagues of {members}: "
+        f"{per_round:.1f} ms per round to diff, serialize and queue ({per_round / leagues * 1000:.0f} us per league)"
+    )
+    print(f"diffs published {feed.diffs_published}, messages read {received}, slow subscribers dropped {broker.dropped}")
+    return 0 if broker.dropped == leagues and received == len(readers) * rounds else 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=10000)
+    parser.add_argument("--leagues", type=int, default=100)
+    parser.add_argument("--members", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--queue-size", type=int, default=8)
+    args = parser.parse_args()
+    return asyncio.run(run(args.subscribers, args.leagues, args.members, args.rounds, args.queue_size))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
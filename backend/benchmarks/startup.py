@@ -0,0 +1,101 @@
+"""Startup time: importing the app to serving its first request, in a fresh interpreter each run.
+
+Migrates and seeds a throwaway database once, then starts ``--runs`` child
+processes. Each child times importing ``backend.app``, running the startup
+handlers (the schema check) and serving ``GET /api/players`` over
+ASGITransport with a signed token. Afterwards it times ``create_all`` plus the
+seed check on the same migrated database, which is what every import used to
+pay before migrations moved to deploy time. The parent also reports each child's wall
+time including interpreter start. Medians and best runs are printed as JSON
+so they can be tracked across commits.
+
+    python -m backend.benchmarks.startup --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+STARTED = time.perf_counter()
+PHASES = ("import", "startup", "first_request", "total", "legacy_create_all_and_seed", "wall")
+
+
+def child() -> None:
+    import asyncio
+
+    from httpx import ASGITransport, AsyncClient
+
+    imported = time.perf_counter()
+    from ..app import app
+
+    timings = {"import": time.perf_counter() - imported}
+    from ..auth import create_user_token
+
+    headers = {"Authorization": f"Bearer {create_user_token(1, 'Bench', 0)}"}
+
+    async def serve() -> int:
+        began = time.perf_counter()
+        await app.router.startup()
+        timings["startup"] = time.perf_counter() - began
+        began = time.perf_counter()
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            response = await client.get("/api/players", headers=headers)
+        timings["first_request"] = time.perf_counter() - began
+        return response.status_code
+
+    status = asyncio.run(serve())
+    timings["total"] = time.perf_counter() - STARTED
+    if status != 200:
+        raise SystemExit(f"first request answered {status}")
+
+    from ..db import Base, SessionLocal, engine
+    from ..seed_players import seed_players
+
+    began = time.perf_counter()
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        seed_players(db)
+    timings["legacy_create_all_and_seed"] = time.perf_counter() - began
+    print(json.dumps(timings))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return 0
+
+    db_dir = tempfile.mkdtemp(prefix="gridcap-bench-")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(db_dir, 'bench.db')}")
+    subprocess.run([sys.executable, "-m", "backend.manage", "migrate", "--seed"], env=env, check=True, capture_output=True)
+
+    runs = []
+    for _ in range(args.runs):
+        began = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-m", "backend.benchmarks.startup", "--child"], env=env, check=True, capture_output=True
+        )
+        timings = json.loads(result.stdout.decode().strip().splitlines()[-1])
+        timings["wall"] = time.perf_counter() - began
+        runs.append(timings)
+
+    summary = {
+        phase: {
+            "median_ms": round(statistics.median(run[phase] for run in runs) * 1000, 2),
+            "best_ms": round(min(run[phase] for run in runs) * 1000, 2),
+        }
+        for phase in PHASES
+    }
+    print(json.dumps({"benchmark": "startup", "runs": args.runs, "phases": summary}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+import random
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import List, Tuple
+
+from sqlalchemy.orm import Session
+
+from .. import standings
+from ..auth import AuthUser
+from ..models import League, Membership, Player, User
+
+POSITIONS = ["QB", "RB", "WR", "TE", "K", "DST"]
+TEAMS = [
+    "ARI", "ATL", "BAL", "BUF", "CAR", "CHI", "CIN", "CLE", "DAL", "DEN", "DET", "GB", "HOU", "IND", "JAX", "KC",
+    "LAC", "LAR", "LV", "MIA", "MIN", "NE", "NO", "NYG", "NYJ", "PHI", "PIT", "SEA", "SF", "TB", "TEN", "WAS",
+]
+FIRST_NAMES = ["Aaron", "Brandon", "Chris", "David", "Evan", "Frank", "Greg", "Henry", "Isaiah", "Jalen", "Kyle", "Luke"]
+LAST_NAMES = ["Adams", "Brown", "Carter", "Davis", "Evans", "Fields", "Green", "Hill", "Irving", "Jones", "King", "Lewis"]
+
+
+def make_players(count: int, seed: int = 7) -> List[Player]:
+    """Build a deterministic synthetic player pool of ``count`` unsaved rows."""
+    rng = random.Random(seed)
+    players = []
+    for index in range(count):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {index}"
+        cost = Decimal(rng.randint(40, 130)) / 10
+        players.append(Player(name=name, position=rng.choice(POSITIONS), team=rng.choice(TEAMS), cost=cost))
+    return players
+
+
+# Squads are drawn from players at or under this price, so any fifteen fit the salary cap.
+AFFORDABLE_COST = Decimal("6.5")
+
+
+@dataclass
+class UserPlan:
+    """What one synthetic user registers as, which league they join and the squad and lineup they pick."""
+
+    name: str
+    email: str
+    password: str
+    league_id: int
+    player_ids: List[int]
+    starters: List[int]
+    captain: int
+    vice: int
+
+
+def seed_world(db: Session, leagues: int, players: int, seed: int = 7) -> Tuple[List[int], List[Tuple[int, Decimal]]]:
+    """Insert a ``players`` pool and ``leagues`` leagues run by one commissioner.
+
+    Returns the league ids and each player's (id, cost).
+    """
+    pool = make_players(players, seed)
+    commissioner = User(name="Commissioner", email="commissioner@example.com", password_hash="x")
+    db.add_all([*pool, commissioner])
+    db.flush()
+    priced = [(player.id, player.cost) for player in pool]
+    created = [League(name=f"League {index}", created_by_user_id=commissioner.id) for index in range(leagues)]
+    db.add_all(created)
+    db.flush()
+    for league in created:
+        membership = Membership(user_id=commissioner.id, league_id=league.id)
+        db.add(membership)
+        db.flush()
+        standings.add_standing(db, membership, AuthUser(id=commissioner.id, name=commissioner.name))
+    db.commit()
+    return [league.id for league in created], priced
+
+
+def plan_users(count: int, league_ids: List[int], pool: List[Tuple[int, Decimal]], seed: int = 11) -> List[UserPlan]:
+    """Deterministic plans for ``count`` users spread round-robin over ``league_ids``."""
+    rng = random.Random(seed)
+    affordable = [player_id for player_id, cost in pool if cost <= AFFORDABLE_COST]
+    if len(affordable) < 15:
+        raise ValueError(f"only {len(affordable)} players cost {AFFORDABLE_COST} or less; use a larger pool")
+    plans = []
+    for index in range(count):
+        player_ids = rng.sample(affordable, 15)
+        starters = player_ids[:9]
+        plans.append(
+            UserPlan(
+                name=f"Load User {index}",
+                email=f"load{index}@example.com",
+                password=f"password-{index}",
+                league_id=league_ids[index % len(league_ids)],
+                player_ids=player_ids,
+                starters=starters,
+                captain=starters[0],
+                vice=starters[1],
+            )
+        )
+    return plans
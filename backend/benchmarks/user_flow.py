@@ -0,0 +1,275 @@
+"""Load test of the full user flow: register, join, save squad, set lineup, standings.
+
+Seeds a throwaway database with a ``--players`` pool and ``--leagues``
+leagues, then runs ``--users`` synthetic users through the flow with
+``--concurrency`` of them in flight at once. Requests go to the app
+in-process over ASGITransport, or with ``--url`` to a running server; for a
+server, export the same ``DATABASE_URL`` to both so the harness seeds the
+database the server reads. SQL statement counts and SQL time per step come
+from the server's ``/metrics``, sampled before and after the run.
+
+Results are written as JSON (``--output``, stdout by default) with
+throughput and p50/p95/p99 latency per step. ``--compare`` checks them
+against an earlier results file and exits 1 when a step's p95 or SQL count
+grew, or throughput fell, by more than ``--tolerance``.
+
+bcrypt runs at ``BCRYPT_ROUNDS=4`` unless the variable is set, so that
+register measures the app rather than the hash; set it to 12 to include it.
+Rate limits are off unless ``RATE_LIMITS_ENABLED=1``, since every synthetic
+user registers from the same address.
+
+    python -m backend.benchmarks.user_flow --users 2000 --leagues 20 --players 500 --concurrency 50 --output after.json
+    python -m backend.benchmarks.user_flow --users 2000 --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+DB_DIR = tempfile.mkdtemp(prefix="gridcap-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(DB_DIR, 'bench.db')}")
+os.environ.setdefault("RATE_LIMITS_ENABLED", "0")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+
+from ..app import app  # noqa: E402
+from ..auth import BCRYPT_ROUNDS  # noqa: E402
+from ..db import DATABASE_URL, Base, SessionLocal, engine  # noqa: E402
+from .login_flood import percentile  # noqa: E402
+from .synthetic import UserPlan, plan_users, seed_world  # noqa: E402
+
+# Flow steps and the (method, route template) each one hits, as /metrics labels them.
+STEPS: Dict[str, Tuple[str, str]] = {
+    "register": ("POST", "/api/auth/register"),
+    "join": ("POST", "/api/leagues/join"),
+    "save_squad": ("POST", "/api/squad/save"),
+    "set_lineup": ("POST", "/api/lineup/set"),
+    "standings": ("GET", "/api/standings/{league_id}"),
+}
+# Responses retried after Retry-After rather than counted as failures: the password hasher shedding load.
+RETRY_STATUSES = {429, 503}
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Counter] = defaultdict(Counter)
+        self.retries: Counter = Counter()
+        self.flows = 0
+
+    async def call(self, client: AsyncClient, step: str, method: str, path: str, **kwargs):
+        while True:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+            except Exception as exc:
+                self.errors[step][type(exc).__name__] += 1
+                return None
+            if response.status_code in RETRY_STATUSES:
+                self.retries[step] += 1
+                await asyncio.sleep(float(response.headers.get("Retry-After", "0.05")))
+                continue
+            self.latencies[step].append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                self.errors[step][str(response.status_code)] += 1
+                return None
+            return response
+
+
+async def run_flow(client: AsyncClient, recorder: Recorder, plan: UserPlan) -> None:
+    body = {"name": plan.name, "email": plan.email, "password": plan.password}
+    response = await recorder.call(client, "register", "POST", "/api/auth/register", json=body)
+    if response is None:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+    steps = [
+        ("join", "POST", "/api/leagues/join", {"league_id": plan.league_id}),
+        ("save_squad", "POST", "/api/squad/save", {"league_id": plan.league_id, "player_ids": plan.player_ids}),
+        (
+            "set_lineup",
+            "POST",
+            "/api/lineup/set",
+            {"league_id": plan.league_id, "gw": 1, "starters": plan.starters, "captain": plan.captain, "vice": plan.vice},
+        ),
+        ("standings", "GET", f"/api/standings/{plan.league_id}", None),
+    ]
+    for step, method, path, payload in steps:
+        if await recorder.call(client, step, method, path, json=payload, headers=headers) is None:
+            return
+    recorder.flows += 1
+
+
+def sql_totals(text: str) -> Dict[Tuple[str, str], Tuple[float, float, float]]:
+    """(statements, requests, SQL seconds) per (method, route) from a Prometheus scrape."""
+    totals: Dict[Tuple[str, str], List[float]] = defaultdict(lambda: [0.0, 0.0, 0.0])
+    fields = {
+        "gridcap_http_request_sql_statements_sum": 0,
+        "gridcap_http_request_sql_statements_count": 1,
+        "gridcap_http_request_sql_seconds_total": 2,
+    }
+    for line in text.splitlines():
+        name, _, rest = line.partition("{")
+        if name not in fields:
+            continue
+        labels, _, value = rest.rpartition("} ")
+        pairs = dict(pair.split("=", 1) for pair in labels.split(","))
+        key = (pairs["method"].strip('"'), pairs["route"].strip('"'))
+        totals[key][fields[name]] = float(value)
+    return {key: tuple(values) for key, values in totals.items()}
+
+
+async def drive(client: AsyncClient, plans: List[UserPlan], concurrency: int) -> Tuple[Recorder, float, Dict]:
+    recorder = Recorder()
+    before = sql_totals((await client.get("/metrics")).text)
+    queue = iter(plans)
+
+    async def worker() -> None:
+        for plan in queue:
+            await run_flow(client, recorder, plan)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    after = sql_totals((await client.get("/metrics")).text)
+    sql = {}
+    for step, key in STEPS.items():
+        old = before.get(key, (0.0, 0.0, 0.0))
+        new = after.get(key, (0.0, 0.0, 0.0))
+        requests = new[1] - old[1]
+        if requests:
+            sql[step] = ((new[0] - old[0]) / requests, (new[2] - old[2]) / requests * 1000)
+    return recorder, elapsed, sql
+
+
+def summarize(recorder: Recorder, elapsed: float, sql: Dict, args: argparse.Namespace) -> dict:
+    steps = {}
+    for step in STEPS:
+        samples = recorder.latencies.get(step, [])
+        statements, sql_ms = sql.get(step, (None, None))
+        steps[step] = {
+            "requests": len(samples),
+            "errors": dict(recorder.errors.get(step, {})),
+            "retries": recorder.retries.get(step, 0),
+            "mean_ms": round(sum(samples) / len(samples), 3) if samples else None,
+            "p50_ms": round(percentile(samples, 50), 3) if samples else None,
+            "p95_ms": round(percentile(samples, 95), 3) if samples else None,
+            "p99_ms": round(percentile(samples, 99), 3) if samples else None,
+            "sql_statements_per_request": None if statements is None else round(statements, 2),
+            "sql_ms_per_request": None if sql_ms is None else round(sql_ms, 3),
+        }
+    requests = sum(len(samples) for samples in recorder.latencies.values())
+    return {
+        "benchmark": "user_flow",
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "target": args.url or "in-process",
+        "database": DATABASE_URL.split(":", 1)[0],
+        "params": {
+            "users": args.users,
+            "leagues": args.leagues,
+            "players": args.players,
+            "concurrency": args.concurrency,
+            "bcrypt_rounds": BCRYPT_ROUNDS,
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "flows_completed": recorder.flows,
+        "flows_per_second": round(recorder.flows / elapsed, 2),
+        "requests_per_second": round(requests / elapsed, 2),
+        "steps": steps,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def regressions(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Human-readable findings where ``current`` is worse than ``baseline`` by more than ``tolerance``."""
+    found = []
+    if current["requests_per_second"] < baseline["requests_per_second"] * (1 - tolerance):
+        found.append(f"requests/s {baseline['requests_per_second']} -> {current['requests_per_second']}")
+    for step, result in current["steps"].items():
+        old = baseline.get("steps", {}).get(step)
+        if not old:
+            continue
+        for field in ("p95_ms", "sql_statements_per_request"):
+            before, after = old.get(field), result.get(field)
+            if before is not None and after is not None and after > before * (1 + tolerance) and after - before > 0.5:
+                found.append(f"{step} {field} {before} -> {after}")
+    return found
+
+
+def print_table(results: dict) -> None:
+    print(
+        f"{results['flows_completed']} flows in {results['elapsed_seconds']} s: "
+        f"{results['flows_per_second']} flows/s, {results['requests_per_second']} requests/s",
+        file=sys.stderr,
+    )
+    for step, result in results["steps"].items():
+        print(
+            f"  {step:11} n={result['requests']:6}  p50={result['p50_ms']} ms  p95={result['p95_ms']} ms  "
+            f"p99={result['p99_ms']} ms  sql={result['sql_statements_per_request']}  "
+            f"errors={result['errors']}  retries={result['retries']}",
+            file=sys.stderr,
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--leagues", type=int, default=10)
+    parser.add_argument("--players", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--url", help="base URL of a running server, e.g. http://127.0.0.1:8000")
+    parser.add_argument("--output", help="write the JSON results here instead of stdout")
+    parser.add_argument("--compare", help="earlier results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        league_ids, pool = seed_world(db, args.leagues, args.players)
+    plans = plan_users(args.users, league_ids, pool)
+
+    async def run() -> Tuple[Recorder, float, Dict]:
+        transport = None if args.url else ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url=args.url or "http://bench", timeout=60) as client:
+            return await drive(client, plans, args.concurrency)
+
+    results = summarize(*asyncio.run(run()), args)
+    print_table(results)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        if baseline.get("params") != results["params"]:
+            print(f"note: baseline ran with {baseline.get('params')}", file=sys.stderr)
+        found = regressions(results, baseline, args.tolerance)
+        for finding in found:
+            print(f"REGRESSION {finding}", file=sys.stderr)
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Dict, Optional, Set
+
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("SUBSCRIBER_QUEUE_SIZE", "64"))
+
+
+class Subscription:
+    """One subscriber's bounded queue of messages on a channel.
+
+    ``get`` returns ``None`` once the subscription is closed, either by the
+    subscriber or because the broker dropped it for falling behind.
+    """
+
+    def __init__(self, channel: str, maxsize: int) -> None:
+        self.channel = channel
+        self.dropped = False
+        self.closed = False
+        # One slot more than the limit, so closing can always enqueue its sentinel.
+        self._queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize + 1)
+        self._maxsize = maxsize
+
+    def offer(self, message: str) -> bool:
+        """Queue ``message`` without waiting; False when the subscriber is ``maxsize`` behind."""
+        if self.closed:
+            return False
+        if self._queue.qsize() >= self._maxsize:
+            return False
+        self._queue.put_nowait(message)
+        return True
+
+    def close(self, dropped: bool = False) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.dropped = dropped
+        if dropped:
+            # A dropped subscriber must resync from a snapshot, so what it has not read is useless.
+            while not self._queue.empty():
+                self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+    async def get(self) -> Optional[str]:
+        return await self._queue.get()
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+
+class Broker(ABC):
+    """Publish/subscribe interface the standings feed talks to.
+
+    Messages are strings serialized once by the publisher, so a broker only
+    copies references. ``InProcessBroker`` serves a single worker process; a
+    broker backed by an external bus can take its place by implementing
+    ``subscribe``, ``unsubscribe``, ``publish`` and ``subscriber_count``.
+    """
+
+    @abstractmethod
+    def subscribe(self, channel: str) -> Subscription:
+        ...
+
+    @abstractmethod
+    def unsubscribe(self, subscription: Subscription) -> None:
+        ...
+
+    @abstractmethod
+    def publish(self, channel: str, message: str) -> int:
+        """Deliver ``message`` to every subscriber of ``channel``; returns how many received it."""
+
+    @abstractmethod
+    def subscriber_count(self, channel: str) -> int:
+        ...
+
+
+class InProcessBroker(Broker):
+    """Fan messages out to the subscribers of this process.
+
+    Each subscriber has a queue of ``queue_size`` messages. Publishing never
+    waits: a subscriber whose queue is full is dropped and closed rather than
+    allowed to hold up the others or grow without bound. Not thread-safe;
+    call it from the event loop the subscribers read on.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE) -> None:
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._channels: Dict[str, Set[Subscription]] = defaultdict(set)
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(channel, self.queue_size)
+        self._channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._channels.get(subscription.channel)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._channels[subscription.channel]
+        subscription.close()
+
+    def publish(self, channel: str, message: str) -> int:
+        subscribers = self._channels.get(channel)
+        if not subscribers:
+            return 0
+        delivered = 0
+        slow = []
+        for subscription in subscribers:
+            if subscription.offer(message):
+                delivered += 1
+            else:
+                slow.append(subscription)
+        for subscription in slow:
+            subscribers.discard(subscription)
+            subscription.close(dropped=True)
+            self.dropped += 1
+        if not subscribers:
+            del self._channels[channel]
+        return delivered
+
+    def subscriber_count(self, channel: str) -> int:
+        return len(self._channels.get(channel, ()))
@@ -0,0 +1,101 @@
+import hashlib
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .models import Player
+from .responses import dumps
+
+
+def serialize_player(player: Player) -> dict:
+    return {
+        "id": player.id,
+        "name": player.name,
+        "position": player.position,
+        "team": player.team,
+        "cost": float(player.cost),
+        "form": float(player.form or 0),
+        "trend": float(player.trend or 0),
+        "value": float(player.value or 0),
+    }
+
+
+class CatalogSnapshot(NamedTuple):
+    version: int
+    players: List[dict]
+    body: bytes
+    etag: str
+    # Player id to team, for lock checks that must not query per player.
+    teams: Dict[int, str]
+
+
+class PlayerCatalog:
+    """In-process copy of the player pool, serialized once per catalog version.
+
+    The version is bumped whenever a session commits a change to a ``Player``
+    row (and by explicit ``invalidate`` calls after bulk Core statements); the
+    next reader rebuilds the snapshot. Other worker processes only notice
+    changes made through their own sessions.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._version = 0
+        self._snapshot: Optional[CatalogSnapshot] = None
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+
+    def get(self, db: Session) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self._version:
+            return snapshot
+        version = self._version
+        players = [
+            serialize_player(player)
+            for player in db.query(Player).order_by(Player.position, Player.cost.desc(), Player.id)
+        ]
+        body = dumps(players)
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        teams = {player["id"]: player["team"] for player in players}
+        snapshot = CatalogSnapshot(version=version, players=players, body=body, etag=etag, teams=teams)
+        with self._lock:
+            if self._version == version:
+                self._snapshot = snapshot
+        return snapshot
+
+    async def get_async(self, db: AsyncSession) -> CatalogSnapshot:
+        """Like ``get``, but only touches the async session when the snapshot must be rebuilt."""
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self._version:
+            return snapshot
+        return await db.run_sync(self.get)
+
+
+player_catalog = PlayerCatalog()
+
+
+@event.listens_for(Session, "after_flush")
+def _track_player_changes(session: Session, flush_context) -> None:
+    if any(isinstance(obj, Player) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["players_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    if session.info.pop("players_changed", False):
+        player_catalog.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop("players_changed", None)
@@ -1,33 +1,187 @@
+import asyncio
 import os
+import re
+import weakref
 from pathlib import Path
-from typing import Generator
+from typing import AsyncGenerator, Generator, Optional
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./gridcap.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "30"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KIB = int(os.getenv("SQLITE_CACHE_SIZE_KIB", "20000"))
 
-connect_args = {}
-if DATABASE_URL.startswith("sqlite"):
-    if DATABASE_URL.startswith("sqlite:////"):
-        db_path = DATABASE_URL.replace("sqlite:////", "/")
-    elif DATABASE_URL.startswith("sqlite:///"):
-        db_path = DATABASE_URL.replace("sqlite:///", "")
-    else:
-        db_path = None
-    if db_path:
-        Path(db_path).resolve().parent.mkdir(parents=True, exist_ok=True)
-    connect_args = {"check_same_thread": False}
-
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+# Alembic revision the models in this tree expect; bump it with every new migration in backend/migrations.
+SCHEMA_REVISION = "0002"
+
+
+# Only SQLite's drivers ship in requirements.txt; other databases are not supported out of the box.
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite"}
+
+
+def sqlite_file_path(url: str) -> Optional[str]:
+    match = re.match(r"^sqlite(\+\w+)?:///(.*)$", url)
+    if not match:
+        return None
+    path = match.group(2)
+    return path if path and path != ":memory:" else None
+
+
+def async_url(url: str) -> str:
+    """Swap the driver in a SQLite URL for its asyncio counterpart (sqlite+aiosqlite); other URLs pass through."""
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+
+
+def apply_sqlite_profile(engine: Engine, writer: bool = False) -> None:
+    """Tune every new SQLite connection for concurrent use.
+
+    WAL lets readers run while a write is in progress, synchronous=NORMAL is
+    durable in WAL mode except for the last transactions on power loss, and
+    busy_timeout makes lock waits block instead of failing with "database is
+    locked". Writer connections open transactions with BEGIN IMMEDIATE so the
+    write lock is taken up front instead of being upgraded mid-transaction.
+    """
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record) -> None:
+        if writer:
+            # Let SQLAlchemy's "begin" hook below own transaction boundaries.
+            dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KIB}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+    if writer:
+
+        @event.listens_for(engine, "begin")
+        def _begin_immediate(connection) -> None:
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def engine_options(url: str, writer: bool) -> dict:
+    if sqlite_file_path(url) is None:
+        return {}
+    if writer:
+        # A single pooled connection: concurrent writers queue on pool checkout
+        # in-process instead of spinning on SQLite's file lock.
+        return {"pool_size": 1, "max_overflow": 0, "pool_timeout": 30}
+    return {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}
+
+
+def make_engine(url: str, writer: bool = False) -> Engine:
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    db_path = sqlite_file_path(url)
+    if db_path is None:
+        return create_engine(url, connect_args=connect_args)
+    Path(db_path).resolve().parent.mkdir(parents=True, exist_ok=True)
+    engine = create_engine(url, connect_args=connect_args, **engine_options(url, writer))
+    apply_sqlite_profile(engine, writer=writer)
+    return engine
+
+
+def make_async_engine(url: str, writer: bool = False) -> AsyncEngine:
+    url = async_url(url)
+    if sqlite_file_path(url) is None:
+        return create_async_engine(url)
+    # aiosqlite defaults to NullPool for files; keep connections (and their PRAGMAs) pooled.
+    engine = create_async_engine(url, poolclass=AsyncAdaptedQueuePool, **engine_options(url, writer))
+    apply_sqlite_profile(engine.sync_engine, writer=writer)
+    return engine
+
+
+engine = make_engine(DATABASE_URL)
+write_engine = make_engine(DATABASE_URL, writer=True) if sqlite_file_path(DATABASE_URL) else engine
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+WriteSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=write_engine)
+
+# The API runs on the async engines; the sync ones above serve tests, scripts and benchmarks.
+async_engine = make_async_engine(DATABASE_URL)
+async_write_engine = make_async_engine(DATABASE_URL, writer=True) if sqlite_file_path(DATABASE_URL) else async_engine
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+AsyncWriteSessionLocal = async_sessionmaker(async_write_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
 
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+def schema_revision(engine: Engine) -> Optional[str]:
+    """The Alembic revision stamped on the database, or None when it has never been migrated."""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except (OperationalError, ProgrammingError):
+        return None
+
+
+def check_schema(engine: Engine) -> None:
+    """Refuse to serve from a database that is not at ``SCHEMA_REVISION``: one query, no reflection."""
+    found = schema_revision(engine)
+    if found != SCHEMA_REVISION:
+        raise SchemaOutOfDate(
+            f"Database schema is at {found or 'no revision'}, expected {SCHEMA_REVISION}; "
+            "run `python -m backend.manage migrate`"
+        )
+
+
 def get_db() -> Generator:
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def get_write_db() -> Generator:
+    """Session bound to the single writer connection; use it for endpoints that write."""
+    db = WriteSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+_read_admission: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def read_admission() -> asyncio.Semaphore:
+    """First-come, first-served admission to the read pool, one semaphore per event loop.
+
+    asyncio.Queue lets a new request take a connection that was just returned
+    ahead of the requests already waiting for it. With many more clients than
+    connections, that starved a few of them for seconds. Waiting here in
+    arrival order keeps p99 latency close to the median.
+    """
+    loop = asyncio.get_running_loop()
+    slots = _read_admission.get(loop)
+    if slots is None:
+        slots = _read_admission[loop] = asyncio.Semaphore(DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    return slots
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with read_admission():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+
+async def get_async_write_db() -> AsyncGenerator[AsyncSession, None]:
+    """Async session on the single writer connection; use it for endpoints that write."""
+    async with AsyncWriteSessionLocal() as db:
+        yield db
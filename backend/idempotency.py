@@ -0,0 +1,216 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import FrozenSet, List, NamedTuple, Optional, Tuple
+
+from .ratelimit import RateLimiter, too_many_requests
+
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "3600"))
+MAX_KEY_LENGTH = 255
+
+# Write endpoints that honour an Idempotency-Key header.
+IDEMPOTENT_ROUTES: FrozenSet[Tuple[str, str]] = frozenset(
+    {
+        ("POST", "/api/squad/save"),
+        ("POST", "/api/lineup/set"),
+        ("POST", "/api/leagues/create"),
+        ("POST", "/api/leagues/join"),
+    }
+)
+
+# Caller's Authorization header, method, path and Idempotency-Key.
+StoreKey = Tuple[bytes, str, str, bytes]
+
+
+class StoredResponse(NamedTuple):
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+
+class Entry:
+    """One Idempotency-Key: the request it was first used with and, once finished, the response."""
+
+    __slots__ = ("fingerprint", "done", "response", "expires")
+
+    def __init__(self, fingerprint: bytes) -> None:
+        self.fingerprint = fingerprint
+        self.done = asyncio.Event()
+        self.response: Optional[StoredResponse] = None
+        self.expires = float("inf")
+
+
+class IdempotencyStore:
+    """Bounded, expiring map of Idempotency-Keys to the response their first request got.
+
+    Keys are scoped to the caller's Authorization header, so one user cannot
+    replay another's responses. An entry is created when the first request
+    starts, so duplicates that arrive while it runs wait for it instead of
+    running again. Finished entries live for ``ttl`` seconds; past
+    ``maxsize`` entries the oldest are dropped. Entries only live in this
+    process, so a resend that reaches another worker runs again.
+    """
+
+    def __init__(self, maxsize: int = IDEMPOTENCY_CACHE_SIZE, ttl: float = IDEMPOTENCY_TTL_SECONDS) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.replayed = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[StoreKey, Entry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def claim(self, key: StoreKey, fingerprint: bytes) -> Tuple[Entry, bool]:
+        """The live entry for ``key`` and False, or a new one and True when the caller should run the request."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires > time.monotonic():
+                return entry, False
+            entry = self._entries[key] = Entry(fingerprint)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return entry, True
+
+    def finish(self, key: StoreKey, entry: Entry, response: Optional[StoredResponse]) -> None:
+        """Keep ``response`` for replays; server errors and failures are dropped so a resend runs again."""
+        entry.response = response
+        with self._lock:
+            if response is not None and response.status < 500:
+                entry.expires = time.monotonic() + self.ttl
+            elif self._entries.get(key) is entry:
+                del self._entries[key]
+        entry.done.set()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.replayed = 0
+
+
+idempotency_store = IdempotencyStore()
+
+
+def json_response(status: int, body: bytes) -> StoredResponse:
+    headers = [(b"content-type", b"application/json"), (b"content-length", b"%d" % len(body))]
+    return StoredResponse(status, headers, body)
+
+
+REUSED_KEY = json_response(422, b'{"detail":"Idempotency-Key was already used with a different request"}')
+INVALID_KEY = json_response(400, b'{"detail":"Idempotency-Key must be 1 to 255 characters"}')
+
+
+class IdempotencyMiddleware:
+    """Pure ASGI middleware replaying the stored response for a repeated Idempotency-Key.
+
+    Only ``IDEMPOTENT_ROUTES`` are considered, and only requests that carry
+    both the header and an Authorization header. A replay never reaches the
+    app, so it runs no dependencies and no SQL, and is marked with
+    ``Idempotent-Replayed: true``. Reusing a key with a different body is
+    refused with 422.
+
+    Every HTTP request is charged to ``limiter`` first, when one is given, and
+    refused with 429 once its bucket is empty, so resends are rate limited
+    too. Checking here rather than in a middleware of its own keeps the
+    limiter's cost per request to the check itself.
+    """
+
+    def __init__(self, app, store: IdempotencyStore = idempotency_store, limiter: Optional[RateLimiter] = None) -> None:
+        self.app = app
+        self.store = store
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self.limiter is not None:
+            wait = self.limiter.check(scope)
+            if wait:
+                await too_many_requests(send, wait)
+                return
+        if (scope["method"], scope["path"]) not in IDEMPOTENT_ROUTES:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        idempotency_key = headers.get(b"idempotency-key")
+        authorization = headers.get(b"authorization")
+        if idempotency_key is None or authorization is None:
+            await self.app(scope, receive, send)
+            return
+        if not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+            await replay(send, INVALID_KEY)
+            return
+
+        body, receive = await buffer_body(receive)
+        fingerprint = hashlib.sha256(body).digest()
+        key = (authorization, scope["method"], scope["path"], idempotency_key)
+        while True:
+            entry, owner = self.store.claim(key, fingerprint)
+            if owner:
+                await self.run(scope, receive, send, key, entry)
+                return
+            if entry.fingerprint != fingerprint:
+                await replay(send, REUSED_KEY)
+                return
+            await entry.done.wait()
+            if entry.response is not None:
+                self.store.replayed += 1
+                await replay(send, entry.response, replayed=True)
+                return
+            # The first request failed without a response; run this one in its place.
+
+    async def run(self, scope, receive, send, key: StoreKey, entry: Entry) -> None:
+        status = 500
+        headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+
+        async def capture(message) -> None:
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        response = None
+        try:
+            await self.app(scope, receive, capture)
+            response = StoredResponse(status, headers, b"".join(chunks))
+        finally:
+            self.store.finish(key, entry, response)
+
+
+async def buffer_body(receive):
+    """Read the whole request body, and return it with a ``receive`` that hands it to the app again."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    body = b"".join(chunks)
+    sent = False
+
+    async def replay_receive():
+        nonlocal sent
+        if sent:
+            return await receive()
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return body, replay_receive
+
+
+async def replay(send, response: StoredResponse, replayed: bool = False) -> None:
+    headers = response.headers + [(b"idempotent-replayed", b"true")] if replayed else response.headers
+    await send({"type": "http.response.start", "status": response.status, "headers": headers})
+    await send({"type": "http.response.body", "body": response.body})
@@ -0,0 +1,355 @@
+"""Load player, price and stat feeds from CSV or NDJSON files.
+
+Every record names a player by ``external_id``. Records may carry player
+fields (``name``, ``position``, ``team``, ``cost``) and, with a ``gw``, a stat
+line (``pass_yards`` ... ``dst_points``; missing stats count as zero). New
+players need all four player fields; known players take whichever are given,
+so a price update is just ``external_id`` and ``cost``.
+
+    python -m backend.ingest stats.ndjson --batch-size 5000
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.orm import Session
+
+from .models import Player
+from .player_history import record_prices, refresh_aggregates
+from .scoring import STAT_FIELDS, apply_stat_lines
+
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "5000"))
+FORMATS = ("csv", "ndjson")
+PLAYER_FIELDS = ("name", "position", "team", "cost")
+MAX_REPORTED_ERRORS = 20
+
+
+class RowError(ValueError):
+    pass
+
+
+@dataclass
+class IngestReport:
+    rows: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    players_created: int = 0
+    players_updated: int = 0
+    stat_lines: int = 0
+    points_changed: int = 0
+    prices_recorded: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def reject(self, message: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(message)
+
+
+@dataclass
+class Batch:
+    # external_id -> player fields given for it (later records win)
+    players: Dict[str, dict] = field(default_factory=dict)
+    # (external_id, gw) -> stat line
+    stats: Dict[Tuple[str, int], dict] = field(default_factory=dict)
+    # (external_id, gw) -> price as of that gameweek
+    prices: Dict[Tuple[str, int], Decimal] = field(default_factory=dict)
+    rows: int = 0
+
+
+def detect_format(filename: str) -> str:
+    extension = os.path.splitext(filename)[1].lower().lstrip(".")
+    if extension in ("json", "jsonl", "ndjson"):
+        return "ndjson"
+    if extension == "csv":
+        return "csv"
+    raise ValueError(f"Cannot tell the format of {filename}; pass --format")
+
+
+class RecordParser:
+    """Turn whole lines of CSV or NDJSON, a block at a time, into records.
+
+    A CSV header is read from the first line fed. Each block is parsed on its
+    own, so a record must not span blocks; quoted newlines inside a field are
+    only supported within one block.
+    """
+
+    def __init__(self, fmt: str) -> None:
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format: {fmt}")
+        self.fmt = fmt
+        self.header: Optional[List[str]] = None
+        self.line_number = 0
+
+    def feed(self, lines: List[str]) -> Iterator[Union[dict, RowError]]:
+        if self.fmt == "csv":
+            yield from self._feed_csv(lines)
+            return
+        for line in lines:
+            self.line_number += 1
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield RowError(f"line {self.line_number}: invalid JSON")
+                continue
+            yield record if isinstance(record, dict) else RowError(f"line {self.line_number}: not an object")
+
+    def _feed_csv(self, lines: List[str]) -> Iterator[Union[dict, RowError]]:
+        reader = csv.reader(lines)
+        start = self.line_number
+        for values in reader:
+            self.line_number = start + reader.line_num
+            if self.header is None:
+                self.header = [name.strip() for name in values]
+                continue
+            if not values:
+                continue
+            if len(values) != len(self.header):
+                yield RowError(f"line {self.line_number}: expected {len(self.header)} fields, got {len(values)}")
+                continue
+            yield dict(zip(self.header, values))
+        self.line_number = start + reader.line_num
+
+
+def normalize(record: dict) -> Tuple[str, dict, Optional[int], Optional[dict]]:
+    """(external_id, player fields, gw, stat line) of a record; raises ``RowError`` on bad values."""
+    external_id = str(record.get("external_id") or "").strip()
+    if not external_id:
+        raise RowError("missing external_id")
+    player = {}
+    for name in PLAYER_FIELDS:
+        value = record.get(name)
+        if value is None or str(value).strip() == "":
+            continue
+        value = str(value).strip()
+        if name == "cost":
+            try:
+                player[name] = Decimal(value).quantize(Decimal("0.01"))
+            except InvalidOperation:
+                raise RowError(f"{external_id}: invalid cost {value!r}")
+        elif name in ("position", "team"):
+            player[name] = value.upper()
+        else:
+            player[name] = value
+    gw = record.get("gw")
+    if gw is None or str(gw).strip() == "":
+        return external_id, player, None, None
+    try:
+        gw = int(gw)
+        stats = {name: int(record.get(name) or 0) for name in STAT_FIELDS}
+    except (TypeError, ValueError):
+        raise RowError(f"{external_id}: gameweek and stats must be whole numbers")
+    return external_id, player, gw, stats
+
+
+class Ingestor:
+    """Group normalized records into batches, dropping repeats within a batch.
+
+    A record repeating a player's fields or a (player, gameweek) stat line
+    already in the batch replaces it and is counted as a duplicate. Repeats
+    across batches are absorbed by the upserts, which skip unchanged rows.
+    """
+
+    def __init__(self, parser: RecordParser, batch_size: int = INGEST_BATCH_SIZE) -> None:
+        self.parser = parser
+        self.batch_size = batch_size
+        self.report = IngestReport()
+        self._batch = Batch()
+
+    def feed(self, lines: List[str]) -> List[Batch]:
+        """Parse ``lines`` and return the batches they filled."""
+        full = []
+        for record in self.parser.feed(lines):
+            self.report.rows += 1
+            if isinstance(record, RowError):
+                self.report.reject(str(record))
+                continue
+            try:
+                external_id, player, gw, stats = normalize(record)
+            except RowError as exc:
+                self.report.reject(f"line {self.parser.line_number}: {exc}")
+                continue
+            batch = self._batch
+            repeated = False
+            if player:
+                known = batch.players.get(external_id)
+                repeated = known is not None and gw is None
+                batch.players[external_id] = {**(known or {}), **player}
+            if gw is not None:
+                repeated = (external_id, gw) in batch.stats
+                batch.stats[(external_id, gw)] = stats
+                if "cost" in player:
+                    batch.prices[(external_id, gw)] = player["cost"]
+            self.report.duplicates += repeated
+            batch.rows += 1
+            if batch.rows >= self.batch_size:
+                full.append(batch)
+                self._batch = Batch()
+        return full
+
+    def finish(self) -> List[Batch]:
+        """The last, partial batch, if any."""
+        batch, self._batch = self._batch, Batch()
+        return [batch] if batch.rows else []
+
+
+def write_batch(db: Session, batch: Batch, report: IngestReport) -> None:
+    """Upsert a batch's players, stat lines and prices; the caller commits.
+
+    Players are matched on ``external_id`` with one read, new ones are
+    inserted and changed ones updated in bulk, and unchanged ones are left
+    alone. Stat lines go through ``apply_stat_lines`` per gameweek, so only
+    differing lines are written and only lineups starting a player whose
+    points moved are rescored. Costs given with a gameweek also go into the
+    price history, and repriced players get their value refreshed.
+    """
+    external_ids = set(batch.players) | {external_id for external_id, _ in batch.stats}
+    table = Player.__table__
+    existing = {
+        row.external_id: row
+        for row in db.execute(
+            select(table.c.id, table.c.external_id, *(table.c[name] for name in PLAYER_FIELDS)).where(
+                table.c.external_id.in_(list(external_ids))
+            )
+        )
+    }
+    ids = {external_id: row.id for external_id, row in existing.items()}
+    new_rows, updates = [], []
+    repriced = set()
+    for external_id, fields in batch.players.items():
+        row = existing.get(external_id)
+        if row is None:
+            missing = [name for name in PLAYER_FIELDS if name not in fields]
+            if missing:
+                report.reject(f"{external_id}: new player needs {', '.join(missing)}")
+                continue
+            new_rows.append({"external_id": external_id, "name_key": fields["name"].lower(), **fields})
+        elif any(getattr(row, name) != value for name, value in fields.items()):
+            values = {name: fields.get(name, getattr(row, name)) for name in PLAYER_FIELDS}
+            updates.append({"player_row_id": row.id, "name_key": values["name"].lower(), **values})
+            if values["cost"] != row.cost:
+                repriced.add(row.id)
+    if new_rows:
+        created = db.execute(insert(table).returning(table.c.id, table.c.external_id), new_rows)
+        ids.update((external_id, player_id) for player_id, external_id in created)
+    if updates:
+        db.execute(update(table).where(table.c.id == bindparam("player_row_id")), updates)
+    if new_rows or updates:
+        # Core writes bypass the catalog's change tracking; flag them so it rebuilds on commit.
+        db.info["players_changed"] = True
+    report.players_created += len(new_rows)
+    report.players_updated += len(updates)
+
+    lines_by_gw: Dict[int, List[dict]] = defaultdict(list)
+    for (external_id, gw), stats in batch.stats.items():
+        player_id = ids.get(external_id)
+        if player_id is None:
+            report.reject(f"{external_id}: unknown player for gameweek {gw} stats")
+            continue
+        lines_by_gw[gw].append({"player_id": player_id, **stats})
+    for gw, lines in sorted(lines_by_gw.items()):
+        changed = apply_stat_lines(db, gw, lines)
+        repriced -= changed  # already refreshed, at the new price
+        report.points_changed += len(changed)
+        report.stat_lines += len(lines)
+
+    prices_by_gw: Dict[int, Dict[int, Decimal]] = defaultdict(dict)
+    for (external_id, gw), cost in batch.prices.items():
+        if external_id in ids:
+            prices_by_gw[gw][ids[external_id]] = cost
+    for gw, prices in sorted(prices_by_gw.items()):
+        report.prices_recorded += len(record_prices(db, gw, prices))
+    if repriced:
+        refresh_aggregates(db, repriced)
+    report.batches += 1
+
+
+def read_blocks(lines: Iterable[str], size: int) -> Iterator[List[str]]:
+    block: List[str] = []
+    for line in lines:
+        block.append(line)
+        if len(block) >= size:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+async def read_blocks_async(chunks: AsyncIterable[bytes]) -> AsyncIterator[List[str]]:
+    """Split a byte stream into blocks of whole decoded lines, one block per chunk received."""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        complete, _, pending = pending.rpartition(b"\n")
+        if complete:
+            yield complete.decode("utf-8-sig").splitlines(keepends=True)
+    if pending:
+        yield pending.decode("utf-8-sig").splitlines(keepends=True)
+
+
+def ingest_lines(
+    session_factory: Callable[[], Session], lines: Iterable[str], fmt: str, batch_size: int = INGEST_BATCH_SIZE
+) -> IngestReport:
+    """Stream ``lines`` into the database, committing once per batch."""
+    started = time.perf_counter()
+    ingestor = Ingestor(RecordParser(fmt), batch_size)
+    with session_factory() as db:
+        for block in read_blocks(lines, batch_size):
+            for batch in ingestor.feed(block):
+                write_batch(db, batch, ingestor.report)
+                db.commit()
+        for batch in ingestor.finish():
+            write_batch(db, batch, ingestor.report)
+            db.commit()
+    ingestor.report.seconds = time.perf_counter() - started
+    return ingestor.report
+
+
+def print_report(report: IngestReport) -> None:
+    print(
+        f"{report.rows} rows in {report.seconds:.2f} s ({report.rows_per_second:,.0f} rows/s), {report.batches} batches"
+    )
+    print(
+        f"players created {report.players_created}, updated {report.players_updated}; "
+        f"stat lines {report.stat_lines}, points changed {report.points_changed}, prices {report.prices_recorded}; "
+        f"duplicates {report.duplicates}, rejected {report.rejected}"
+    )
+    for message in report.errors:
+        print(f"  rejected: {message}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    args = parser.parse_args()
+
+    from .db import WriteSessionLocal, check_schema, engine
+
+    check_schema(engine)
+    with open(args.path, newline="", encoding="utf-8-sig") as handle:
+        report = ingest_lines(WriteSessionLocal, handle, args.format or detect_format(args.path), args.batch_size)
+    print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
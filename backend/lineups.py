@@ -0,0 +1,180 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from sqlalchemy import and_, delete, false, insert, select, true, union, union_all, update
+from sqlalchemy.orm import Session
+
+from . import schedule, schemas
+from .models import League, Lineup, LineupScore, LineupSlot, Membership, PlayerGameweekStat, Squad, SquadPlayer
+from .scoring import rescore_lineups
+
+LineupKey = Tuple[int, int]
+# Starter ids, captain and vice of a saved lineup.
+SavedLineup = Tuple[Set[int], int, int]
+
+
+def lineup_error(entry: schemas.LineupSetRequest, squad_player_ids: Optional[Set[int]]) -> Optional[str]:
+    """Return why a lineup cannot be saved against the given squad, or None if it is valid."""
+    if squad_player_ids is None:
+        return "Squad not found"
+    starter_ids = set(entry.starters)
+    if entry.captain not in starter_ids or entry.vice not in starter_ids:
+        return "Captain and vice must be starters"
+    if entry.captain == entry.vice:
+        return "Captain and vice must differ"
+    if not starter_ids.issubset(squad_player_ids):
+        return "Starters must be in squad"
+    return None
+
+
+def lock_error(
+    entry: schemas.LineupSetRequest,
+    saved: Optional[SavedLineup],
+    index: schedule.ScheduleIndex,
+    teams: Mapping[int, str],
+    now: datetime,
+) -> Optional[str]:
+    """Return why a lineup would move a player whose game has kicked off, or None if it is allowed."""
+    changed = schedule.lineup_changes(entry.starters, entry.captain, entry.vice, saved)
+    locked = schedule.locked_players(index, entry.gw, changed, teams, now)
+    if locked:
+        return "Lineup locked for players: " + ", ".join(str(player_id) for player_id in locked)
+    return None
+
+
+def load_saved_lineups(db: Session, user_id: int, keys: Iterable[LineupKey]) -> Dict[LineupKey, SavedLineup]:
+    """Map each (league_id, gw) the user already has a lineup for to its starters and captaincy, in one query."""
+    keys = set(keys)
+    if not keys:
+        return {}
+    rows = (
+        db.query(Lineup.league_id, Lineup.gw, Lineup.captain_player_id, Lineup.vice_captain_player_id, LineupSlot.player_id)
+        .outerjoin(LineupSlot, and_(LineupSlot.lineup_id == Lineup.id, LineupSlot.starter.is_(True)))
+        .filter(
+            Lineup.user_id == user_id,
+            Lineup.league_id.in_({league_id for league_id, _ in keys}),
+            Lineup.gw.in_({gw for _, gw in keys}),
+        )
+        .all()
+    )
+    saved: Dict[LineupKey, SavedLineup] = {}
+    for league_id, gw, captain, vice, player_id in rows:
+        key = (league_id, gw)
+        if key not in keys:
+            continue
+        starters, _, _ = saved.setdefault(key, (set(), captain, vice))
+        if player_id is not None:
+            starters.add(player_id)
+    return saved
+
+
+def load_access(db: Session, user_id: int, league_ids: Iterable[int]) -> Dict[int, bool]:
+    """Map each requested league id that exists to whether ``user_id`` is a member, in one query."""
+    rows = (
+        db.query(League.id, Membership.id)
+        .outerjoin(Membership, and_(Membership.league_id == League.id, Membership.user_id == user_id))
+        .filter(League.id.in_(set(league_ids)))
+        .all()
+    )
+    return {league_id: membership_id is not None for league_id, membership_id in rows}
+
+
+def load_memberships(db: Session, user_id: int, league_ids: Iterable[int]) -> Tuple[Set[int], Set[int]]:
+    """Every league ``user_id`` belongs to, and which of ``league_ids`` exist, in one query."""
+    rows = db.execute(
+        union_all(
+            select(Membership.league_id, true()).where(Membership.user_id == user_id),
+            select(League.id, false()).where(League.id.in_(set(league_ids))),
+        )
+    ).all()
+    members = {league_id for league_id, member in rows if member}
+    return members, {league_id for league_id, member in rows if not member}
+
+
+def load_squad_player_ids(db: Session, user_id: int, league_ids: Iterable[int]) -> Dict[int, Set[int]]:
+    """Map league id to the user's squad player ids for every league that has a squad, in one query."""
+    rows = (
+        db.query(Squad.league_id, SquadPlayer.player_id)
+        .outerjoin(SquadPlayer, SquadPlayer.squad_id == Squad.id)
+        .filter(Squad.user_id == user_id, Squad.league_id.in_(set(league_ids)))
+        .all()
+    )
+    squads: Dict[int, Set[int]] = defaultdict(set)
+    for league_id, player_id in rows:
+        squad = squads[league_id]
+        if player_id is not None:
+            squad.add(player_id)
+    return dict(squads)
+
+
+def write_lineups(db: Session, user_id: int, entries: List[schemas.LineupSetRequest]) -> Dict[LineupKey, int]:
+    """Upsert already validated lineups and replace their starter slots with bulk statements.
+
+    Lineups of a gameweek that already has stats are rescored. Returns the
+    lineup id for each (league_id, gw). The caller commits.
+    """
+    if not entries:
+        return {}
+    by_key = {(entry.league_id, entry.gw): entry for entry in entries}
+    existing = {
+        (lineup.league_id, lineup.gw): lineup.id
+        for lineup in db.query(Lineup.id, Lineup.league_id, Lineup.gw).filter(
+            Lineup.user_id == user_id,
+            Lineup.league_id.in_({league_id for league_id, _ in by_key}),
+            Lineup.gw.in_({gw for _, gw in by_key}),
+        )
+    }
+    updates = [
+        {"id": existing[key], "captain_player_id": entry.captain, "vice_captain_player_id": entry.vice}
+        for key, entry in by_key.items()
+        if key in existing
+    ]
+    if updates:
+        db.execute(update(Lineup), updates)
+        db.execute(delete(LineupSlot).where(LineupSlot.lineup_id.in_([row["id"] for row in updates])))
+    created = [
+        Lineup(
+            user_id=user_id,
+            league_id=entry.league_id,
+            gw=entry.gw,
+            captain_player_id=entry.captain,
+            vice_captain_player_id=entry.vice,
+        )
+        for key, entry in by_key.items()
+        if key not in existing
+    ]
+    if created:
+        db.add_all(created)
+        db.flush()
+    lineup_ids = {key: lineup_id for key, lineup_id in existing.items() if key in by_key}
+    lineup_ids.update({(lineup.league_id, lineup.gw): lineup.id for lineup in created})
+    slots = [
+        {"lineup_id": lineup_ids[key], "player_id": player_id, "starter": True}
+        for key, entry in by_key.items()
+        for player_id in set(entry.starters)
+    ]
+    db.execute(insert(LineupSlot), slots)
+    rescore_scored(db, by_key, lineup_ids)
+    return lineup_ids
+
+
+def rescore_scored(
+    db: Session, by_key: Mapping[LineupKey, schemas.LineupSetRequest], lineup_ids: Mapping[LineupKey, int]
+) -> None:
+    """Rescore written lineups whose gameweek has stat lines for their starters, or that were scored before.
+
+    Lineups are usually set before their gameweek's stats arrive, so one query
+    over the (player_id, gw) index and the stored scores normally finds nothing.
+    """
+    starters = {player_id for entry in by_key.values() for player_id in entry.starters}
+    scored = db.scalars(
+        union(
+            select(PlayerGameweekStat.gw).where(
+                PlayerGameweekStat.player_id.in_(starters), PlayerGameweekStat.gw.in_({gw for _, gw in by_key})
+            ),
+            select(LineupScore.gw).where(LineupScore.lineup_id.in_(list(lineup_ids.values()))),
+        )
+    ).all()
+    for gw in scored:
+        rescore_lineups(db, gw, lineup_ids=[lineup_id for (_, key_gw), lineup_id in lineup_ids.items() if key_gw == gw])
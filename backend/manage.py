@@ -0,0 +1,105 @@
+"""Deploy-time database tasks: run migrations, seed players, check or stamp the schema revision.
+
+The API no longer creates tables when it is imported; run ``migrate`` once per
+deploy, before the server starts. A database created by the old import-time
+``create_all`` has the baseline tables but no revision: ``migrate`` stamps it at
+``BASELINE_REVISION`` and upgrades it from there, and ``stamp`` does only the
+stamping. Both refuse an unversioned database whose tables are not the baseline.
+
+    python -m backend.manage migrate --seed
+    python -m backend.manage check
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+from .db import SCHEMA_REVISION, SchemaOutOfDate, SessionLocal, check_schema, engine, schema_revision
+from .seed_players import seed_players
+
+ALEMBIC_INI = Path(__file__).resolve().with_name("alembic.ini")
+
+# The revision describing the tables create_all made before migrations existed.
+BASELINE_REVISION = "0001"
+BASELINE_TABLES = {
+    "players", "users", "leagues", "lineups", "memberships", "squads", "lineup_slots", "squad_players",
+}
+
+
+def alembic_config() -> Config:
+    return Config(str(ALEMBIC_INI))
+
+
+def ensure_baseline(engine: Engine) -> None:
+    """Refuse to adopt a database unless its tables are exactly those of the baseline revision."""
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    if tables != BASELINE_TABLES or "token_version" in {column["name"] for column in inspector.get_columns("users")}:
+        raise SchemaOutOfDate(
+            f"Database has no revision and its tables ({', '.join(sorted(tables)) or 'none'}) "
+            f"are not the baseline schema; it cannot be stamped at {BASELINE_REVISION}"
+        )
+
+
+def migrate(revision: str = "head", engine: Engine = engine) -> None:
+    """Upgrade to ``revision``, first stamping an unversioned baseline database at ``BASELINE_REVISION``."""
+    if schema_revision(engine) is None and inspect(engine).get_table_names():
+        stamp(engine)
+    config = alembic_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
+
+
+def stamp(engine: Engine = engine) -> None:
+    """Record ``BASELINE_REVISION`` on an unversioned database that has the baseline tables."""
+    found = schema_revision(engine)
+    if found is not None:
+        raise SchemaOutOfDate(f"Database is already at revision {found}; run `migrate` instead")
+    ensure_baseline(engine)
+    config = alembic_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.stamp(config, BASELINE_REVISION)
+
+
+def seed() -> None:
+    with SessionLocal() as db:
+        seed_players(db)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    upgrade = commands.add_parser("migrate", help="upgrade the database to the latest revision")
+    upgrade.add_argument("--seed", action="store_true", help="seed the starter players afterwards")
+    commands.add_parser("seed", help="add the starter players to an empty player table")
+    commands.add_parser("check", help="exit 1 unless the database is at the expected revision")
+    commands.add_parser("stamp", help="record the baseline revision on a database created without migrations")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "migrate":
+            migrate()
+            if args.seed:
+                seed()
+        elif args.command == "seed":
+            check_schema(engine)
+            seed()
+        elif args.command == "stamp":
+            stamp()
+        else:
+            check_schema(engine)
+    except SchemaOutOfDate as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    print(f"schema at {schema_revision(engine) or 'no revision'} (expected {SCHEMA_REVISION})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
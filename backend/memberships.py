@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import lineups
+from .broker import Broker, Subscription
+from .models import Membership
+
+MEMBERSHIP_CACHE_SIZE = int(os.getenv("MEMBERSHIP_CACHE_SIZE", "10000"))
+MEMBERSHIP_CACHE_TTL_SECONDS = float(os.getenv("MEMBERSHIP_CACHE_TTL_SECONDS", "300"))
+INVALIDATION_CHANNEL = "memberships"
+
+
+class MembershipCache:
+    """Leagues each recently seen user belongs to, for authorizing league-scoped requests.
+
+    A user's entry is filled in one query with all of their leagues the first
+    time a lookup misses, and holds for ``ttl`` seconds; at most ``maxsize``
+    users are kept, least recently used first out. Only membership is cached:
+    a league the entry does not list goes back to the database, so a stale
+    entry can delay nothing but a removal, and the app never removes members.
+    Commits that add or delete a ``Membership`` invalidate that user's entry.
+    With a ``broker`` set, invalidations are also published on
+    ``INVALIDATION_CHANNEL`` for ``listen`` in other workers to apply.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = MEMBERSHIP_CACHE_SIZE,
+        ttl: float = MEMBERSHIP_CACHE_TTL_SECONDS,
+        broker: Optional[Broker] = None,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.broker = broker
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._entries: "OrderedDict[int, Tuple[float, FrozenSet[int]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def leagues(self, user_id: int) -> Optional[FrozenSet[int]]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires, leagues = entry
+        if expires <= time.monotonic():
+            with self._lock:
+                self._entries.pop(user_id, None)
+            return None
+        with self._lock:
+            if user_id in self._entries:
+                self._entries.move_to_end(user_id)
+        return leagues
+
+    def fill(self, user_id: int, leagues: Iterable[int], generation: int) -> None:
+        """Store ``user_id``'s leagues unless an invalidation ran since ``generation`` was read."""
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[user_id] = (time.monotonic() + self.ttl, frozenset(leagues))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    async def access(self, db: AsyncSession, user_id: int, league_ids: Iterable[int]) -> Dict[int, bool]:
+        """Same contract as ``lineups.load_access``; no query when every league is one the user is known to be in."""
+        league_ids = set(league_ids)
+        leagues = self.leagues(user_id)
+        if leagues is not None and league_ids <= leagues:
+            self.hits += 1
+            return dict.fromkeys(league_ids, True)
+        self.misses += 1
+        generation = self.generation
+        members, existing = await db.run_sync(lineups.load_memberships, user_id, league_ids)
+        self.fill(user_id, members, generation)
+        return {league_id: league_id in members for league_id in existing}
+
+    def discard(self, user_ids: Iterable[int]) -> None:
+        """Drop the entries of ``user_ids`` in this process only."""
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def invalidate(self, user_ids: Iterable[int]) -> None:
+        user_ids = list(user_ids)
+        self.discard(user_ids)
+        if self.broker is not None:
+            for user_id in user_ids:
+                self.broker.publish(INVALIDATION_CHANNEL, str(user_id))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    async def listen(self, subscription: Subscription) -> None:
+        """Apply invalidations other workers publish, until the subscription closes."""
+        while (message := await subscription.get()) is not None:
+            self.discard([int(message)])
+
+
+membership_cache = MembershipCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _track_membership_changes(session: Session, flush_context) -> None:
+    users = {obj.user_id for obj in (*session.new, *session.deleted) if isinstance(obj, Membership)}
+    if users:
+        session.info.setdefault("membership_users", set()).update(users)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    users = session.info.pop("membership_users", None)
+    if users:
+        membership_cache.invalidate(users)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop("membership_users", None)
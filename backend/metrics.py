@@ -0,0 +1,229 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Upper bounds (seconds) of the latency buckets; one more bucket catches everything slower.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+RouteKey = Tuple[str, str]
+
+
+class Histogram:
+    """Fixed-bucket histogram; ``observe`` is one bisect and three additions."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, count) pairs as Prometheus expects them, ending with ``+Inf``."""
+        running = 0
+        pairs = []
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            running += count
+            pairs.append((bound if isinstance(bound, str) else format_number(bound), running))
+        return pairs
+
+
+class RouteStats:
+    __slots__ = ("latency", "statements", "sql_seconds", "statuses")
+
+    def __init__(self) -> None:
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.sql_seconds = 0.0
+        self.statuses: Dict[int, int] = {}
+
+
+class RequestStats:
+    """SQL work done on behalf of the request running in the current context."""
+
+    __slots__ = ("statements", "sql_seconds")
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.sql_seconds = 0.0
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """Process-wide request metrics, rendered in the Prometheus text format.
+
+    Requests are recorded by ``MetricsMiddleware`` on the event loop thread,
+    so per-route state is only ever mutated from one thread; the lock only
+    guards creating a route's entry. SQL statements are attributed to the
+    request through ``current_request``, which the engine listeners read.
+    Gauges that are cheaper to sample than to maintain (thread pools) are
+    registered as callbacks and read at scrape time.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: Dict[RouteKey, RouteStats] = {}
+        self._active: Dict[int, dict] = {}
+        self._gauges: List[Tuple[str, str, Callable[[], float]]] = []
+
+    def route(self, method: str, path: str) -> RouteStats:
+        stats = self._routes.get((method, path))
+        if stats is None:
+            with self._lock:
+                stats = self._routes.setdefault((method, path), RouteStats())
+        return stats
+
+    def started(self, scope: dict) -> None:
+        self._active[id(scope)] = scope
+
+    def finished(self, scope: dict, status: int, seconds: float, request: RequestStats) -> None:
+        self._active.pop(id(scope), None)
+        stats = self.route(scope["method"], route_path(scope))
+        stats.latency.observe(seconds)
+        stats.statements.observe(request.statements)
+        stats.sql_seconds += request.sql_seconds
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float]) -> None:
+        self._gauges.append((name, help_text, read))
+
+    def in_flight(self) -> Dict[RouteKey, int]:
+        counts: Dict[RouteKey, int] = {}
+        for scope in list(self._active.values()):
+            key = (scope["method"], route_path(scope))
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        routes = sorted(self._routes.items())
+
+        def labels(key: RouteKey, **extra: Union[str, int]) -> str:
+            pairs = [("method", key[0]), ("route", key[1]), *extra.items()]
+            return "{" + ",".join(f'{name}="{escape(str(value))}"' for name, value in pairs) + "}"
+
+        def histogram(name: str, help_text: str, pick: Callable[[RouteStats], Histogram]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, stats in routes:
+                observed = pick(stats)
+                for bound, count in observed.cumulative():
+                    lines.append(f"{name}_bucket{labels(key, le=bound)} {count}")
+                lines.append(f"{name}_sum{labels(key)} {format_number(observed.sum)}")
+                lines.append(f"{name}_count{labels(key)} {observed.count}")
+
+        histogram("gridcap_http_request_duration_seconds", "Request latency by route.", lambda stats: stats.latency)
+        histogram(
+            "gridcap_http_request_sql_statements",
+            "SQL statements run per request by route.",
+            lambda stats: stats.statements,
+        )
+        lines.append("# HELP gridcap_http_request_sql_seconds_total Time spent executing SQL by route.")
+        lines.append("# TYPE gridcap_http_request_sql_seconds_total counter")
+        for key, stats in routes:
+            lines.append(f"gridcap_http_request_sql_seconds_total{labels(key)} {format_number(stats.sql_seconds)}")
+        lines.append("# HELP gridcap_http_responses_total Responses by route and status code.")
+        lines.append("# TYPE gridcap_http_responses_total counter")
+        for key, stats in routes:
+            for status, count in sorted(stats.statuses.items()):
+                lines.append(f"gridcap_http_responses_total{labels(key, status=status)} {count}")
+        lines.append("# HELP gridcap_http_requests_in_flight Requests being handled by route.")
+        lines.append("# TYPE gridcap_http_requests_in_flight gauge")
+        for key, count in sorted(self.in_flight().items()):
+            lines.append(f"gridcap_http_requests_in_flight{labels(key)} {count}")
+        for name, help_text, read in self._gauges:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {format_number(read())}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def route_path(scope: dict) -> str:
+    """The matched route's path template, so ids in URLs do not become label values."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, status and SQL work for each HTTP request."""
+
+    def __init__(self, app, registry: Metrics = metrics) -> None:
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request = RequestStats()
+        token = current_request.set(request)
+        status = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.registry.started(scope)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.registry.finished(scope, status, time.perf_counter() - started, request)
+            current_request.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if current_request.get() is not None:
+        conn.info["metrics_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    request = current_request.get()
+    started = conn.info.pop("metrics_started", None)
+    if request is None or started is None:
+        return
+    request.sql_seconds += time.perf_counter() - started
+    # Counted like QueryCounter: transaction control is not a statement.
+    if statement.lstrip()[:5].upper() != "BEGIN":
+        request.statements += 1
+
+
+def instrument_engines(engines: Iterable[Union[Engine, AsyncEngine]]) -> None:
+    """Attribute SQL run on ``engines`` to the current request; each engine is hooked once."""
+    for engine in engines:
+        sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+        if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,115 @@
+"""baseline schema
+
+The tables the app created with create_all before migrations existed, so a
+database from that time can be stamped at this revision and upgraded.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:15:10.679988
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('players',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('position', sa.String(), nullable=False),
+    sa.Column('team', sa.String(), nullable=False),
+    sa.Column('cost', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('password_hash', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_email'), ['email'], unique=True)
+        batch_op.create_index(batch_op.f('ix_users_id'), ['id'], unique=False)
+
+    op.create_table('leagues',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('created_by_user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['created_by_user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('lineups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('league_id', sa.Integer(), nullable=False),
+    sa.Column('gw', sa.Integer(), nullable=False),
+    sa.Column('captain_player_id', sa.Integer(), nullable=False),
+    sa.Column('vice_captain_player_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['captain_player_id'], ['players.id'], ),
+    sa.ForeignKeyConstraint(['league_id'], ['leagues.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['vice_captain_player_id'], ['players.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'league_id', 'gw', name='uq_lineup_user_league_gw')
+    )
+    op.create_table('memberships',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('league_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['league_id'], ['leagues.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'league_id', name='uq_membership_user_league')
+    )
+    op.create_table('squads',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('league_id', sa.Integer(), nullable=False),
+    sa.Column('budget_used', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['league_id'], ['leagues.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'league_id', name='uq_squad_user_league')
+    )
+    op.create_table('lineup_slots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('lineup_id', sa.Integer(), nullable=False),
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.Column('starter', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['lineup_id'], ['lineups.id'], ),
+    sa.ForeignKeyConstraint(['player_id'], ['players.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('lineup_id', 'player_id', name='uq_lineup_player')
+    )
+    op.create_table('squad_players',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('squad_id', sa.Integer(), nullable=False),
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['player_id'], ['players.id'], ),
+    sa.ForeignKeyConstraint(['squad_id'], ['squads.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('squad_id', 'player_id', name='uq_squad_player')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('squad_players')
+    op.drop_table('lineup_slots')
+    op.drop_table('squads')
+    op.drop_table('memberships')
+    op.drop_table('lineups')
+    op.drop_table('leagues')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_id'))
+        batch_op.drop_index(batch_op.f('ix_users_email'))
+
+    op.drop_table('users')
+    op.drop_table('players')
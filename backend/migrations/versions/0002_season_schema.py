@@ -0,0 +1,209 @@
+"""season schema
+
+Everything the models gained on top of the baseline: scoring, standings,
+price history, kickoffs and transfers, with the columns they added to
+existing tables. Rows already in the database are backfilled: each player's
+name_key, each squad's bank, and a standings row for every membership.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:52:52.982232
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The salary cap when this revision was written; squads saved before it get the rest of it as their bank.
+SQUAD_BUDGET = 100
+
+
+def upgrade() -> None:
+    op.create_table('kickoffs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('gw', sa.Integer(), nullable=False),
+    sa.Column('team', sa.String(), nullable=False),
+    sa.Column('kickoff', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('gw', 'team', name='uq_kickoff_gw_team')
+    )
+    op.create_table('player_gameweek_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.Column('gw', sa.Integer(), nullable=False),
+    sa.Column('pass_yards', sa.Integer(), nullable=False),
+    sa.Column('pass_tds', sa.Integer(), nullable=False),
+    sa.Column('interceptions', sa.Integer(), nullable=False),
+    sa.Column('rush_yards', sa.Integer(), nullable=False),
+    sa.Column('rush_tds', sa.Integer(), nullable=False),
+    sa.Column('receptions', sa.Integer(), nullable=False),
+    sa.Column('rec_yards', sa.Integer(), nullable=False),
+    sa.Column('rec_tds', sa.Integer(), nullable=False),
+    sa.Column('fumbles_lost', sa.Integer(), nullable=False),
+    sa.Column('fg_made', sa.Integer(), nullable=False),
+    sa.Column('xp_made', sa.Integer(), nullable=False),
+    sa.Column('dst_points', sa.Integer(), nullable=False),
+    sa.Column('points', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['player_id'], ['players.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('player_id', 'gw', name='uq_player_gameweek_stat')
+    )
+    op.create_table('player_prices',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.Column('gw', sa.Integer(), nullable=False),
+    sa.Column('cost', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['player_id'], ['players.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('player_id', 'gw', name='uq_player_price_gw')
+    )
+    op.create_table('standings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('league_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('team_name', sa.String(), nullable=False),
+    sa.Column('total_points', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('tiebreak', sa.Integer(), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['league_id'], ['leagues.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('league_id', 'user_id', name='uq_standing_league_user')
+    )
+    with op.batch_alter_table('standings', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_standings_league_points_tiebreak', ['league_id', sa.text('total_points DESC'), 'tiebreak'], unique=False
+        )
+
+    op.create_table('lineup_scores',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('lineup_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('league_id', sa.Integer(), nullable=False),
+    sa.Column('gw', sa.Integer(), nullable=False),
+    sa.Column('points', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['league_id'], ['leagues.id'], ),
+    sa.ForeignKeyConstraint(['lineup_id'], ['lineups.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('lineup_id')
+    )
+    with op.batch_alter_table('lineup_scores', schema=None) as batch_op:
+        batch_op.create_index('ix_lineup_scores_league_user', ['league_id', 'user_id'], unique=False)
+
+    op.create_table('transfers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('squad_id', sa.Integer(), nullable=False),
+    sa.Column('gw', sa.Integer(), nullable=False),
+    sa.Column('player_out_id', sa.Integer(), nullable=True),
+    sa.Column('player_in_id', sa.Integer(), nullable=True),
+    sa.Column('cost_out', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('cost_in', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('counted', sa.Boolean(), nullable=False),
+    sa.Column('hit_points', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['player_in_id'], ['players.id'], ),
+    sa.ForeignKeyConstraint(['player_out_id'], ['players.id'], ),
+    sa.ForeignKeyConstraint(['squad_id'], ['squads.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('transfers', schema=None) as batch_op:
+        batch_op.create_index('ix_transfers_squad_gw', ['squad_id', 'gw'], unique=False)
+
+    with op.batch_alter_table('lineup_slots', schema=None) as batch_op:
+        batch_op.create_index('ix_lineup_slots_player_id', ['player_id'], unique=False)
+
+    # Existing rows need a value for the new NOT NULL columns; the defaults go once they are backfilled.
+    with op.batch_alter_table('players', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('name_key', sa.String(), nullable=False, server_default=''))
+        batch_op.add_column(sa.Column('external_id', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('form', sa.Numeric(precision=10, scale=2), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('trend', sa.Numeric(precision=10, scale=2), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('value', sa.Numeric(precision=10, scale=3), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('form_gw', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.create_index(batch_op.f('ix_players_cost'), ['cost'], unique=False)
+        batch_op.create_index(batch_op.f('ix_players_name_key'), ['name_key'], unique=False)
+        batch_op.create_index('ix_players_position_cost', ['position', 'cost'], unique=False)
+        batch_op.create_index(batch_op.f('ix_players_team'), ['team'], unique=False)
+        batch_op.create_unique_constraint('uq_players_external_id', ['external_id'])
+
+    with op.batch_alter_table('squads', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('bank', sa.Numeric(precision=10, scale=2), nullable=False, server_default='0'))
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+    backfill()
+
+    with op.batch_alter_table('players', schema=None) as batch_op:
+        for column in ('name_key', 'form', 'trend', 'value', 'form_gw'):
+            batch_op.alter_column(column, server_default=None)
+    with op.batch_alter_table('squads', schema=None) as batch_op:
+        batch_op.alter_column('bank', server_default=None)
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.alter_column('token_version', server_default=None)
+
+
+def backfill() -> None:
+    connection = op.get_bind()
+    # Lower-cased in Python, as the app does, since SQLite's lower() only folds ASCII.
+    players = connection.execute(sa.text("SELECT id, name FROM players")).all()
+    if players:
+        connection.execute(
+            sa.text("UPDATE players SET name_key = :name_key WHERE id = :id"),
+            [{"id": player_id, "name_key": name.lower()} for player_id, name in players],
+        )
+    connection.execute(sa.text("UPDATE squads SET bank = :budget - budget_used"), {"budget": SQUAD_BUDGET})
+    # Nobody has points yet, so every team ranks first, ordered by when it joined.
+    connection.execute(
+        sa.text(
+            "INSERT INTO standings (league_id, user_id, team_name, total_points, tiebreak, rank) "
+            "SELECT memberships.league_id, memberships.user_id, users.name, 0, memberships.id, 1 "
+            "FROM memberships JOIN users ON users.id = memberships.user_id"
+        )
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('token_version')
+
+    with op.batch_alter_table('squads', schema=None) as batch_op:
+        batch_op.drop_column('bank')
+
+    with op.batch_alter_table('players', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_players_external_id', type_='unique')
+        batch_op.drop_index(batch_op.f('ix_players_team'))
+        batch_op.drop_index('ix_players_position_cost')
+        batch_op.drop_index(batch_op.f('ix_players_name_key'))
+        batch_op.drop_index(batch_op.f('ix_players_cost'))
+        batch_op.drop_column('form_gw')
+        batch_op.drop_column('value')
+        batch_op.drop_column('trend')
+        batch_op.drop_column('form')
+        batch_op.drop_column('external_id')
+        batch_op.drop_column('name_key')
+
+    with op.batch_alter_table('lineup_slots', schema=None) as batch_op:
+        batch_op.drop_index('ix_lineup_slots_player_id')
+
+    with op.batch_alter_table('transfers', schema=None) as batch_op:
+        batch_op.drop_index('ix_transfers_squad_gw')
+
+    op.drop_table('transfers')
+    with op.batch_alter_table('lineup_scores', schema=None) as batch_op:
+        batch_op.drop_index('ix_lineup_scores_league_user')
+
+    op.drop_table('lineup_scores')
+    with op.batch_alter_table('standings', schema=None) as batch_op:
+        batch_op.drop_index('ix_standings_league_points_tiebreak')
+
+    op.drop_table('standings')
+    op.drop_table('player_prices')
+    op.drop_table('player_gameweek_stats')
+    op.drop_table('kickoffs')
@@ -1,7 +1,7 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, Numeric, String, UniqueConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, Numeric, String, UniqueConstraint
+from sqlalchemy.orm import relationship, validates
 
 from .db import Base
 
@@ -13,6 +13,7 @@ class User(Base):
     name = Column(String, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
     password_hash = Column(String, nullable=False)
+    token_version = Column(Integer, nullable=False, default=0)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     leagues_created = relationship("League", back_populates="creator")
@@ -48,12 +49,24 @@ class Membership(Base):
 
 class Player(Base):
     __tablename__ = "players"
+    __table_args__ = (Index("ix_players_position_cost", "position", "cost"),)
 
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
+    # Lower-cased copy of ``name`` so prefix search is an index range scan on any backend.
+    name_key = Column(String, nullable=False, index=True)
     position = Column(String, nullable=False)
-    team = Column(String, nullable=False)
-    cost = Column(Numeric(10, 2), nullable=False)
+    team = Column(String, nullable=False, index=True)
+    cost = Column(Numeric(10, 2), nullable=False, index=True)
+    # Identifier used by the stat and price feeds; players added by hand have none.
+    external_id = Column(String, unique=True)
+    # Rolling aggregates kept current by player_history.refresh_aggregates whenever
+    # a stat line or the price changes, so reading a player never touches the series.
+    form = Column(Numeric(10, 2), nullable=False, default=0)
+    trend = Column(Numeric(10, 2), nullable=False, default=0)
+    value = Column(Numeric(10, 3), nullable=False, default=0)
+    # Last gameweek the aggregates cover.
+    form_gw = Column(Integer, nullable=False, default=0)
 
     squad_entries = relationship(
         "SquadPlayer", back_populates="player", cascade="all, delete-orphan", overlaps="squads"
@@ -65,6 +78,11 @@ class Player(Base):
         overlaps="squad_entries,squad_players",
     )
 
+    @validates("name")
+    def _sync_name_key(self, key: str, value: str) -> str:
+        self.name_key = value.lower()
+        return value
+
 
 class Squad(Base):
     __tablename__ = "squads"
@@ -74,6 +92,8 @@ class Squad(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     league_id = Column(Integer, ForeignKey("leagues.id"), nullable=False)
     budget_used = Column(Numeric(10, 2), nullable=False, default=0)
+    # Money left to spend; kept in step with every save and transfer.
+    bank = Column(Numeric(10, 2), nullable=False, default=0)
 
     user = relationship("User", back_populates="squads")
     league = relationship("League", back_populates="squads")
@@ -121,7 +141,11 @@ class Lineup(Base):
 
 class LineupSlot(Base):
     __tablename__ = "lineup_slots"
-    __table_args__ = (UniqueConstraint("lineup_id", "player_id", name="uq_lineup_player"),)
+    __table_args__ = (
+        UniqueConstraint("lineup_id", "player_id", name="uq_lineup_player"),
+        # Rescoring after a stat upload and auto-substitution look lineups up by player.
+        Index("ix_lineup_slots_player_id", "player_id"),
+    )
 
     id = Column(Integer, primary_key=True)
     lineup_id = Column(Integer, ForeignKey("lineups.id"), nullable=False)
@@ -129,3 +153,101 @@ class LineupSlot(Base):
     starter = Column(Boolean, nullable=False, default=True)
 
     lineup = relationship("Lineup", back_populates="slots")
+
+
+class PlayerGameweekStat(Base):
+    __tablename__ = "player_gameweek_stats"
+    __table_args__ = (UniqueConstraint("player_id", "gw", name="uq_player_gameweek_stat"),)
+
+    id = Column(Integer, primary_key=True)
+    player_id = Column(Integer, ForeignKey("players.id"), nullable=False)
+    gw = Column(Integer, nullable=False)
+    pass_yards = Column(Integer, nullable=False, default=0)
+    pass_tds = Column(Integer, nullable=False, default=0)
+    interceptions = Column(Integer, nullable=False, default=0)
+    rush_yards = Column(Integer, nullable=False, default=0)
+    rush_tds = Column(Integer, nullable=False, default=0)
+    receptions = Column(Integer, nullable=False, default=0)
+    rec_yards = Column(Integer, nullable=False, default=0)
+    rec_tds = Column(Integer, nullable=False, default=0)
+    fumbles_lost = Column(Integer, nullable=False, default=0)
+    fg_made = Column(Integer, nullable=False, default=0)
+    xp_made = Column(Integer, nullable=False, default=0)
+    dst_points = Column(Integer, nullable=False, default=0)
+    points = Column(Numeric(10, 2), nullable=False, default=0)
+
+
+class Transfer(Base):
+    # Append-only log of squad changes. Replaying a squad's rows up to a gameweek
+    # rebuilds the squad as it stood then; rows are never updated or deleted.
+    __tablename__ = "transfers"
+    __table_args__ = (Index("ix_transfers_squad_gw", "squad_id", "gw"),)
+
+    id = Column(Integer, primary_key=True)
+    squad_id = Column(Integer, ForeignKey("squads.id"), nullable=False)
+    gw = Column(Integer, nullable=False)
+    player_out_id = Column(Integer, ForeignKey("players.id"))
+    player_in_id = Column(Integer, ForeignKey("players.id"))
+    cost_out = Column(Numeric(10, 2))
+    cost_in = Column(Numeric(10, 2))
+    # False for squad saves before the season's first kickoff, which are not charged against free transfers.
+    counted = Column(Boolean, nullable=False, default=True)
+    hit_points = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class Kickoff(Base):
+    # When a team's game in a gameweek starts; its players' lineup slots lock then.
+    __tablename__ = "kickoffs"
+    __table_args__ = (UniqueConstraint("gw", "team", name="uq_kickoff_gw_team"),)
+
+    id = Column(Integer, primary_key=True)
+    gw = Column(Integer, nullable=False)
+    team = Column(String, nullable=False)
+    kickoff = Column(DateTime, nullable=False)
+
+
+class PlayerPrice(Base):
+    # A player's price from a gameweek on; a row only for gameweeks the price was set.
+    __tablename__ = "player_prices"
+    __table_args__ = (UniqueConstraint("player_id", "gw", name="uq_player_price_gw"),)
+
+    id = Column(Integer, primary_key=True)
+    player_id = Column(Integer, ForeignKey("players.id"), nullable=False)
+    gw = Column(Integer, nullable=False)
+    cost = Column(Numeric(10, 2), nullable=False)
+
+
+class LineupScore(Base):
+    __tablename__ = "lineup_scores"
+    __table_args__ = (Index("ix_lineup_scores_league_user", "league_id", "user_id"),)
+
+    id = Column(Integer, primary_key=True)
+    lineup_id = Column(Integer, ForeignKey("lineups.id"), unique=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    league_id = Column(Integer, ForeignKey("leagues.id"), nullable=False)
+    gw = Column(Integer, nullable=False)
+    points = Column(Numeric(10, 2), nullable=False, default=0)
+
+
+class Standing(Base):
+    __tablename__ = "standings"
+    __table_args__ = (UniqueConstraint("league_id", "user_id", name="uq_standing_league_user"),)
+
+    id = Column(Integer, primary_key=True)
+    league_id = Column(Integer, ForeignKey("leagues.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    team_name = Column(String, nullable=False)
+    total_points = Column(Numeric(10, 2), nullable=False, default=0)
+    tiebreak = Column(Integer, nullable=False)
+    rank = Column(Integer, nullable=False, default=1)
+
+
+# Matches the standings sort order (points descending, earliest membership first) so
+# pages and rank lookups are index range scans.
+Index(
+    "ix_standings_league_points_tiebreak",
+    Standing.league_id,
+    Standing.total_points.desc(),
+    Standing.tiebreak,
+)
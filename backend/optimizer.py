@@ -0,0 +1,331 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .models import PlayerGameweekStat
+
+SQUAD_BUDGET = Decimal("100.0")
+SQUAD_SIZE = 15
+# (min, max) players per position. The minimums field the nine starters: QB, 2 RB, 3 WR, TE, K, DST.
+POSITION_LIMITS: Dict[str, Tuple[int, int]] = {
+    "QB": (1, 3),
+    "RB": (2, 6),
+    "WR": (3, 6),
+    "TE": (1, 3),
+    "K": (1, 4),
+    "DST": (1, 4),
+}
+BEAM_WIDTH = 16
+# Slack for float sums so a squad tying the target is never pruned.
+EPSILON = 1e-6
+
+
+class Candidate(NamedTuple):
+    id: int
+    position: str
+    cost: int  # hundredths, so sums are exact
+    points: float
+
+
+class OptimizedSquad(NamedTuple):
+    player_ids: List[int]
+    cost: int
+    points: float
+
+
+class InfeasibleSquad(ValueError):
+    pass
+
+
+# (cost, points, player ids) for one position's picks, and a frontier of them per pick count.
+Option = Tuple[int, float, Tuple[int, ...]]
+Frontiers = Dict[int, List[Option]]
+# (players, cost, points, back-pointer chain) for a partial squad.
+State = Tuple[int, int, float, Optional[tuple]]
+
+
+def to_cents(value) -> int:
+    return int((Decimal(str(value)) * 100).to_integral_value())
+
+
+def projected_points(db: Session, before_gw: Optional[int] = None) -> Dict[int, float]:
+    """Default projection: each player's mean points over the gameweeks with recorded stats.
+
+    With ``before_gw`` only earlier gameweeks count, so a projection made at a
+    gameweek's lock does not see that gameweek's own stat lines.
+    """
+    query = select(PlayerGameweekStat.player_id, func.avg(PlayerGameweekStat.points)).group_by(
+        PlayerGameweekStat.player_id
+    )
+    if before_gw is not None:
+        query = query.where(PlayerGameweekStat.gw < before_gw)
+    return {player_id: float(points) for player_id, points in db.execute(query)}
+
+
+def pareto(options: Iterable[tuple]) -> List[tuple]:
+    """Keep the (cost, points, ...) entries no cheaper or equally cheap entry matches on points.
+
+    The result is sorted by cost with strictly rising points.
+    """
+    frontier = []
+    best = float("-inf")
+    for option in sorted(options, key=lambda o: (o[0], -o[1])):
+        if option[1] > best:
+            frontier.append(option)
+            best = option[1]
+    return frontier
+
+
+def undominated(candidates: Sequence[Candidate], keep: int) -> List[Candidate]:
+    """Drop players that at least ``keep`` same-position players beat on both cost and points.
+
+    Such a player can always be swapped for one of them in an optimal squad,
+    so the exact search only has to look at a few layers of the cost/points
+    frontier instead of the whole pool.
+    """
+    kept = []
+    top: List[float] = []  # min-heap of the ``keep`` best point totals seen at lower or equal cost
+    for candidate in sorted(candidates, key=lambda c: (c.cost, -c.points, c.id)):
+        if len(top) == keep and top[0] >= candidate.points:
+            continue
+        kept.append(candidate)
+        if len(top) < keep:
+            heapq.heappush(top, candidate.points)
+        else:
+            heapq.heapreplace(top, candidate.points)
+    return kept
+
+
+def position_frontiers(candidates: Sequence[Candidate], low: int, high: int, budget: int) -> Frontiers:
+    """Frontier of picking exactly k of ``candidates`` within ``budget`` for each k in low..high.
+
+    A 0/1 knapsack DP whose layers are the pick counts.
+    """
+    layers: List[List[Option]] = [[(0, 0.0, ())]] + [[] for _ in range(high)]
+    for candidate in candidates:
+        for picked in range(high, 0, -1):
+            extended = [
+                (cost + candidate.cost, points + candidate.points, ids + (candidate.id,))
+                for cost, points, ids in layers[picked - 1]
+                if cost + candidate.cost <= budget
+            ]
+            if extended:
+                layers[picked] = pareto(layers[picked] + extended)
+    return {count: layers[count] for count in range(low, high + 1) if layers[count]}
+
+
+def cheapest_completions(frontiers: List[Frontiers], size: int) -> List[List[Optional[Tuple[int, float]]]]:
+    """table[i][n]: (cost, points) of the cheapest way to add n players from positions i onwards."""
+    table: List[List[Optional[Tuple[int, float]]]] = [[None] * (size + 1) for _ in range(len(frontiers) + 1)]
+    table[-1][0] = (0, 0.0)
+    for index in range(len(frontiers) - 1, -1, -1):
+        for count, options in frontiers[index].items():
+            for rest, completion in enumerate(table[index + 1][: size + 1 - count]):
+                if completion is None:
+                    continue
+                option = (options[0][0] + completion[0], options[0][1] + completion[1])
+                current = table[index][count + rest]
+                if current is None or (option[0], -option[1]) < (current[0], -current[1]):
+                    table[index][count + rest] = option
+    return table
+
+
+def best_completions(frontiers: List[Frontiers], size: int, penalty: float = 0.0) -> List[List[float]]:
+    """table[i][n]: the most ``points - penalty * cost`` n players from positions i onwards can add,
+    ignoring the budget (-inf where n players cannot be placed)."""
+    table = [[float("-inf")] * (size + 1) for _ in range(len(frontiers) + 1)]
+    table[-1][0] = 0.0
+    for index in range(len(frontiers) - 1, -1, -1):
+        for count, options in frontiers[index].items():
+            top = max(points - penalty * cost for cost, points, _ in options)
+            for rest, completion in enumerate(table[index + 1][: size + 1 - count]):
+                table[index][count + rest] = max(table[index][count + rest], top + completion)
+    return table
+
+
+def lagrangian_penalty(frontiers: List[Frontiers], size: int, budget: int, rounds: int = 24) -> float:
+    """Points-per-cent rate giving the tightest budget-relaxed bound on the whole squad.
+
+    For any rate r >= 0, an affordable squad scores at most
+    max(points - r * cost) + r * budget over squads of any cost; that bound is
+    convex in r, so a ternary search finds its minimum.
+    """
+    rates = [points / cost for options in frontiers for frontier in options.values() for cost, points, _ in frontier if cost]
+    low, high = 0.0, max(rates, default=0.0)
+
+    def bound(rate: float) -> float:
+        return best_completions(frontiers, size, rate)[0][size] + rate * budget
+
+    for _ in range(rounds):
+        left, right = low + (high - low) / 3, high - (high - low) / 3
+        if bound(left) <= bound(right):
+            high = right
+        else:
+            low = left
+    return (low + high) / 2
+
+
+class FrontierSearch:
+    """Merge per-position frontiers into full squads, pruning by budget and by a points bound."""
+
+    def __init__(self, frontiers: List[Frontiers], size: int, budget: int) -> None:
+        self.frontiers = frontiers
+        self.size = size
+        self.budget = budget
+        self.cheapest = cheapest_completions(frontiers, size)
+        self.penalty = lagrangian_penalty(frontiers, size, budget) if self.feasible else 0.0
+        self.relaxed = best_completions(frontiers, size, self.penalty)
+        self.best = best_completions(frontiers, size)
+        # Frontiers are sorted by cost with strictly rising points, so cut-offs are bisections.
+        self.columns = [
+            {picked: ([o[0] for o in frontier], [o[1] for o in frontier]) for picked, frontier in options.items()}
+            for options in frontiers
+        ]
+
+    @property
+    def feasible(self) -> bool:
+        cheapest = self.cheapest[0][self.size]
+        return cheapest is not None and cheapest[0] <= self.budget
+
+    def upper_bound(self, index: int, needed: int, room: int) -> float:
+        """Most points positions ``index`` onwards can add with ``needed`` players and ``room`` budget.
+
+        The penalty moves the budget into the objective (points - penalty * cost),
+        which an affordable completion can exceed by at most penalty * room.
+        """
+        return min(self.best[index][needed], self.relaxed[index][needed] + self.penalty * room)
+
+    def run(self, target: float, beam: Optional[int] = None) -> Optional[State]:
+        """Return the best complete squad scoring at least ``target``, or None if there is none.
+
+        With ``beam`` only that many of the most promising partial squads per
+        player count survive each step, which is fast but not exact.
+        """
+        size, budget, cheapest = self.size, self.budget, self.cheapest
+        last = len(self.frontiers) - 1
+        floor = target - EPSILON
+        # States carry a back-pointer chain of chosen options instead of copying id tuples.
+        states: List[State] = [(0, 0, 0.0, None)]
+        for index, options in enumerate(self.frontiers):
+            merged: Dict[Tuple[int, int], Tuple[float, tuple]] = {}
+            for count, cost, points, chain in states:
+                if points + self.upper_bound(index, size - count, budget - cost) < floor:
+                    continue
+                for picked, frontier in options.items():
+                    needed = size - count - picked
+                    if needed < 0 or cheapest[index + 1][needed] is None:
+                        continue
+                    costs, gains = self.columns[index][picked]
+                    stop = bisect_right(costs, budget - cheapest[index + 1][needed][0] - cost)
+                    start = bisect_left(gains, floor - self.best[index + 1][needed] - points)
+                    if index == last:
+                        # Nothing left to fill: only the best affordable option matters.
+                        start = max(start, stop - 1)
+                    relaxed = self.relaxed[index + 1][needed] + self.penalty * (budget - cost)
+                    for option_cost, option_points, option_ids in frontier[start:stop]:
+                        total = points + option_points
+                        if total + relaxed - self.penalty * option_cost < floor:
+                            continue
+                        key = (count + picked, cost + option_cost)
+                        current = merged.get(key)
+                        if current is None or total > current[0]:
+                            merged[key] = (total, (chain, option_ids))
+            # Every merged state can be completed with the cheapest remaining options.
+            for (count, _), (points, _) in merged.items():
+                floor = max(floor, points + cheapest[index + 1][size - count][1] - EPSILON)
+            by_count: Dict[int, List[Tuple[int, float, tuple]]] = {}
+            for (count, cost), (points, chain) in merged.items():
+                by_count.setdefault(count, []).append((cost, points, chain))
+            states = []
+            for count, group in by_count.items():
+                survivors = [
+                    (count, cost, points, chain)
+                    for cost, points, chain in pareto(group)
+                    if points + self.upper_bound(index + 1, size - count, budget - cost) >= floor
+                ]
+                if beam is not None:
+                    completion = cheapest[index + 1][size - count][1]
+                    survivors = heapq.nlargest(beam, survivors, key=lambda state: state[2] + completion)
+                states.extend(survivors)
+        return max(states, key=lambda state: (state[2], -state[1]), default=None)
+
+
+def optimize_squad(
+    candidates: Iterable[Candidate],
+    budget: int = to_cents(SQUAD_BUDGET),
+    limits: Optional[Dict[str, Tuple[int, int]]] = None,
+    size: int = SQUAD_SIZE,
+    locked: Iterable[int] = (),
+    excluded: Iterable[int] = (),
+) -> OptimizedSquad:
+    """Return the ``size``-player squad with the most projected points within ``budget`` and ``limits``.
+
+    Each position is solved as an exact knapsack over its undominated players,
+    giving a cost/points frontier per pick count. Frontiers are merged position
+    by position, pruning partial squads whose cheapest completion breaks the
+    budget or whose Lagrangian upper bound cannot reach the target score.
+    Ties go to the cheaper squad.
+    """
+    limits = dict(POSITION_LIMITS if limits is None else limits)
+    excluded_ids = set(excluded)
+    locked_ids = list(dict.fromkeys(locked))
+    by_id = {candidate.id: candidate for candidate in candidates if candidate.id not in excluded_ids}
+    missing = [player_id for player_id in locked_ids if player_id not in by_id]
+    if missing:
+        raise InfeasibleSquad(f"Locked players unavailable: {missing}")
+    locked_players = [by_id[player_id] for player_id in locked_ids]
+    for player in locked_players:
+        low, high = limits.get(player.position, (0, 0))
+        if high == 0:
+            raise InfeasibleSquad(f"Too many locked players at {player.position}")
+        limits[player.position] = (max(0, low - 1), high - 1)
+        budget -= player.cost
+    size -= len(locked_players)
+    if budget < 0 or size < 0:
+        raise InfeasibleSquad("Locked players exceed the budget or squad size")
+
+    pools = {
+        position: [c for c in by_id.values() if c.position == position and c.id not in locked_ids]
+        for position in limits
+    }
+    # What the other positions need at minimum caps each position's count and spend.
+    floor_cost = {position: sum(sorted(c.cost for c in pools[position])[:low]) for position, (low, _) in limits.items()}
+    total_low = sum(low for low, _ in limits.values())
+    total_floor_cost = sum(floor_cost.values())
+    frontiers = []
+    for position, (low, high) in limits.items():
+        high = min(high, size - (total_low - low))
+        if high <= 0 and low == 0:
+            continue
+        cap = budget - (total_floor_cost - floor_cost[position])
+        options = position_frontiers(undominated(pools[position], high), low, high, cap) if high >= low else {}
+        if not options:
+            raise InfeasibleSquad(f"Not enough affordable players at {position}")
+        frontiers.append(options)
+    frontiers.sort(key=lambda options: sum(len(frontier) for frontier in options.values()))
+    search = FrontierSearch(frontiers, size, budget)
+    if not search.feasible:
+        raise InfeasibleSquad("No squad fits the budget and position limits")
+
+    # A narrow beam finds a good squad fast. The exact pass then only looks for squads
+    # scoring at least a target just under the Lagrangian bound, which prunes nearly every
+    # partial squad; if none exists the target is lowered towards the beam's score.
+    greedy = search.run(float("-inf"), beam=BEAM_WIDTH)
+    ceiling = search.upper_bound(0, size, budget)
+    found = None
+    for fraction in (1 / 64, 1 / 16, 1 / 4, 1):
+        found = search.run(max(greedy[2], ceiling - (ceiling - greedy[2]) * fraction))
+        if found is not None:
+            break
+    _, cost, points, chain = found
+    ids: List[int] = []
+    while chain is not None:
+        chain, option_ids = chain
+        ids[:0] = option_ids
+    locked_cost = sum(player.cost for player in locked_players)
+    locked_points = sum(player.points for player in locked_players)
+    return OptimizedSquad(player_ids=locked_ids + ids, cost=cost + locked_cost, points=points + locked_points)
@@ -0,0 +1,139 @@
+from decimal import Decimal
+from typing import Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, case, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from .models import Player, PlayerGameweekStat, PlayerPrice
+
+# Gameweeks in the form window; trend compares it with the window before.
+FORM_WINDOW = 4
+
+TWO_PLACES = Decimal("0.01")
+THREE_PLACES = Decimal("0.001")
+
+
+def latest_gameweek(db: Session) -> Optional[int]:
+    # Served from the (player_id, gw) index. An index on gw alone would make this one lookup, but SQLite
+    # then starts rescore_lineups' join from it and reads every stat line of the gameweek per lineup.
+    return db.execute(select(func.max(PlayerGameweekStat.gw))).scalar()
+
+
+def compute_aggregates(recent: Decimal, earlier: Decimal, cost: Decimal) -> Tuple[Decimal, Decimal, Decimal]:
+    """(form, trend, value) from the points of the last ``FORM_WINDOW`` gameweeks and of the window before.
+
+    Form is the mean over the window, counting a gameweek without a stat line
+    as zero; trend is form minus the mean of the window before it; value is
+    the window's points per unit of cost.
+    """
+    form = (recent / FORM_WINDOW).quantize(TWO_PLACES)
+    trend = (form - earlier / FORM_WINDOW).quantize(TWO_PLACES)
+    value = (recent / cost).quantize(THREE_PLACES) if cost else Decimal("0")
+    return form, trend, value
+
+
+def refresh_aggregates(db: Session, player_ids: Iterable[int]) -> int:
+    """Recompute form, trend and value for ``player_ids`` and for every player behind the latest gameweek.
+
+    The first stat line of a new gameweek moves every player's window, so
+    that call refreshes the whole pool; later calls in the same gameweek only
+    touch the players whose points or price changed. The two window sums are
+    taken in SQL over the ``2 * FORM_WINDOW`` stat rows each player has on the
+    (player_id, gw) index, and only aggregates that moved are written.
+    Returns the players updated; the caller commits.
+    """
+    latest = latest_gameweek(db)
+    if latest is None:
+        return 0
+    ids = list(set(player_ids))
+    stat = PlayerGameweekStat
+    in_window = and_(stat.player_id == Player.id, stat.gw > latest - 2 * FORM_WINDOW, stat.gw <= latest)
+    recent = stat.gw > latest - FORM_WINDOW
+
+    def window_sum(condition):
+        return func.coalesce(func.sum(case((condition, stat.points))), 0)
+
+    stale = Player.form_gw < latest
+    rows = db.execute(
+        select(
+            Player.id,
+            Player.cost,
+            Player.form,
+            Player.trend,
+            Player.value,
+            Player.form_gw,
+            window_sum(recent),
+            window_sum(~recent),
+        )
+        .outerjoin(stat, in_window)
+        .where(or_(Player.id.in_(ids), stale) if ids else stale)
+        .group_by(Player.id)
+    )
+    updates = []
+    advanced = []
+    for player_id, cost, form, trend, value, form_gw, recent_points, earlier_points in rows:
+        aggregates = compute_aggregates(Decimal(str(recent_points)), Decimal(str(earlier_points)), Decimal(cost))
+        if aggregates != (Decimal(form), Decimal(trend), Decimal(value)):
+            form, trend, value = aggregates
+            updates.append({"player_row_id": player_id, "form": form, "trend": trend, "value": value, "form_gw": latest})
+        elif form_gw < latest:
+            advanced.append({"player_row_id": player_id, "form_gw": latest})
+    table = Player.__table__
+    by_id = table.c.id == bindparam("player_row_id")
+    if updates:
+        db.execute(update(table).where(by_id), updates)
+        # Core writes bypass the catalog's change tracking; flag them so it rebuilds on commit.
+        db.info["players_changed"] = True
+    if advanced:
+        db.execute(update(table).where(by_id), advanced)
+    return len(updates)
+
+
+def record_prices(db: Session, gw: int, prices: Mapping[int, Decimal]) -> List[int]:
+    """Upsert each player's price for ``gw``; returns the ids whose stored price changed."""
+    if not prices:
+        return []
+    table = PlayerPrice.__table__
+    current = select(table.c.player_id, table.c.cost).where(table.c.gw == gw, table.c.player_id.in_(list(prices)))
+    existing = dict(db.execute(current).all())
+    new_rows, updates = [], []
+    for player_id, cost in prices.items():
+        if player_id not in existing:
+            new_rows.append({"player_id": player_id, "gw": gw, "cost": cost})
+        elif Decimal(existing[player_id]) != cost:
+            updates.append({"price_player_id": player_id, "price_gw": gw, "cost": cost})
+    if new_rows:
+        db.execute(insert(table), new_rows)
+    if updates:
+        db.execute(
+            update(table).where(table.c.player_id == bindparam("price_player_id"), table.c.gw == bindparam("price_gw")),
+            updates,
+        )
+    return [row["player_id"] for row in new_rows] + [row["price_player_id"] for row in updates]
+
+
+def player_series(db: Session, player_id: int) -> List[dict]:
+    """Points and price by gameweek, oldest first; the price carries forward between changes."""
+    stats = db.execute(
+        select(PlayerGameweekStat.gw, PlayerGameweekStat.points)
+        .where(PlayerGameweekStat.player_id == player_id)
+        .order_by(PlayerGameweekStat.gw)
+    ).all()
+    prices = db.execute(
+        select(PlayerPrice.gw, PlayerPrice.cost).where(PlayerPrice.player_id == player_id).order_by(PlayerPrice.gw)
+    ).all()
+    points_by_gw = dict(stats)
+    price_by_gw = dict(prices)
+    series = []
+    cost: Optional[Decimal] = None
+    for gw in sorted(points_by_gw.keys() | price_by_gw.keys()):
+        cost = price_by_gw.get(gw, cost)
+        points = points_by_gw.get(gw)
+        series.append(
+            {
+                "gw": gw,
+                "points": None if points is None else float(points),
+                "cost": None if cost is None else float(cost),
+            }
+        )
+    return series
@@ -0,0 +1,97 @@
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query, Session
+
+from .models import Player
+
+SORT_COLUMNS = {"cost": Player.cost, "name": Player.name_key}
+DEFAULT_SORT = "-cost"
+
+
+@dataclass
+class PlayerFilters:
+    positions: List[str] = field(default_factory=list)
+    teams: List[str] = field(default_factory=list)
+    min_cost: Optional[Decimal] = None
+    max_cost: Optional[Decimal] = None
+    name_prefix: Optional[str] = None
+    sort: str = DEFAULT_SORT
+
+
+def parse_sort(sort: str) -> Tuple[str, bool]:
+    descending = sort.startswith("-")
+    key = sort.lstrip("-")
+    if key not in SORT_COLUMNS:
+        raise ValueError(f"Unknown sort key: {sort}")
+    return key, descending
+
+
+def encode_cursor(player: Player, sort: str) -> str:
+    key, _ = parse_sort(sort)
+    value = player.cost if key == "cost" else player.name_key
+    return f"{value}:{player.id}"
+
+
+def decode_cursor(cursor: str, sort: str):
+    key, _ = parse_sort(sort)
+    value, player_id = cursor.rsplit(":", 1)
+    if key == "cost":
+        try:
+            value = Decimal(value)
+        except InvalidOperation:
+            raise ValueError(f"Invalid cursor: {cursor}")
+    return value, int(player_id)
+
+
+def build_query(db: Session, filters: PlayerFilters, after: Optional[str] = None) -> Query:
+    """Translate filters into a query that each index on ``players`` can serve.
+
+    Position sets use (position, cost), team sets use (team), name prefixes use
+    a range on the lower-cased ``name_key`` and sorting without filters walks
+    the cost or name_key index. Ties are broken on ``id`` in the same direction
+    as the sort key so keyset pages stay index ordered.
+
+    Sorted by cost, several positions become one query per position joined
+    with UNION ALL: each walks its stretch of (position, cost) in order and
+    SQLite merges them. With ``position IN (...)`` it walks the whole cost
+    index instead, filtering as it goes.
+    """
+    key, descending = parse_sort(filters.sort)
+    column = SORT_COLUMNS[key]
+    positions = list(dict.fromkeys(filters.positions))
+    query = db.query(Player)
+    if filters.teams:
+        query = query.filter(Player.team.in_(filters.teams))
+    if filters.min_cost is not None:
+        query = query.filter(Player.cost >= filters.min_cost)
+    if filters.max_cost is not None:
+        query = query.filter(Player.cost <= filters.max_cost)
+    if filters.name_prefix:
+        prefix = filters.name_prefix.lower()
+        query = query.filter(Player.name_key >= prefix, Player.name_key < prefix + "\uffff")
+    if after:
+        value, last_id = decode_cursor(after, filters.sort)
+        if descending:
+            query = query.filter(or_(column < value, and_(column == value, Player.id < last_id)))
+        else:
+            query = query.filter(or_(column > value, and_(column == value, Player.id > last_id)))
+    if len(positions) > 1 and key == "cost":
+        branches = [query.filter(Player.position == position) for position in positions]
+        query = branches[0].union_all(*branches[1:])
+    elif positions:
+        query = query.filter(Player.position.in_(positions))
+    if descending:
+        return query.order_by(column.desc(), Player.id.desc())
+    return query.order_by(column, Player.id)
+
+
+def search_players(
+    db: Session, filters: PlayerFilters, after: Optional[str] = None, limit: Optional[int] = None
+) -> List[Player]:
+    query = build_query(db, filters, after)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
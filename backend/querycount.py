@@ -0,0 +1,50 @@
+from typing import List, Union
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    """Record the SQL statements sent through the given engines while active.
+
+    Transaction control (BEGIN) is not counted. Used as a context manager
+    around a single request so tests can hold each endpoint to a fixed
+    statement budget regardless of how many rows it returns.
+    """
+
+    def __init__(self, *engines: Union[Engine, AsyncEngine]) -> None:
+        self._engines: List[Engine] = []
+        for engine in engines:
+            sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+            # The write engine is the read engine when there is no separate writer.
+            if sync_engine not in self._engines:
+                self._engines.append(sync_engine)
+        self.statements: List[str] = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if not statement.lstrip().upper().startswith("BEGIN"):
+            self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        self.statements = []
+        for engine in self._engines:
+            event.listen(engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for engine in self._engines:
+            event.remove(engine, "before_cursor_execute", self._record)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def check(self, budget: int, label: str = "request") -> None:
+        if self.count > budget:
+            listing = "\n".join(f"  {statement}" for statement in self.statements)
+            raise QueryBudgetExceeded(f"{label} ran {self.count} SQL statements (budget {budget}):\n{listing}")
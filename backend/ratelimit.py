@@ -0,0 +1,225 @@
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Hashable, NamedTuple, Optional, Tuple
+
+from .auth import decode_access_token
+
+RATE_LIMITS_ENABLED = os.getenv("RATE_LIMITS_ENABLED", "1") != "0"
+RATE_LIMIT_STRIPES = int(os.getenv("RATE_LIMIT_STRIPES", "16"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Proxies in front of the app that append to X-Forwarded-For; the entry the outermost one added is the caller.
+RATE_LIMIT_PROXY_HOPS = int(os.getenv("RATE_LIMIT_PROXY_HOPS", "0"))
+MISSING = object()
+
+
+class Limit(NamedTuple):
+    """A token bucket of ``burst`` tokens refilled at ``rate`` a second; build it with ``Limit.of``."""
+
+    rate: float
+    burst: float
+    # Seconds per token, and how far ahead of now a bucket's full time may run before it is empty.
+    interval: float
+    tolerance: float
+
+    @classmethod
+    def of(cls, rate: float, burst: float) -> "Limit":
+        return cls(rate, burst, 1 / rate, (burst - 1) / rate)
+
+
+def parse_limit(value: str) -> Optional[Limit]:
+    """``"RATE/BURST"`` as in ``"5/30"``; ``"off"`` disables the class."""
+    if value.strip().lower() == "off":
+        return None
+    rate, _, burst = value.partition("/")
+    return Limit.of(float(rate), float(burst or rate))
+
+
+# Route classes and their default limits. Auth is keyed by client IP until a token is presented.
+LIMITS: Dict[str, Optional[Limit]] = {
+    "auth": parse_limit(os.getenv("RATE_LIMIT_AUTH", "0.5/10")),
+    "reads": parse_limit(os.getenv("RATE_LIMIT_READS", "20/100")),
+    "writes": parse_limit(os.getenv("RATE_LIMIT_WRITES", "2/20")),
+}
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """The limit class of a request, or None for requests that are never limited."""
+    if not path.startswith("/api/") or path.startswith("/api/admin/") or method == "OPTIONS":
+        return None
+    if method == "GET" or method == "HEAD":
+        return "reads"
+    return "auth" if path.startswith("/api/auth/") else "writes"
+
+
+class RateLimitBackend(ABC):
+    """Storage for token buckets.
+
+    ``StripedMemoryBackend`` keeps them in this process, so each worker
+    enforces its own share of a limit; a backend on a shared store can take
+    its place by implementing ``take`` and ``reset``.
+    """
+
+    @abstractmethod
+    def take(self, key: Hashable, limit: Limit, now: float) -> float:
+        """Spend a token from ``key``'s bucket: 0.0 if there was one, else seconds until there will be."""
+
+    @abstractmethod
+    def reset(self) -> None:
+        ...
+
+
+class StripedMemoryBackend(RateLimitBackend):
+    """Token buckets in ``stripes`` dicts, each behind its own lock.
+
+    A key always maps to the same stripe, so requests for different keys
+    rarely wait on each other. Each bucket is stored as the one float of the
+    generic cell rate algorithm: the time at which it will be full again.
+    Taking a token pushes that time ``1 / rate`` later, and the bucket is
+    empty once it lies more than ``(burst - 1) / rate`` ahead of now. That
+    makes a take one lookup and one store under the stripe's lock. When a stripe outgrows its share
+    of ``max_keys``, buckets that are already full are dropped, since a
+    missing bucket starts full anyway.
+    """
+
+    def __init__(self, stripes: int = RATE_LIMIT_STRIPES, max_keys: int = RATE_LIMIT_MAX_KEYS) -> None:
+        self._stripes = [(threading.Lock(), {}) for _ in range(stripes)]
+        self._stripe_keys = max(1, max_keys // stripes)
+
+    def take(self, key: Hashable, limit: Limit, now: float) -> float:
+        lock, buckets = self._stripes[hash(key) % len(self._stripes)]
+        lock.acquire()
+        try:
+            full_at = buckets.get(key, now)
+            if full_at < now:
+                full_at = now
+            elif full_at - now > limit.tolerance:
+                return full_at - now - limit.tolerance
+            if len(buckets) >= self._stripe_keys and key not in buckets:
+                self._sweep(buckets, now)
+            buckets[key] = full_at + limit.interval
+            return 0.0
+        finally:
+            lock.release()
+
+    @staticmethod
+    def _sweep(buckets: Dict[Hashable, float], now: float) -> None:
+        full = [key for key, full_at in buckets.items() if full_at <= now]
+        for key in full or list(buckets)[: len(buckets) // 2]:
+            del buckets[key]
+
+    def reset(self) -> None:
+        for lock, buckets in self._stripes:
+            with lock:
+                buckets.clear()
+
+
+class RateLimiter:
+    """Charges each limited request to its caller's bucket for the request's route class.
+
+    The caller is the user id of a valid bearer token, or the client address
+    without one. Behind ``proxy_hops`` proxies the address is the
+    X-Forwarded-For entry that many places from the right, the one the
+    outermost proxy appended; entries to its left are whatever the caller
+    sent, so they are never used. Tokens are verified with
+    ``decode_access_token`` the first time they are seen and remembered by
+    their raw header value (at most ``RATE_LIMIT_MAX_KEYS`` of them), so later
+    requests skip decoding; each route's class and limit are remembered per
+    method and path the same way, so change ``limits`` only before ``reset``.
+
+    There is no middleware of its own: ``IdempotencyMiddleware`` calls
+    ``check`` first thing, which saves an ASGI layer on every request.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, Optional[Limit]] = LIMITS,
+        backend: Optional[RateLimitBackend] = None,
+        enabled: bool = RATE_LIMITS_ENABLED,
+        proxy_hops: int = RATE_LIMIT_PROXY_HOPS,
+    ) -> None:
+        self.limits = limits
+        self.backend = backend or StripedMemoryBackend()
+        self.enabled = enabled
+        self.proxy_hops = proxy_hops
+        self.limited = 0
+        self._subjects: Dict[bytes, int] = {}
+        # (method, path) -> (route class, its limit); None for routes that are never limited.
+        self._routes: Dict[Tuple[str, str], Optional[Tuple[str, Limit]]] = {}
+
+    def check(self, scope: dict) -> float:
+        """Seconds the caller must wait before this request would be allowed; 0.0 to let it through."""
+        if not self.enabled:
+            return 0.0
+        route = (scope["method"], scope["path"])
+        limited = self._routes.get(route, MISSING)
+        if limited is MISSING:
+            limited = self._route_limit(route)
+        if limited is None:
+            return 0.0
+        name, limit = limited
+        wait = self.backend.take((name, self.subject(scope)), limit, time.monotonic())
+        if wait:
+            self.limited += 1
+        return wait
+
+    def _route_limit(self, route: Tuple[str, str]) -> Optional[Tuple[str, Limit]]:
+        if len(self._routes) >= RATE_LIMIT_MAX_KEYS:
+            self._routes.clear()
+        name = route_class(*route)
+        limit = self.limits.get(name) if name else None
+        self._routes[route] = limited = (name, limit) if limit is not None else None
+        return limited
+
+    def subject(self, scope: dict) -> Hashable:
+        authorization = forwarded = None
+        for header, value in scope["headers"]:
+            if header == b"authorization":
+                authorization = value
+            elif header == b"x-forwarded-for":
+                # Proxies may add a header of their own instead of appending to the caller's.
+                forwarded = value if forwarded is None else forwarded + b"," + value
+        if authorization is not None:
+            user_id = self._subjects.get(authorization)
+            if user_id is not None:
+                return user_id
+            if authorization[:7] == b"Bearer ":
+                try:
+                    user_id = int(decode_access_token(authorization[7:].decode("latin-1"))["sub"])
+                except Exception:
+                    user_id = None
+                if user_id is not None:
+                    if len(self._subjects) >= RATE_LIMIT_MAX_KEYS:
+                        self._subjects.clear()
+                    self._subjects[authorization] = user_id
+                    return user_id
+        if self.proxy_hops and forwarded is not None:
+            entries = forwarded.split(b",")
+            if len(entries) >= self.proxy_hops:
+                return entries[-self.proxy_hops].strip().decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else ""
+
+    def reset(self) -> None:
+        self.backend.reset()
+        self._subjects.clear()
+        self._routes.clear()
+        self.limited = 0
+
+
+rate_limiter = RateLimiter()
+
+TOO_MANY_REQUESTS = b'{"detail":"Too many requests, retry later"}'
+
+
+async def too_many_requests(send, wait: float) -> None:
+    """Answer 429 with ``Retry-After`` rounded up to whole seconds."""
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(TOO_MANY_REQUESTS)).encode()),
+        (b"retry-after", str(math.ceil(wait)).encode()),
+    ]
+    await send({"type": "http.response.start", "status": 429, "headers": headers})
+    await send({"type": "http.response.body", "body": TOO_MANY_REQUESTS})
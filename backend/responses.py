@@ -0,0 +1,31 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from starlette.responses import Response
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact JSON bytes via orjson; Decimals become floats, as the float fields in schemas.py declare."""
+    return orjson.dumps(content, default=_default)
+
+
+class RowsResponse(Response):
+    """JSON response for rows the handler built itself, in the shape of the route's ``response_model``.
+
+    Returning a ``Response`` makes FastAPI skip validating and re-encoding the
+    content against ``response_model``, which still documents the route in
+    OpenAPI. Use it only for plain dicts and lists whose fields already match
+    the schema; anything user-supplied should go through the model.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,196 @@
+import os
+import threading
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .models import Kickoff
+
+# How long after a gameweek's last kickoff its games are assumed to be over.
+GAME_LENGTH = timedelta(hours=int(os.getenv("GAME_LENGTH_HOURS", "4")))
+
+
+class Clock:
+    """The UTC time lock checks run against.
+
+    Tests move it with ``travel_to`` (optionally frozen) and ``advance``, and
+    put it back with ``reset``. Times are naive UTC, like the rest of the models.
+    """
+
+    def __init__(self) -> None:
+        self._offset = timedelta(0)
+        self._frozen: Optional[datetime] = None
+
+    def now(self) -> datetime:
+        if self._frozen is not None:
+            return self._frozen
+        return datetime.utcnow() + self._offset
+
+    def travel_to(self, when: datetime, frozen: bool = True) -> None:
+        when = to_utc(when)
+        if frozen:
+            self._frozen = when
+        else:
+            self._frozen = None
+            self._offset = when - datetime.utcnow()
+
+    def advance(self, delta: timedelta) -> None:
+        if self._frozen is not None:
+            self._frozen += delta
+        else:
+            self._offset += delta
+
+    def reset(self) -> None:
+        self._offset = timedelta(0)
+        self._frozen = None
+
+
+clock = Clock()
+
+
+def to_utc(when: datetime) -> datetime:
+    """Naive UTC for a naive (assumed UTC) or aware datetime."""
+    if when.tzinfo is None:
+        return when
+    return when.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class ScheduleIndex(NamedTuple):
+    """Kickoffs keyed by (gw, team), each gameweek's first kickoff, and the
+    gameweeks' [first kickoff, last kickoff + ``GAME_LENGTH``) windows sorted by start."""
+
+    version: int
+    kickoffs: Dict[Tuple[int, str], datetime]
+    first_kickoffs: Dict[int, datetime]
+    starts: List[datetime]
+    windows: List[Tuple[datetime, datetime, int]]
+
+    def started(self, gw: int, team: str, now: datetime) -> bool:
+        """Whether ``team``'s game in ``gw`` has kicked off; teams without a game that week never lock."""
+        kickoff = self.kickoffs.get((gw, team))
+        return kickoff is not None and now >= kickoff
+
+    def gameweek_started(self, gw: int, now: datetime) -> bool:
+        first = self.first_kickoffs.get(gw)
+        return first is not None and now >= first
+
+    def season_started(self, now: datetime) -> bool:
+        """Whether the first gameweek on the schedule has kicked off."""
+        return bool(self.starts) and now >= self.starts[0]
+
+    def open_gameweek(self, now: datetime) -> int:
+        """The gameweek squad changes made at ``now`` count against: the first that has not kicked off.
+
+        That is gameweek 1 before any schedule exists, and the one after the
+        last scheduled gameweek once they have all started.
+        """
+        position = bisect_right(self.starts, now)
+        if position < len(self.windows):
+            return self.windows[position][2]
+        return max((gw for _, _, gw in self.windows), default=0) + 1
+
+    def live_gameweek(self, now: datetime) -> Optional[int]:
+        """The gameweek whose games are under way at ``now``, if any."""
+        position = bisect_right(self.starts, now)
+        if not position:
+            return None
+        _, end, gw = self.windows[position - 1]
+        return gw if now < end else None
+
+
+def build_index(version: int, rows: Iterable[Tuple[int, str, datetime]]) -> ScheduleIndex:
+    kickoffs: Dict[Tuple[int, str], datetime] = {}
+    bounds: Dict[int, Tuple[datetime, datetime]] = {}
+    for gw, team, kickoff in rows:
+        kickoffs[(gw, team)] = kickoff
+        first, last = bounds.get(gw, (kickoff, kickoff))
+        bounds[gw] = (min(first, kickoff), max(last, kickoff))
+    windows = sorted((first, last + GAME_LENGTH, gw) for gw, (first, last) in bounds.items())
+    first_kickoffs = {gw: first for first, _, gw in windows}
+    return ScheduleIndex(version, kickoffs, first_kickoffs, [start for start, _, _ in windows], windows)
+
+
+class KickoffSchedule:
+    """In-process index of the kickoff schedule, rebuilt with one query per schedule version.
+
+    Like the player catalog, the version is bumped when a session commits a
+    change to a ``Kickoff`` row (and by ``invalidate`` after bulk Core
+    statements), and the next reader rebuilds. Checks against the index are
+    dictionary lookups, so locking a whole lineup costs no queries.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._version = 0
+        self._index: Optional[ScheduleIndex] = None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._index = None
+
+    def get(self, db: Session) -> ScheduleIndex:
+        index = self._index
+        if index is not None and index.version == self._version:
+            return index
+        version = self._version
+        index = build_index(version, db.execute(select(Kickoff.gw, Kickoff.team, Kickoff.kickoff)))
+        with self._lock:
+            if self._version == version:
+                self._index = index
+        return index
+
+    async def get_async(self, db: AsyncSession) -> ScheduleIndex:
+        index = self._index
+        if index is not None and index.version == self._version:
+            return index
+        return await db.run_sync(self.get)
+
+
+kickoff_schedule = KickoffSchedule()
+
+
+def locked_players(
+    index: ScheduleIndex, gw: Optional[int], player_ids: Iterable[int], teams: Mapping[int, str], now: datetime
+) -> List[int]:
+    """The players among ``player_ids`` whose game in ``gw`` has started, in id order."""
+    if gw is None:
+        return []
+    return sorted(player_id for player_id in set(player_ids) if index.started(gw, teams.get(player_id, ""), now))
+
+
+def lineup_changes(
+    starters: Iterable[int], captain: int, vice: int, previous: Optional[Tuple[Iterable[int], int, int]]
+) -> set:
+    """Players whose place in a lineup a submission changes: starters in or out, and captaincy moves."""
+    starters = set(starters)
+    if previous is None:
+        return starters
+    old_starters, old_captain, old_vice = previous
+    changed = starters ^ set(old_starters)
+    if captain != old_captain:
+        changed |= {captain, old_captain}
+    if vice != old_vice:
+        changed |= {vice, old_vice}
+    return changed
+
+
+@event.listens_for(Session, "after_flush")
+def _track_schedule_changes(session: Session, flush_context) -> None:
+    if any(isinstance(obj, Kickoff) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["schedule_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    if session.info.pop("schedule_changed", False):
+        kickoff_schedule.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop("schedule_changed", None)
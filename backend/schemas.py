@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, validator
 
@@ -28,6 +28,11 @@ class AuthResponse(UserBase):
     token: str
 
 
+class PasswordChangeRequest(BaseModel):
+    current_password: str
+    new_password: str
+
+
 class LeagueCreateRequest(BaseModel):
     name: str
 
@@ -47,14 +52,33 @@ class PlayerOut(BaseModel):
     position: str
     team: str
     cost: float
+    form: float = 0.0
+    trend: float = 0.0
+    value: float = 0.0
 
     class Config:
         orm_mode = True
 
 
+class PlayerHistoryPoint(BaseModel):
+    gw: int
+    points: Optional[float] = None
+    cost: Optional[float] = None
+
+
+class PlayerHistoryResponse(BaseModel):
+    player_id: int
+    form: float
+    trend: float
+    value: float
+    history: List[PlayerHistoryPoint]
+
+
 class SquadSaveRequest(BaseModel):
     league_id: int
     player_ids: List[int]
+    # The server logs the change under the gameweek that has not kicked off yet; if sent, gw must name it.
+    gw: Optional[int] = None
 
 
 class SquadPlayerOut(PlayerOut):
@@ -65,6 +89,7 @@ class SquadOut(BaseModel):
     squad_id: int
     league_id: int
     budget_used: float
+    bank: float
     players: List[SquadPlayerOut]
 
 
@@ -72,6 +97,68 @@ class SquadResponse(SquadOut):
     pass
 
 
+class TransferIn(BaseModel):
+    player_out_id: int
+    player_in_id: int
+
+
+class TransferRequest(BaseModel):
+    league_id: int
+    # As for squad saves, the gameweek is the server's; a gw that is sent must match it.
+    gw: Optional[int] = None
+    transfers: List[TransferIn]
+
+    @validator("transfers")
+    def validate_transfers(cls, value: List[TransferIn]) -> List[TransferIn]:
+        if not value:
+            raise ValueError("At least one transfer is required")
+        ids = [player_id for item in value for player_id in (item.player_out_id, item.player_in_id)]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Each player may move once per request")
+        return value
+
+
+class TransferOut(BaseModel):
+    id: int
+    gw: int
+    player_out_id: Optional[int]
+    player_in_id: Optional[int]
+    cost_out: Optional[float]
+    cost_in: Optional[float]
+    counted: bool
+    hit_points: int
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+
+class TransferResponse(SquadOut):
+    free_transfers_left: int
+    hit_points: int
+    transfers: List[TransferOut]
+
+
+class TransferLogResponse(BaseModel):
+    league_id: int
+    gw: int
+    player_ids: List[int]
+    transfers: List[TransferOut]
+
+
+class SquadOptimizeRequest(BaseModel):
+    locked: List[int] = []
+    excluded: List[int] = []
+    # Projected points per player id; players not listed use their average recorded points.
+    projections: Dict[int, float] = {}
+
+
+class SquadOptimizeResponse(BaseModel):
+    players: List[PlayerOut]
+    budget_used: float
+    projected_points: float
+
+
 class LineupSetRequest(BaseModel):
     league_id: int
     gw: int
@@ -96,9 +183,34 @@ class LineupResponse(BaseModel):
     lineup_id: int
 
 
+class LineupBatchRequest(BaseModel):
+    entries: List[LineupSetRequest]
+
+    @validator("entries")
+    def validate_batch_size(cls, value: List[LineupSetRequest]) -> List[LineupSetRequest]:
+        if not value:
+            raise ValueError("Batch must include at least one lineup")
+        if len(value) > 200:
+            raise ValueError("Batch may include at most 200 lineups")
+        return value
+
+
+class LineupBatchResult(BaseModel):
+    league_id: int
+    gw: int
+    lineup_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class LineupBatchResponse(BaseModel):
+    results: List[LineupBatchResult]
+
+
 class StandingOut(BaseModel):
+    rank: int
+    user_id: int
     team_name: str
-    points: int
+    points: float
 
 
 class MembershipOut(BaseModel):
@@ -111,7 +223,85 @@ class LeagueCreateResponse(BaseModel):
 
 class StandingsResponse(BaseModel):
     standings: List[StandingOut]
+    next_cursor: Optional[str] = None
 
 
 class MeResponse(UserBase):
     created_at: Optional[datetime] = None
+
+
+class StatLine(BaseModel):
+    player_id: int
+    pass_yards: int = 0
+    pass_tds: int = 0
+    interceptions: int = 0
+    rush_yards: int = 0
+    rush_tds: int = 0
+    receptions: int = 0
+    rec_yards: int = 0
+    rec_tds: int = 0
+    fumbles_lost: int = 0
+    fg_made: int = 0
+    xp_made: int = 0
+    dst_points: int = 0
+
+
+class StatsUploadRequest(BaseModel):
+    gw: int
+    stats: List[StatLine]
+
+
+class StatsUploadResponse(BaseModel):
+    gw: int
+    changed_player_ids: List[int]
+
+
+class IngestResponse(BaseModel):
+    rows: int
+    duplicates: int
+    rejected: int
+    players_created: int
+    players_updated: int
+    stat_lines: int
+    points_changed: int
+    prices_recorded: int
+    batches: int
+    seconds: float
+    rows_per_second: float
+    errors: List[str]
+
+
+class GameweekLockResponse(BaseModel):
+    gw: int
+    lineups_created: int
+
+
+class KickoffIn(BaseModel):
+    team: str
+    kickoff: datetime
+
+    @validator("team")
+    def normalize_team(cls, value: str) -> str:
+        return value.strip().upper()
+
+
+class ScheduleSetRequest(BaseModel):
+    kickoffs: List[KickoffIn]
+
+    @validator("kickoffs")
+    def validate_unique_teams(cls, value: List[KickoffIn]) -> List[KickoffIn]:
+        teams = [kickoff.team for kickoff in value]
+        if len(set(teams)) != len(teams):
+            raise ValueError("Each team plays at most once per gameweek")
+        return value
+
+
+class ScheduleResponse(BaseModel):
+    gw: int
+    kickoffs: List[KickoffIn]
+
+
+class SubstitutionResponse(BaseModel):
+    gw: int
+    substitutions: int
+    lineup_ids: List[int]
@@ -0,0 +1,149 @@
+from decimal import Decimal
+from typing import Dict, Iterable, Mapping, Optional, Set
+
+from sqlalchemy import and_, bindparam, delete, func, insert, select, update
+from sqlalchemy.orm import Session, aliased
+
+from .models import Lineup, LineupScore, LineupSlot, PlayerGameweekStat
+from .player_history import refresh_aggregates
+from .standings import refresh_standings
+
+SCORING_RULES: Dict[str, Decimal] = {
+    "pass_yards": Decimal("0.04"),
+    "pass_tds": Decimal("4"),
+    "interceptions": Decimal("-2"),
+    "rush_yards": Decimal("0.1"),
+    "rush_tds": Decimal("6"),
+    "receptions": Decimal("1"),
+    "rec_yards": Decimal("0.1"),
+    "rec_tds": Decimal("6"),
+    "fumbles_lost": Decimal("-2"),
+    "fg_made": Decimal("3"),
+    "xp_made": Decimal("1"),
+    "dst_points": Decimal("1"),
+}
+
+STAT_FIELDS = tuple(SCORING_RULES)
+
+
+def score_stat_line(stats: Mapping[str, int]) -> Decimal:
+    total = sum((SCORING_RULES[field] * int(stats.get(field) or 0) for field in STAT_FIELDS), Decimal("0"))
+    return total.quantize(Decimal("0.01"))
+
+
+def record_stat_lines(db: Session, gw: int, lines: Iterable[Mapping[str, int]]) -> Set[int]:
+    """Upsert stat lines for a gameweek and return the ids of players whose points changed.
+
+    Lines identical to the stored row are not written, so replaying a feed
+    costs one read per batch and no writes.
+    """
+    incoming = {int(line["player_id"]): line for line in lines}
+    if not incoming:
+        return set()
+    table = PlayerGameweekStat.__table__
+    stored = [table.c[field] for field in STAT_FIELDS] + [table.c.points]
+    existing = {
+        row[0]: tuple(row[1:])
+        for row in db.execute(
+            select(table.c.player_id, *stored).where(table.c.gw == gw, table.c.player_id.in_(list(incoming)))
+        )
+    }
+    changed: Set[int] = set()
+    new_rows = []
+    updates = []
+    for player_id, line in incoming.items():
+        values = {field: int(line.get(field) or 0) for field in STAT_FIELDS}
+        current = existing.get(player_id)
+        if current is not None and current[:-1] == tuple(values.values()):
+            continue
+        points = score_stat_line(values)
+        if current is None:
+            new_rows.append({"player_id": player_id, "gw": gw, "points": points, **values})
+            changed.add(player_id)
+            continue
+        if Decimal(current[-1]) != points:
+            changed.add(player_id)
+        updates.append({"stat_player_id": player_id, "stat_gw": gw, "points": points, **values})
+    if new_rows:
+        db.execute(insert(table), new_rows)
+    if updates:
+        db.execute(
+            update(table).where(table.c.player_id == bindparam("stat_player_id"), table.c.gw == bindparam("stat_gw")),
+            updates,
+        )
+    db.flush()
+    return changed
+
+
+def rescore_lineups(
+    db: Session,
+    gw: int,
+    league_id: Optional[int] = None,
+    player_ids: Optional[Iterable[int]] = None,
+    lineup_ids: Optional[Iterable[int]] = None,
+) -> Set[int]:
+    """Recompute stored totals for a gameweek's lineups with one set-based INSERT ... SELECT.
+
+    Scores are the sum of the starters' points plus the captain's points again,
+    falling back to the vice-captain when the captain has no stat line. When
+    ``player_ids`` is given only lineups starting one of those players are rescored,
+    and when ``lineup_ids`` is given only those lineups are.
+    Returns the ids of the leagues whose standings changed.
+    """
+    selected = select(Lineup.id).where(Lineup.gw == gw)
+    if league_id is not None:
+        selected = selected.where(Lineup.league_id == league_id)
+    if lineup_ids is not None:
+        lineup_ids = list(lineup_ids)
+        if not lineup_ids:
+            return set()
+        selected = selected.where(Lineup.id.in_(lineup_ids))
+    if player_ids is not None:
+        player_ids = list(player_ids)
+        if not player_ids:
+            return set()
+        selected = selected.where(
+            Lineup.id.in_(
+                select(LineupSlot.lineup_id).where(
+                    LineupSlot.player_id.in_(player_ids), LineupSlot.starter.is_(True)
+                )
+            )
+        )
+
+    starter_points = (
+        select(LineupSlot.lineup_id, func.sum(PlayerGameweekStat.points).label("points"))
+        .join(
+            PlayerGameweekStat,
+            and_(PlayerGameweekStat.player_id == LineupSlot.player_id, PlayerGameweekStat.gw == gw),
+        )
+        .where(LineupSlot.starter.is_(True), LineupSlot.lineup_id.in_(selected))
+        .group_by(LineupSlot.lineup_id)
+        .subquery()
+    )
+    captain = aliased(PlayerGameweekStat)
+    vice = aliased(PlayerGameweekStat)
+    scores = (
+        select(
+            Lineup.id,
+            Lineup.user_id,
+            Lineup.league_id,
+            Lineup.gw,
+            func.coalesce(starter_points.c.points, 0) + func.coalesce(captain.points, vice.points, 0),
+        )
+        .outerjoin(starter_points, starter_points.c.lineup_id == Lineup.id)
+        .outerjoin(captain, and_(captain.player_id == Lineup.captain_player_id, captain.gw == gw))
+        .outerjoin(vice, and_(vice.player_id == Lineup.vice_captain_player_id, vice.gw == gw))
+        .where(Lineup.id.in_(selected))
+    )
+    db.execute(delete(LineupScore).where(LineupScore.lineup_id.in_(selected)))
+    db.execute(insert(LineupScore).from_select(["lineup_id", "user_id", "league_id", "gw", "points"], scores))
+    return refresh_standings(db, selected)
+
+
+def apply_stat_lines(db: Session, gw: int, lines: Iterable[Mapping[str, int]]) -> Set[int]:
+    """Record stat lines, rescore only the lineups that start a changed player and refresh their form."""
+    changed = record_stat_lines(db, gw, lines)
+    if changed:
+        rescore_lineups(db, gw, player_ids=changed)
+        refresh_aggregates(db, changed)
+    return changed
@@ -0,0 +1,170 @@
+from decimal import Decimal, InvalidOperation
+from typing import Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, func, insert, literal, or_, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from .auth import AuthUser
+from .models import Lineup, LineupScore, Membership, Squad, Standing, Transfer, User
+
+ORDER = (Standing.total_points.desc(), Standing.tiebreak)
+REVERSE_ORDER = (Standing.total_points, Standing.tiebreak.desc())
+
+
+def add_standing(db: Session, membership: Membership, user: AuthUser) -> Standing:
+    """Create the standings row for a new membership, ranked among existing teams.
+
+    The new team starts on zero: it ranks below every team on more points, and
+    every team below zero (after transfer hits) moves down one place.
+    """
+    higher = db.query(func.count(Standing.id)).filter(
+        Standing.league_id == membership.league_id, Standing.total_points > 0
+    ).scalar()
+    db.execute(
+        update(Standing)
+        .where(Standing.league_id == membership.league_id, Standing.total_points < 0)
+        .values(rank=Standing.rank + 1)
+        .execution_options(synchronize_session=False)
+    )
+    standing = Standing(
+        league_id=membership.league_id,
+        user_id=user.id,
+        team_name=user.name,
+        total_points=Decimal("0"),
+        tiebreak=membership.id,
+        rank=higher + 1,
+    )
+    db.add(standing)
+    mark_changed(db, [membership.league_id])
+    return standing
+
+
+def mark_changed(db: Session, league_ids: Iterable[int]) -> None:
+    """Note leagues whose standings this transaction changed; the live feed pushes them on commit."""
+    db.info.setdefault("standings_changed", set()).update(league_ids)
+
+
+def refresh_standings(db: Session, lineup_ids: Select) -> Set[int]:
+    """Recompute totals for the teams owning ``lineup_ids``, less their transfer hits, and re-rank their leagues.
+
+    Members without a standings row yet, such as teams that joined before
+    standings were stored, get one first.
+    """
+    owners = select(Lineup.league_id, Lineup.user_id).where(Lineup.id.in_(lineup_ids)).distinct()
+    pairs = db.execute(owners).all()
+    if not pairs:
+        return set()
+    has_lineup = (
+        select(Lineup.id)
+        .where(
+            Lineup.id.in_(lineup_ids), Lineup.league_id == Membership.league_id, Lineup.user_id == Membership.user_id
+        )
+        .exists()
+    )
+    has_standing = (
+        select(Standing.id)
+        .where(Standing.league_id == Membership.league_id, Standing.user_id == Membership.user_id)
+        .exists()
+    )
+    db.execute(
+        insert(Standing).from_select(
+            ["league_id", "user_id", "team_name", "total_points", "tiebreak", "rank"],
+            select(Membership.league_id, Membership.user_id, User.name, literal(0), Membership.id, literal(0))
+            .join(User, User.id == Membership.user_id)
+            .where(has_lineup, ~has_standing),
+        )
+    )
+    points = (
+        select(func.coalesce(func.sum(LineupScore.points), 0))
+        .where(LineupScore.league_id == Standing.league_id, LineupScore.user_id == Standing.user_id)
+        .scalar_subquery()
+    )
+    hits = (
+        select(func.coalesce(func.sum(Transfer.hit_points), 0))
+        .join(Squad, Squad.id == Transfer.squad_id)
+        .where(Squad.league_id == Standing.league_id, Squad.user_id == Standing.user_id)
+        .scalar_subquery()
+    )
+    owned = (
+        select(Lineup.id)
+        .where(Lineup.id.in_(lineup_ids), Lineup.league_id == Standing.league_id, Lineup.user_id == Standing.user_id)
+        .exists()
+    )
+    db.execute(
+        update(Standing).where(owned).values(total_points=points - hits).execution_options(synchronize_session=False)
+    )
+    league_ids = {league_id for league_id, _ in pairs}
+    rerank(db, league_ids)
+    return league_ids
+
+
+def rerank(db: Session, league_ids: Iterable[int]) -> None:
+    """Assign competition ranks (1, 2, 2, 4) in one index-ordered pass per league.
+
+    Only rows whose rank changed are written, so a correction that moves one
+    team a few places touches a handful of rows.
+    """
+    league_ids = list(league_ids)
+    mark_changed(db, league_ids)
+    for league_id in league_ids:
+        rows = db.execute(
+            select(Standing.id, Standing.total_points, Standing.rank)
+            .where(Standing.league_id == league_id)
+            .order_by(*ORDER)
+        ).all()
+        changes = []
+        previous = None
+        rank = 0
+        for position, (standing_id, points, current_rank) in enumerate(rows, start=1):
+            if points != previous:
+                rank = position
+                previous = points
+            if current_rank != rank:
+                changes.append({"id": standing_id, "rank": rank})
+        if changes:
+            db.execute(update(Standing), changes)
+
+
+def encode_cursor(standing: Standing) -> str:
+    return f"{standing.total_points}:{standing.tiebreak}"
+
+
+def decode_cursor(cursor: str) -> Tuple[Decimal, int]:
+    points, tiebreak = cursor.split(":")
+    try:
+        return Decimal(points), int(tiebreak)
+    except InvalidOperation:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def after_cursor(points: Decimal, tiebreak: int):
+    return or_(
+        Standing.total_points < points,
+        and_(Standing.total_points == points, Standing.tiebreak > tiebreak),
+    )
+
+
+def before_cursor(points: Decimal, tiebreak: int):
+    return or_(
+        Standing.total_points > points,
+        and_(Standing.total_points == points, Standing.tiebreak < tiebreak),
+    )
+
+
+def page(db: Session, league_id: int, limit: int, after: Optional[str] = None) -> List[Standing]:
+    query = db.query(Standing).filter(Standing.league_id == league_id)
+    if after:
+        query = query.filter(after_cursor(*decode_cursor(after)))
+    return query.order_by(*ORDER).limit(limit).all()
+
+
+def around(db: Session, league_id: int, user_id: int, radius: int) -> List[Standing]:
+    """Return the caller's row plus up to ``radius`` teams on either side of it."""
+    me = db.query(Standing).filter(Standing.league_id == league_id, Standing.user_id == user_id).first()
+    if me is None:
+        return []
+    base = db.query(Standing).filter(Standing.league_id == league_id)
+    above = base.filter(before_cursor(me.total_points, me.tiebreak)).order_by(*REVERSE_ORDER).limit(radius).all()
+    below = base.filter(after_cursor(me.total_points, me.tiebreak)).order_by(*ORDER).limit(radius).all()
+    return list(reversed(above)) + [me] + below
@@ -0,0 +1,167 @@
+import asyncio
+import json
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .broker import Broker, InProcessBroker, Subscription
+from .db import AsyncSessionLocal
+from .models import Standing
+from .standings import ORDER
+
+# user_id -> (rank, tiebreak, team_name, points)
+LeagueRows = Dict[int, Tuple[int, int, str, float]]
+
+
+def channel(league_id: int) -> str:
+    return f"standings:{league_id}"
+
+
+def load_rows(db: Session, league_ids: Iterable[int]) -> Dict[int, LeagueRows]:
+    """Current standings of ``league_ids`` in one query."""
+    rows: Dict[int, LeagueRows] = {league_id: {} for league_id in league_ids}
+    if not rows:
+        return rows
+    result = db.execute(
+        select(Standing.league_id, Standing.user_id, Standing.rank, Standing.tiebreak, Standing.team_name, Standing.total_points)
+        .where(Standing.league_id.in_(list(rows)))
+        .order_by(Standing.league_id, *ORDER)
+    )
+    for league_id, user_id, rank, tiebreak, team_name, points in result:
+        rows[league_id][user_id] = (rank, tiebreak, team_name, float(points))
+    return rows
+
+
+def entry(user_id: int, row: Tuple[int, int, str, float]) -> dict:
+    rank, _, team_name, points = row
+    return {"rank": rank, "user_id": user_id, "team_name": team_name, "points": points}
+
+
+def encode(message: dict) -> str:
+    return json.dumps(message, separators=(",", ":"))
+
+
+def snapshot_message(league_id: int, rows: LeagueRows) -> str:
+    ordered = sorted(rows.items(), key=lambda item: (item[1][0], item[1][1]))
+    return encode({"type": "snapshot", "league_id": league_id, "standings": [entry(*item) for item in ordered]})
+
+
+def diff_rows(before: LeagueRows, after: LeagueRows) -> Tuple[List[dict], List[int]]:
+    """Rows that are new or whose rank, name or points moved, and the user ids that left."""
+    changed = [
+        entry(user_id, row)
+        for user_id, row in after.items()
+        if user_id not in before or _visible(before[user_id]) != _visible(row)
+    ]
+    removed = [user_id for user_id in before if user_id not in after]
+    changed.sort(key=lambda item: item["rank"])
+    return changed, removed
+
+
+def _visible(row: Tuple[int, int, str, float]) -> Tuple[int, str, float]:
+    rank, _, team_name, points = row
+    return rank, team_name, points
+
+
+class StandingsFeed:
+    """Pushes standings changes to the subscribers of each league.
+
+    The feed keeps the last standings it sent for every league that has a
+    subscriber. When a commit changes a league's standings, the league's
+    rows are reloaded (one query for every league changed since the last
+    push), diffed against that copy once and published once; the broker
+    fans the serialized message out. New subscribers are sent the held copy
+    as a snapshot without touching the database.
+    """
+
+    def __init__(self, broker: Broker, session_factory: Callable[[], AsyncSession] = AsyncSessionLocal) -> None:
+        self.broker = broker
+        self.session_factory = session_factory
+        self.diffs_published = 0
+        self._rows: Dict[int, LeagueRows] = {}
+        self._snapshots: Dict[int, str] = {}
+        self._pending: Set[int] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def subscribe(self, league_id: int, db: AsyncSession) -> Tuple[Subscription, str]:
+        """Subscribe to ``league_id``; returns the subscription and the snapshot to send first."""
+        self._loop = asyncio.get_running_loop()
+        subscription = self.broker.subscribe(channel(league_id))
+        if league_id not in self._rows:
+            loaded = await db.run_sync(load_rows, [league_id])
+            self._rows.setdefault(league_id, loaded[league_id])
+        snapshot = self._snapshots.get(league_id)
+        if snapshot is None:
+            snapshot = self._snapshots[league_id] = snapshot_message(league_id, self._rows[league_id])
+        return subscription, snapshot
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.broker.unsubscribe(subscription)
+        self._forget_unwatched()
+
+    def notify(self, league_ids: Iterable[int]) -> None:
+        """Schedule a push for the watched leagues among ``league_ids``; safe to call from any thread."""
+        loop = self._loop
+        watched = [league_id for league_id in league_ids if league_id in self._rows]
+        if not watched or loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._schedule, watched)
+
+    def publish_changes(self, current: Mapping[int, LeagueRows]) -> int:
+        """Diff each league in ``current`` against the rows last sent and publish it; returns diffs published."""
+        published = 0
+        for league_id, rows in current.items():
+            before = self._rows.get(league_id)
+            if before is None:
+                continue
+            changed, removed = diff_rows(before, rows)
+            self._rows[league_id] = rows
+            if not changed and not removed:
+                continue
+            self._snapshots.pop(league_id, None)
+            message = {"type": "diff", "league_id": league_id, "changed": changed, "removed": removed}
+            self.broker.publish(channel(league_id), encode(message))
+            published += 1
+        self.diffs_published += published
+        return published
+
+    async def flush(self) -> None:
+        """Reload and publish every league changed since the last push."""
+        while self._pending:
+            league_ids = [league_id for league_id in self._pending if league_id in self._rows]
+            self._pending.clear()
+            if not league_ids:
+                break
+            async with self.session_factory() as db:
+                current = await db.run_sync(load_rows, league_ids)
+            self.publish_changes(current)
+        self._forget_unwatched()
+
+    def _schedule(self, league_ids: List[int]) -> None:
+        self._pending.update(league_ids)
+        if self._flush_task is None or self._flush_task.done():
+            # Commits that land while a push is running are folded into its next round.
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+
+    def _forget_unwatched(self) -> None:
+        for league_id in [league_id for league_id in self._rows if not self.broker.subscriber_count(channel(league_id))]:
+            del self._rows[league_id]
+            self._snapshots.pop(league_id, None)
+
+
+standings_feed = StandingsFeed(InProcessBroker())
+
+
+@event.listens_for(Session, "after_commit")
+def _push_on_commit(session: Session) -> None:
+    league_ids = session.info.pop("standings_changed", None)
+    if league_ids:
+        standings_feed.notify(league_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop("standings_changed", None)
@@ -0,0 +1,4 @@
+import os
+
+# Suites reuse user ids and the test client's address across tests; tests of the limiter build their own.
+os.environ.setdefault("RATE_LIMITS_ENABLED", "0")
@@ -12,6 +12,8 @@ if str(ROOT) not in sys.path:
 
 os.environ["DATABASE_URL"] = "sqlite:///./test_api.db"
 os.environ["JWT_SECRET"] = "testsecret"
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ["ADMIN_TOKEN"] = "testadmin"
 
 from backend.app import app  # noqa: E402
 from backend.db import Base, SessionLocal, engine  # noqa: E402
@@ -92,6 +94,25 @@ async def run_flow():
         assert isinstance(standings, list)
         assert standings[0]["points"] == 0
 
+        stats_resp = await client.post(
+            "/api/admin/stats",
+            json={"gw": 1, "stats": [{"player_id": starters[0], "rush_tds": 1}]},
+            headers={"X-Admin-Token": "testadmin"},
+        )
+        assert stats_resp.status_code == 200
+        assert stats_resp.json()["changed_player_ids"] == [starters[0]]
+
+        standings_resp = await client.get(f"/api/standings/{league_id}", headers=auth_headers)
+        assert standings_resp.json()["standings"][0]["points"] == 12
+
+        for expected in (1, 0):
+            lock_resp = await client.post("/api/admin/gameweeks/2/lock", headers={"X-Admin-Token": "testadmin"})
+            assert lock_resp.status_code == 200
+            assert lock_resp.json() == {"gw": 2, "lineups_created": expected}
+        subs_resp = await client.post("/api/admin/gameweeks/2/substitutions", headers={"X-Admin-Token": "testadmin"})
+        assert subs_resp.status_code == 200
+        assert subs_resp.json() == {"gw": 2, "substitutions": 0, "lineup_ids": []}
+
 
 def test_happy_path():
     asyncio.run(run_flow())
@@ -0,0 +1,200 @@
+import asyncio
+import os
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import bcrypt
+import jwt
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ["DATABASE_URL"] = "sqlite:///./test_api.db"
+os.environ["JWT_SECRET"] = "testsecret"
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+from backend.app import app  # noqa: E402
+from backend.auth import (  # noqa: E402
+    HasherBusy,
+    PasswordHasher,
+    TokenVersions,
+    VerifiedTokens,
+    create_access_token,
+    password_hash_rounds,
+    token_versions,
+)
+from backend.db import Base, SessionLocal, async_engine, engine  # noqa: E402
+from backend.models import User  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def reset_db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    token_versions.clear()
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def statements():
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def register(client):
+    response = await client.post(
+        "/api/auth/register", json={"name": "Alice", "email": "alice@example.com", "password": "password123"}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_claims_token_skips_user_lookup(statements):
+    async def flow():
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            token = (await register(client))["token"]
+            statements.clear()
+            response = await client.post("/api/leagues/create", json={"name": "Alpha"}, headers=bearer(token))
+            assert response.status_code == 200
+            assert not any("FROM users" in statement for statement in statements)
+
+    run(flow())
+
+
+def test_logout_revokes_existing_tokens():
+    async def flow():
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            user = await register(client)
+            token = user["token"]
+            assert (await client.get("/api/leagues/mine", headers=bearer(token))).status_code == 200
+            assert (await client.post("/api/auth/logout", headers=bearer(token))).status_code == 204
+            assert (await client.get("/api/leagues/mine", headers=bearer(token))).status_code == 401
+
+            # Tokens without claims go through the database and are rejected there too.
+            legacy = create_access_token({"sub": user["id"]})
+            assert (await client.get("/api/leagues/mine", headers=bearer(legacy))).status_code == 401
+
+    run(flow())
+
+
+def test_password_change_issues_new_token():
+    async def flow():
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            old_token = (await register(client))["token"]
+            changed = await client.post(
+                "/api/auth/password",
+                json={"current_password": "password123", "new_password": "newpassword456"},
+                headers=bearer(old_token),
+            )
+            assert changed.status_code == 200
+            new_token = changed.json()["token"]
+            assert (await client.get("/api/auth/me", headers=bearer(old_token))).status_code == 401
+            assert (await client.get("/api/auth/me", headers=bearer(new_token))).status_code == 200
+            login = await client.post("/api/auth/login", json={"email": "alice@example.com", "password": "newpassword456"})
+            assert login.status_code == 200
+
+    run(flow())
+
+
+def test_token_version_cache_is_bounded_and_expires(monkeypatch):
+    cache = TokenVersions(maxsize=2, ttl=60)
+    cache.record(1, 3)
+    cache.record(2, 1)
+    assert cache.get(1) == 3
+    cache.record(3, 1)
+    # User 2 was least recently used and has been evicted.
+    assert cache.get(2) is None
+    cache.record(1, 2)
+    assert cache.get(1) == 3
+    monkeypatch.setattr("backend.auth.time", SimpleNamespace(monotonic=lambda: 2**40))
+    assert cache.get(1) is None
+
+
+def test_revocations_outlive_the_cache():
+    async def flow():
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            token = (await register(client))["token"]
+            assert (await client.post("/api/auth/logout", headers=bearer(token))).status_code == 204
+            # A restart, an eviction or another worker: this process no longer knows the new version.
+            token_versions.clear()
+            assert (await client.get("/api/leagues/mine", headers=bearer(token))).status_code == 401
+            assert token_versions.get(1) == 1
+
+    run(flow())
+
+
+def test_verified_tokens_are_bounded_and_still_expire(monkeypatch):
+    cache = VerifiedTokens(maxsize=2)
+    tokens = [create_access_token({"sub": user_id}) for user_id in (1, 2, 3)]
+    assert [cache.decode(token)["sub"] for token in tokens] == [1, 2, 3]
+    assert len(cache) == 2
+    # A cached token is refused once its expiry passes, as PyJWT would refuse it.
+    monkeypatch.setattr("backend.auth.time", SimpleNamespace(time=lambda: 2**40))
+    with pytest.raises(jwt.ExpiredSignatureError):
+        cache.decode(tokens[2])
+
+
+def test_login_rehashes_outdated_cost():
+    db = SessionLocal()
+    try:
+        outdated = bcrypt.hashpw(b"password123", bcrypt.gensalt(5)).decode("utf-8")
+        db.add(User(name="Alice", email="alice@example.com", password_hash=outdated))
+        db.commit()
+    finally:
+        db.close()
+
+    async def flow():
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            login = await client.post("/api/auth/login", json={"email": "alice@example.com", "password": "password123"})
+            assert login.status_code == 200
+
+    run(flow())
+    db = SessionLocal()
+    try:
+        assert password_hash_rounds(db.query(User).one().password_hash) == 4
+    finally:
+        db.close()
+
+
+def test_saturated_hasher_rejects_immediately():
+    hasher = PasswordHasher(workers=1, queue_size=0)
+    release = threading.Event()
+
+    async def flow():
+        blocked = asyncio.ensure_future(hasher.run(release.wait))
+        await asyncio.sleep(0)
+        assert hasher.saturated and hasher.pending == 1
+        with pytest.raises(HasherBusy):
+            await hasher.run(lambda: None)
+        release.set()
+        await blocked
+        assert await hasher.run(lambda: 42) == 42
+        assert not hasher.saturated and hasher.pending == 0
+
+    run(flow())
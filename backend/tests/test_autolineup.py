@@ -0,0 +1,131 @@
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.autolineup import lock_gameweek, substitute_zero_scorers  # noqa: E402
+from backend.db import Base  # noqa: E402
+from backend.models import League, Lineup, LineupScore, LineupSlot, Player, PlayerGameweekStat, Squad, SquadPlayer, User  # noqa: E402
+from backend.scoring import rescore_lineups  # noqa: E402
+
+# 15 players: 2 QB, 4 RB, 5 WR, 2 TE, K, DST.
+SQUAD = ["QB"] * 2 + ["RB"] * 4 + ["WR"] * 5 + ["TE"] * 2 + ["K", "DST"]
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///./test_autolineup.db", connect_args={"check_same_thread": False})
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = Session(bind=engine)
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def squads(session):
+    """Alice and Bob share one 15-player squad in a league; returns player ids by squad order."""
+    players = [Player(name=f"P{i}", position=position, team="X", cost=Decimal("6.0")) for i, position in enumerate(SQUAD)]
+    alice = User(name="Alice", email="a@example.com", password_hash="x")
+    bob = User(name="Bob", email="b@example.com", password_hash="x")
+    session.add_all(players + [alice, bob])
+    session.flush()
+    league = League(name="L", created_by_user_id=alice.id)
+    session.add(league)
+    session.flush()
+    for user in (alice, bob):
+        squad = Squad(user_id=user.id, league_id=league.id, budget_used=Decimal("90.0"))
+        session.add(squad)
+        session.flush()
+        session.add_all([SquadPlayer(squad_id=squad.id, player_id=player.id) for player in players])
+    # Gameweek 0 stats make the projections: later players in squad order project higher.
+    session.add_all([PlayerGameweekStat(player_id=player.id, gw=0, points=index) for index, player in enumerate(players)])
+    session.flush()
+    return [player.id for player in players], alice, bob, league
+
+
+def starters_of(db, lineup):
+    return {player_id for (player_id,) in db.query(LineupSlot.player_id).filter(LineupSlot.lineup_id == lineup.id)}
+
+
+def test_lock_picks_best_lineup_for_squads_without_one(session, squads):
+    ids, alice, bob, league = squads
+    mine = Lineup(user_id=bob.id, league_id=league.id, gw=2, captain_player_id=ids[0], vice_captain_player_id=ids[2])
+    session.add(mine)
+    session.flush()
+
+    assert lock_gameweek(session, 2) == 1
+    lineup = session.query(Lineup).filter(Lineup.user_id == alice.id, Lineup.gw == 2).one()
+    # Best QB, top two RBs, top three WRs, best TE, K and DST.
+    expected = {ids[1], ids[4], ids[5], ids[8], ids[9], ids[10], ids[12], ids[13], ids[14]}
+    assert starters_of(session, lineup) == expected
+    assert (lineup.captain_player_id, lineup.vice_captain_player_id) == (ids[14], ids[13])
+    assert session.query(LineupSlot).filter(LineupSlot.lineup_id == mine.id).count() == 0
+    assert lock_gameweek(session, 2) == 0
+
+
+def test_lineups_locked_after_stats_are_scored(session, squads):
+    ids = squads[0]
+    session.add_all([PlayerGameweekStat(player_id=player_id, gw=1, points=Decimal("2")) for player_id in ids])
+    session.flush()
+
+    assert lock_gameweek(session, 1) == 2
+    # Nine starters with two points each, the captain's counted twice.
+    assert [points for (points,) in session.query(LineupScore.points)] == [Decimal("20")] * 2
+
+
+def test_lock_fills_unfillable_slots_with_best_remaining(session, squads):
+    ids = squads[0]
+    kicker = session.query(SquadPlayer).filter(SquadPlayer.player_id == ids[13]).first()
+    session.delete(kicker)
+    session.flush()
+
+    lock_gameweek(session, 1)
+
+    lineup = session.query(Lineup).filter(Lineup.user_id == kicker.squad.user_id).one()
+    # No kicker: the free slot goes to the best player left over, the second TE.
+    assert starters_of(session, lineup) == {ids[1], ids[4], ids[5], ids[8], ids[9], ids[10], ids[11], ids[12], ids[14]}
+
+
+def test_zero_scoring_starters_are_replaced_from_the_bench(session, squads):
+    ids, alice, bob, league = squads
+    # Bob starts the nine the lock will pick for Alice but captains the best WR with an RB as vice.
+    bobs = Lineup(user_id=bob.id, league_id=league.id, gw=1, captain_player_id=ids[10], vice_captain_player_id=ids[5])
+    session.add(bobs)
+    session.flush()
+    nine = [ids[1], ids[4], ids[5], ids[8], ids[9], ids[10], ids[12], ids[13], ids[14]]
+    session.add_all([LineupSlot(lineup_id=bobs.id, player_id=player_id) for player_id in nine])
+    lock_gameweek(session, 1)
+    lineup = session.query(Lineup).filter(Lineup.user_id == alice.id).one()
+    captain, vice = lineup.captain_player_id, lineup.vice_captain_player_id
+    # The captain (DST) and the best WR score nothing; a benched WR scored, the K has no bench cover.
+    points = {player_id: Decimal("5") for player_id in starters_of(session, lineup)}
+    points.update({captain: Decimal("0"), ids[10]: Decimal("0"), ids[7]: Decimal("8"), ids[13]: Decimal("0")})
+    session.add_all([PlayerGameweekStat(player_id=player_id, gw=1, points=value) for player_id, value in points.items()])
+    session.flush()
+    rescore_lineups(session, 1)
+
+    summary = substitute_zero_scorers(session, 1)
+
+    assert summary.substitutions == 2 and summary.lineup_ids == {lineup.id, bobs.id}
+    session.refresh(lineup)
+    session.refresh(bobs)
+    assert ids[10] not in starters_of(session, lineup) and ids[7] in starters_of(session, lineup)
+    # Captain had no cover at DST, so keeps the armband; vice was the K with no cover either.
+    assert (lineup.captain_player_id, lineup.vice_captain_player_id) == (captain, vice)
+    # Bob's captain went off: the vice takes the armband and the substitute becomes vice.
+    assert (bobs.captain_player_id, bobs.vice_captain_player_id) == (ids[5], ids[7])
+    scores = dict(session.query(LineupScore.lineup_id, LineupScore.points))
+    assert scores[lineup.id] == Decimal("5") * 6 + Decimal("8")
+    assert scores[bobs.id] == Decimal("5") * 6 + Decimal("8") + Decimal("5")
+    assert substitute_zero_scorers(session, 1).substitutions == 0
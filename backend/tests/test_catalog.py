@@ -0,0 +1,128 @@
+import asyncio
+import os
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ["DATABASE_URL"] = "sqlite:///./test_api.db"
+os.environ["JWT_SECRET"] = "testsecret"
+
+from backend.app import app  # noqa: E402
+from backend.auth import create_access_token  # noqa: E402
+from backend.catalog import player_catalog  # noqa: E402
+from backend.db import Base, SessionLocal, engine  # noqa: E402
+from backend.models import Player, User  # noqa: E402
+from backend.seed_players import seed_players  # noqa: E402
+
+
+@pytest.fixture
+def token():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        seed_players(db)
+        user = User(name="Alice", email="alice@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        yield create_access_token({"sub": user.id})
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def get_players(token, etag=None, params=None):
+    async def call():
+        headers = {"Authorization": f"Bearer {token}"}
+        if etag:
+            headers["If-None-Match"] = etag
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/players", headers=headers, params=params)
+
+    return asyncio.run(call())
+
+
+def test_etag_and_not_modified(token):
+    first = get_players(token)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert etag.startswith('"')
+
+    cached = get_players(token, etag=etag)
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+
+def test_player_change_bumps_version(token):
+    first = get_players(token)
+    version = player_catalog.version
+    db = SessionLocal()
+    try:
+        player = db.query(Player).first()
+        player.cost = Decimal("1.0")
+        db.commit()
+    finally:
+        db.close()
+    assert player_catalog.version == version + 1
+
+    second = get_players(token, etag=first.headers["etag"])
+    assert second.status_code == 200
+    assert second.headers["etag"] != first.headers["etag"]
+    assert 1.0 in [player["cost"] for player in second.json()]
+
+
+def test_filtered_search(token):
+    response = get_players(token, params={"position": ["qb", "K"], "min_cost": "4.5", "max_cost": "11", "sort": "cost"})
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+    players = response.json()
+    assert {player["position"] for player in players} == {"QB", "K"}
+    assert [player["cost"] for player in players] == sorted(player["cost"] for player in players)
+    assert all(4.5 <= player["cost"] <= 11 for player in players)
+
+    by_prefix = get_players(token, params={"q": "just", "team": ["BAL", "LAC"]}).json()
+    assert sorted(player["name"] for player in by_prefix) == ["Justin Herbert", "Justin Tucker"]
+
+
+def test_cursor_pagination(token):
+    everything = get_players(token, params={"sort": "name"}).json()
+    seen = []
+    after = None
+    while True:
+        params = {"sort": "name", "limit": 10}
+        if after:
+            params["after"] = after
+        page = get_players(token, params=params)
+        seen.extend(player["name"] for player in page.json())
+        after = page.headers.get("x-next-cursor")
+        if not after:
+            break
+    assert seen == [player["name"] for player in everything]
+
+    assert get_players(token, params={"sort": "salary"}).status_code == 400
+
+
+def test_cursor_pagination_across_positions_by_cost(token):
+    params = {"position": ["RB", "WR", "rb"], "sort": "-cost"}
+    everything = get_players(token, params=params).json()
+    assert {player["position"] for player in everything} == {"RB", "WR"}
+    assert len({player["id"] for player in everything}) == len(everything)
+    assert [player["cost"] for player in everything] == sorted((player["cost"] for player in everything), reverse=True)
+
+    seen = []
+    after = None
+    while True:
+        page = get_players(token, params={**params, "limit": 4, **({"after": after} if after else {})})
+        seen.extend(player["id"] for player in page.json())
+        after = page.headers.get("x-next-cursor")
+        if not after:
+            break
+    assert seen == [player["id"] for player in everything]
@@ -0,0 +1,69 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.db import async_url, make_async_engine, make_engine, sqlite_file_path  # noqa: E402
+
+
+def test_sqlite_file_path():
+    assert sqlite_file_path("sqlite:////var/data/db.sqlite3") == "/var/data/db.sqlite3"
+    assert sqlite_file_path("sqlite:///./dev.db") == "./dev.db"
+    assert sqlite_file_path("sqlite://") is None
+    assert sqlite_file_path("sqlite:///:memory:") is None
+    assert sqlite_file_path("postgresql://localhost/gridcap") is None
+    assert sqlite_file_path("sqlite+aiosqlite:///./dev.db") == "./dev.db"
+
+
+def test_async_url():
+    assert async_url("sqlite:///./dev.db") == "sqlite+aiosqlite:///./dev.db"
+    assert async_url("sqlite+pysqlite:///./dev.db") == "sqlite+aiosqlite:///./dev.db"
+    assert async_url("postgresql+asyncpg://localhost/gridcap") == "postgresql+asyncpg://localhost/gridcap"
+
+
+def test_async_engine_uses_sqlite_profile(tmp_path):
+    engine = make_async_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+
+    async def journal_mode():
+        async with engine.connect() as conn:
+            mode = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+        await engine.dispose()
+        return mode
+
+    assert asyncio.run(journal_mode()) == "wal"
+
+
+def test_sqlite_profile_pragmas(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+    engine.dispose()
+
+
+def test_writer_uses_single_immediate_connection(tmp_path):
+    url = f"sqlite:///{tmp_path / 'writer.db'}"
+    writer = make_engine(url, writer=True)
+    reader = make_engine(url)
+    assert writer.pool.size() == 1
+    with writer.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+    with writer.begin() as conn:
+        conn.execute(text("SELECT 1"))
+        # BEGIN IMMEDIATE holds the write lock even before the first write,
+        # while WAL readers carry on.
+        with reader.connect() as other:
+            other.exec_driver_sql("PRAGMA busy_timeout=0")
+            assert other.execute(text("SELECT count(*) FROM t")).scalar() == 0
+            with pytest.raises(OperationalError, match="locked"):
+                other.execute(text("INSERT INTO t DEFAULT VALUES"))
+    writer.dispose()
+    reader.dispose()
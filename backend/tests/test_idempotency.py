@@ -0,0 +1,107 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ["DATABASE_URL"] = "sqlite:///./test_api.db"
+os.environ["JWT_SECRET"] = "testsecret"
+
+from backend.app import app  # noqa: E402
+from backend.auth import create_user_token  # noqa: E402
+from backend.db import Base, SessionLocal, async_engine, async_write_engine, engine  # noqa: E402
+from backend.idempotency import IdempotencyStore, StoredResponse, idempotency_store  # noqa: E402
+from backend.models import League, User  # noqa: E402
+from backend.querycount import QueryCounter  # noqa: E402
+
+
+@pytest.fixture
+def token():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(name="Alice", email="alice@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        idempotency_store.clear()
+        yield create_user_token(user.id, user.name, user.token_version)
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def create_leagues(token, *requests):
+    """POST each (name, Idempotency-Key) to /api/leagues/create at once; returns responses and SQL statements run."""
+
+    async def call():
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            with QueryCounter(async_engine, async_write_engine) as counter:
+                responses = await asyncio.gather(
+                    *(
+                        client.post(
+                            "/api/leagues/create",
+                            json={"name": name},
+                            headers={"Authorization": f"Bearer {token}", **({"Idempotency-Key": key} if key else {})},
+                        )
+                        for name, key in requests
+                    )
+                )
+            return responses, counter.count
+
+    return asyncio.run(call())
+
+
+def league_count():
+    with SessionLocal() as db:
+        return db.query(League).count()
+
+
+def test_resends_replay_the_first_response_without_sql(token):
+    (first,), _ = create_leagues(token, ("Office", "k1"))
+    (again,), statements = create_leagues(token, ("Office", "k1"))
+    assert (again.status_code, again.json()) == (200, first.json())
+    assert again.headers["Idempotent-Replayed"] == "true" and "Idempotent-Replayed" not in first.headers
+    assert statements == 0
+    assert league_count() == 1
+
+    (reused,), _ = create_leagues(token, ("Other", "k1"))
+    assert reused.status_code == 422
+    create_leagues(token, ("Office", None), ("Office", None))
+    assert league_count() == 3
+    assert idempotency_store.replayed == 1
+
+
+def test_concurrent_duplicates_run_once(token):
+    responses, _ = create_leagues(token, *[("Office", "k2")] * 4)
+    assert {response.json()["league_id"] for response in responses} == {1}
+    assert sum("Idempotent-Replayed" in response.headers for response in responses) == 3
+    assert league_count() == 1
+
+
+def test_store_is_bounded_expires_and_forgets_server_errors():
+    store = IdempotencyStore(maxsize=2, ttl=60)
+    ok = StoredResponse(200, [], b"{}")
+    for name in (b"a", b"b", b"c"):
+        entry, owner = store.claim((b"auth", "POST", "/x", name), b"body")
+        assert owner
+        store.finish((b"auth", "POST", "/x", name), entry, ok)
+    assert len(store) == 2
+    assert store.claim((b"auth", "POST", "/x", b"c"), b"body")[1] is False
+    assert store.claim((b"auth", "POST", "/x", b"a"), b"body")[1] is True
+
+    failed, _ = store.claim((b"auth", "POST", "/x", b"d"), b"body")
+    store.finish((b"auth", "POST", "/x", b"d"), failed, StoredResponse(503, [], b""))
+    assert store.claim((b"auth", "POST", "/x", b"d"), b"body")[1] is True
+
+    expiring = IdempotencyStore(ttl=0)
+    entry, _ = expiring.claim((b"auth", "POST", "/x", b"e"), b"body")
+    expiring.finish((b"auth", "POST", "/x", b"e"), entry, ok)
+    assert expiring.claim((b"auth", "POST", "/x", b"e"), b"body")[1] is True
@@ -0,0 +1,115 @@
+import asyncio
+import io
+import json
+import os
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ["DATABASE_URL"] = "sqlite:///./test_api.db"
+os.environ["JWT_SECRET"] = "testsecret"
+os.environ["ADMIN_TOKEN"] = "testadmin"
+
+from backend.app import app  # noqa: E402
+from backend.db import Base  # noqa: E402
+from backend.db import engine as api_engine  # noqa: E402
+from backend.ingest import ingest_lines  # noqa: E402
+from backend.models import Player, PlayerGameweekStat  # noqa: E402
+
+FEED = """external_id,name,position,team,cost,gw,pass_yards,pass_tds,rush_yards,rush_tds
+00-01,Patrick Mahomes,qb,kc,12.0,1,300,3,20,0
+00-02,Travis Kelce,TE,KC,9.5,,,,,
+00-03,Isiah Pacheco,RB,KC,6.5,1,0,0,80,1
+00-01,Patrick Mahomes,QB,KC,12.0,1,300,3,20,0
+"""
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite:///./test_ingest.db", connect_args={"check_same_thread": False})
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield engine
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def run(engine, text, fmt="csv", batch_size=2):
+    return ingest_lines(lambda: Session(bind=engine), io.StringIO(text), fmt, batch_size)
+
+
+def test_feed_creates_players_and_stats_and_replays_as_a_no_op(engine):
+    report = run(engine, FEED, batch_size=10)
+    assert (report.rows, report.duplicates, report.rejected) == (4, 1, 0)
+    assert (report.players_created, report.stat_lines, report.points_changed) == (3, 2, 2)
+    with Session(bind=engine) as db:
+        mahomes = db.query(Player).filter(Player.external_id == "00-01").one()
+        assert (mahomes.position, mahomes.team, mahomes.name_key) == ("QB", "KC", "patrick mahomes")
+        stat = db.query(PlayerGameweekStat).filter(PlayerGameweekStat.player_id == mahomes.id).one()
+        assert stat.points == Decimal("26.00")
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    again = run(engine, FEED)
+    assert (again.players_created, again.players_updated, again.points_changed) == (0, 0, 0)
+    assert not [sql for sql in statements if not sql.lstrip().upper().startswith("SELECT")]
+    with Session(bind=engine) as db:
+        assert db.query(Player).count() == 3 and db.query(PlayerGameweekStat).count() == 2
+
+
+def test_price_updates_corrections_and_rejects(engine):
+    run(engine, FEED)
+    lines = [
+        {"external_id": "00-02", "cost": "10.25"},
+        {"external_id": "00-03", "gw": 1, "rush_yards": 100, "rush_tds": 1},
+        {"external_id": "00-09", "gw": 1, "rush_yards": 5},
+        {"external_id": "00-10", "name": "Rookie"},
+        {"name": "No id"},
+    ]
+    text = "\n".join(json.dumps(line) for line in lines) + "\n{not json\n"
+    report = run(engine, text, fmt="ndjson")
+    assert (report.rows, report.players_updated, report.points_changed) == (6, 1, 1)
+    assert report.rejected == 4
+    assert any("00-09" in message for message in report.errors)
+    with Session(bind=engine) as db:
+        assert db.query(Player.cost).filter(Player.external_id == "00-02").scalar() == Decimal("10.25")
+        pacheco = db.query(Player.id).filter(Player.external_id == "00-03").scalar()
+        assert db.query(PlayerGameweekStat.points).filter(PlayerGameweekStat.player_id == pacheco).scalar() == Decimal("16")
+
+
+def test_admin_endpoint_streams_the_request_body():
+    Base.metadata.drop_all(bind=api_engine)
+    Base.metadata.create_all(bind=api_engine)
+
+    async def call():
+        async def body():
+            for start in range(0, len(FEED), 17):
+                yield FEED[start : start + 17].encode()
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(
+                "/api/admin/ingest?format=csv&batch_size=2", content=body(), headers={"X-Admin-Token": "testadmin"}
+            )
+
+    try:
+        response = asyncio.run(call())
+        assert response.status_code == 200, response.text
+        body = response.json()
+        # The repeated Mahomes line falls in the second batch: checked again, left unwritten.
+        assert (body["rows"], body["players_created"], body["batches"]) == (4, 3, 2)
+        assert (body["stat_lines"], body["points_changed"], body["duplicates"]) == (3, 2, 0)
+        assert body["rows_per_second"] > 0
+    finally:
+        Base.metadata.drop_all(bind=api_engine)
@@ -0,0 +1,145 @@
+import asyncio
+import os
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ["DATABASE_URL"] = "sqlite:///./test_api.db"
+os.environ["JWT_SECRET"] = "testsecret"
+
+from backend.app import app  # noqa: E402
+from backend.auth import create_access_token  # noqa: E402
+from backend.db import Base, SessionLocal, engine  # noqa: E402
+from backend.models import League, Lineup, LineupScore, LineupSlot, Membership, Player, Squad, SquadPlayer, User  # noqa: E402
+from backend.scoring import apply_stat_lines  # noqa: E402
+from backend.seed_players import seed_players  # noqa: E402
+
+
+@pytest.fixture
+def setup():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        seed_players(db)
+        user = User(name="Alice", email="alice@example.com", password_hash="x")
+        other = User(name="Bob", email="bob@example.com", password_hash="x")
+        db.add_all([user, other])
+        db.flush()
+        leagues = [League(name=f"L{i}", created_by_user_id=other.id) for i in range(4)]
+        db.add_all(leagues)
+        db.flush()
+        player_ids = [player.id for player in db.query(Player).order_by(Player.id).limit(15)]
+        # Alice is in the first three leagues but only has a squad in the first two.
+        for league in leagues[:3]:
+            db.add(Membership(user_id=user.id, league_id=league.id))
+        for league in leagues[:2]:
+            squad = Squad(user_id=user.id, league_id=league.id, budget_used=0)
+            db.add(squad)
+            db.flush()
+            db.add_all([SquadPlayer(squad_id=squad.id, player_id=player_id) for player_id in player_ids])
+        db.commit()
+        yield create_access_token({"sub": user.id}), [league.id for league in leagues], player_ids
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def post(path, token, body):
+    async def call():
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, json=body, headers={"Authorization": f"Bearer {token}"})
+
+    return asyncio.run(call())
+
+
+def entry(league_id, gw, starters):
+    return {"league_id": league_id, "gw": gw, "starters": starters, "captain": starters[0], "vice": starters[1]}
+
+
+def test_batch_reports_per_entry_results(setup):
+    token, league_ids, player_ids = setup
+    starters = player_ids[:9]
+    body = {
+        "entries": [
+            entry(league_ids[0], 1, starters),
+            entry(league_ids[0], 2, starters),
+            entry(league_ids[1], 1, player_ids[6:15]),
+            entry(league_ids[2], 1, starters),
+            entry(league_ids[3], 1, starters),
+            entry(league_ids[0], 1, starters),
+            entry(9999, 1, starters),
+            {**entry(league_ids[1], 2, starters), "vice": starters[0]},
+        ]
+    }
+    response = post("/api/lineup/batch", token, body)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["error"] for result in results] == [
+        None,
+        None,
+        None,
+        "Squad not found",
+        "Not a member of this league",
+        "Duplicate lineup in batch",
+        "League not found",
+        "Captain and vice must differ",
+    ]
+    assert all(result["lineup_id"] for result in results[:3])
+
+    db = SessionLocal()
+    try:
+        assert db.query(Lineup).count() == 3
+        assert db.query(LineupSlot).count() == 27
+    finally:
+        db.close()
+
+
+def test_batch_resubmission_replaces_slots(setup):
+    token, league_ids, player_ids = setup
+    first = post("/api/lineup/batch", token, {"entries": [entry(league_ids[0], 1, player_ids[:9])]}).json()
+    second = post("/api/lineup/batch", token, {"entries": [entry(league_ids[0], 1, player_ids[6:15])]}).json()
+    assert first["results"][0]["lineup_id"] == second["results"][0]["lineup_id"]
+
+    db = SessionLocal()
+    try:
+        lineup = db.query(Lineup).one()
+        assert lineup.captain_player_id == player_ids[6]
+        assert sorted(slot.player_id for slot in lineup.slots) == sorted(player_ids[6:15])
+    finally:
+        db.close()
+
+
+def test_lineups_set_after_stats_are_scored(setup):
+    token, league_ids, player_ids = setup
+    db = SessionLocal()
+    try:
+        apply_stat_lines(db, 1, [{"player_id": player_id, "receptions": 1} for player_id in player_ids[:9]])
+        db.commit()
+    finally:
+        db.close()
+
+    entries = [entry(league_ids[0], 1, player_ids[:9]), entry(league_ids[0], 2, player_ids[:9])]
+    post("/api/lineup/batch", token, {"entries": entries})
+    db = SessionLocal()
+    try:
+        # Nine starters with a point each, the captain's counted twice; gameweek 2 has no stats yet.
+        assert [(score.gw, score.points) for score in db.query(LineupScore)] == [(1, Decimal("10.00"))]
+    finally:
+        db.close()
+
+    # Benching six of the scorers for players without stat lines rescores the lineup.
+    post("/api/lineup/batch", token, {"entries": [entry(league_ids[0], 1, player_ids[6:15])]})
+    db = SessionLocal()
+    try:
+        assert db.query(LineupScore.points).scalar() == Decimal("4.00")
+    finally:
+        db.close()
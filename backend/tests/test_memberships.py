@@ -0,0 +1,109 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ["DATABASE_URL"] = "sqlite:///./test_api.db"
+os.environ["JWT_SECRET"] = "testsecret"
+
+from backend import standings  # noqa: E402
+from backend.app import app  # noqa: E402
+from backend.auth import AuthUser, create_user_token  # noqa: E402
+from backend.broker import InProcessBroker  # noqa: E402
+from backend.db import Base, SessionLocal, async_engine, async_write_engine, engine  # noqa: E402
+from backend.memberships import INVALIDATION_CHANNEL, MembershipCache, membership_cache  # noqa: E402
+from backend.models import League, Membership, User  # noqa: E402
+from backend.querycount import QueryCounter  # noqa: E402
+
+
+@pytest.fixture
+def world():
+    """Alice in two leagues, and a third league of Bob's she has not joined."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        alice = User(name="Alice", email="alice@example.com", password_hash="x")
+        bob = User(name="Bob", email="bob@example.com", password_hash="x")
+        db.add_all([alice, bob])
+        db.flush()
+        leagues = [League(name="A", created_by_user_id=alice.id), League(name="B", created_by_user_id=alice.id)]
+        other = League(name="C", created_by_user_id=bob.id)
+        db.add_all([*leagues, other])
+        db.flush()
+        for user, league in [(alice, leagues[0]), (alice, leagues[1]), (bob, other)]:
+            membership = Membership(user_id=user.id, league_id=league.id)
+            db.add(membership)
+            db.flush()
+            standings.add_standing(db, membership, AuthUser(id=user.id, name=user.name))
+        db.commit()
+        membership_cache.clear()
+        yield create_user_token(alice.id, alice.name, alice.token_version), [league.id for league in leagues], other.id
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def request(method, path, token, body=None):
+    async def call():
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            with QueryCounter(async_engine, async_write_engine) as counter:
+                response = await client.request(method, path, json=body, headers={"Authorization": f"Bearer {token}"})
+            return response.status_code, counter.count
+
+    return asyncio.run(call())
+
+
+def test_membership_checks_are_cached_for_all_of_a_users_leagues(world):
+    token, (first, second), other = world
+    # standings: the membership check, then the page.
+    assert request("GET", f"/api/standings/{first}", token) == (200, 2)
+    assert request("GET", f"/api/standings/{second}", token) == (200, 1)
+    assert request("GET", f"/api/standings/{first}", token) == (200, 1)
+    # Leagues the user is not known to be in are always checked against the database.
+    assert request("GET", f"/api/standings/{other}", token) == (403, 1)
+    assert request("GET", "/api/standings/999", token) == (404, 1)
+
+    joined, _ = request("POST", "/api/leagues/join", token, {"league_id": other})
+    assert joined == 200
+    assert request("GET", f"/api/standings/{other}", token) == (200, 2)
+    assert request("GET", f"/api/standings/{other}", token) == (200, 1)
+    assert (membership_cache.hits, membership_cache.misses) == (3, 4)
+
+
+def test_cache_is_bounded_expires_and_shares_invalidations():
+    cache = MembershipCache(maxsize=2, ttl=60)
+    for user_id in (1, 2, 3):
+        cache.fill(user_id, {10 + user_id}, generation=0)
+    assert (cache.leagues(1), cache.leagues(3), len(cache)) == (None, frozenset({13}), 2)
+
+    stale = cache.generation
+    cache.discard([3])
+    cache.fill(3, {99}, generation=stale)
+    assert cache.leagues(3) is None
+
+    expired = MembershipCache(ttl=0)
+    expired.fill(1, {11}, generation=0)
+    assert expired.leagues(1) is None
+
+    async def share():
+        broker = InProcessBroker()
+        writer, reader = MembershipCache(broker=broker), MembershipCache()
+        subscription = broker.subscribe(INVALIDATION_CHANNEL)
+        listening = asyncio.create_task(reader.listen(subscription))
+        reader.fill(7, {1}, generation=0)
+        writer.invalidate([7])
+        await asyncio.sleep(0)
+        broker.unsubscribe(subscription)
+        await listening
+        return reader.leagues(7)
+
+    assert asyncio.run(share()) is None
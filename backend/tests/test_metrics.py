@@ -0,0 +1,102 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ["DATABASE_URL"] = "sqlite:///./test_api.db"
+os.environ["JWT_SECRET"] = "testsecret"
+
+from backend.app import app  # noqa: E402
+from backend.auth import create_user_token  # noqa: E402
+from backend.catalog import player_catalog  # noqa: E402
+from backend.db import Base, SessionLocal, async_engine, async_write_engine, engine  # noqa: E402
+from backend.metrics import Histogram, metrics  # noqa: E402
+from backend.models import League, Membership, User  # noqa: E402
+from backend.querycount import QueryCounter  # noqa: E402
+from backend.seed_players import seed_players  # noqa: E402
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((0.01, 0.1, 1.0))
+    for value in (0.005, 0.01, 0.05, 2.0):
+        histogram.observe(value)
+    assert histogram.cumulative() == [("0.01", 2), ("0.1", 3), ("1.0", 3), ("+Inf", 4)]
+    assert (histogram.count, round(histogram.sum, 3)) == (4, 2.065)
+
+
+@pytest.fixture
+def member():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        seed_players(db)
+        user = User(name="Alice", email="alice@example.com", password_hash="x")
+        db.add(user)
+        db.flush()
+        league = League(name="L", created_by_user_id=user.id)
+        db.add(league)
+        db.flush()
+        db.add(Membership(user_id=user.id, league_id=league.id))
+        db.commit()
+        metrics.reset()
+        player_catalog.invalidate()
+        yield create_user_token(user.id, user.name, user.token_version), league.id
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def get(path, token=None):
+    async def call():
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            headers = {"Authorization": f"Bearer {token}"} if token else {}
+            with QueryCounter(async_engine, async_write_engine) as counter:
+                response = await client.get(path, headers=headers)
+            return response, counter
+
+    return asyncio.run(call())
+
+
+def samples(text):
+    values = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            values[name] = float(value)
+    return values
+
+
+def test_metrics_endpoint_reports_latency_sql_and_pool_gauges(member):
+    token, league_id = member
+    statements = 0
+    for path in ("/api/players", "/api/players", f"/api/squad?league_id={league_id}", "/api/squad?league_id=999"):
+        response, counter = get(path, token)
+        statements += counter.count if path.startswith("/api/players") else 0
+    assert response.status_code == 404
+
+    response, _ = get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    values = samples(response.text)
+    players = '{method="GET",route="/api/players"}'
+    squad = '{method="GET",route="/api/squad"}'
+    assert values[f"gridcap_http_request_duration_seconds_count{players}"] == 2
+    assert values['gridcap_http_request_duration_seconds_bucket{method="GET",route="/api/players",le="+Inf"}'] == 2
+    # SQL run on the async engines is attributed to the request that ran it, counted like QueryCounter.
+    assert values[f"gridcap_http_request_sql_statements_sum{players}"] == statements == 1
+    assert values[f"gridcap_http_request_sql_seconds_total{players}"] > 0
+    assert values['gridcap_http_responses_total{method="GET",route="/api/squad",status="404"}'] == 1
+    assert values[f"gridcap_http_request_duration_seconds_count{squad}"] == 2
+    assert "gridcap_http_requests_in_flight" not in "".join(name for name in values if "/api/" in name)
+    assert values["gridcap_threadpool_tasks_waiting"] == 0
+    assert values["gridcap_password_hasher_jobs"] == 0
+    assert "/metrics" in response.text  # the scrape itself is in flight while rendering
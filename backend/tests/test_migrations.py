@@ -0,0 +1,100 @@
+import sys
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect, text
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend import models  # noqa: E402,F401
+from backend.db import SCHEMA_REVISION, Base, SchemaOutOfDate, check_schema, schema_revision  # noqa: E402
+from backend.manage import BASELINE_REVISION, alembic_config, migrate, stamp  # noqa: E402
+
+
+def test_migrations_reach_the_models_and_the_expected_revision(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    with pytest.raises(SchemaOutOfDate):
+        check_schema(engine)
+
+    config = alembic_config()
+    config.attributes["configure_logging"] = False
+    assert ScriptDirectory.from_config(config).get_current_head() == SCHEMA_REVISION
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+
+    check_schema(engine)
+    assert schema_revision(engine) == SCHEMA_REVISION
+    with engine.connect() as connection:
+        assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.downgrade(config, "base")
+    assert inspect(engine).get_table_names() == ["alembic_version"]
+    engine.dispose()
+
+
+def baseline_database(path):
+    """A database as the old import-time create_all left it: the 0001 tables, no alembic_version."""
+    engine = create_engine(f"sqlite:///{path}")
+    config = alembic_config()
+    config.attributes["configure_logging"] = False
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, BASELINE_REVISION)
+        connection.execute(text("DROP TABLE alembic_version"))
+    return engine
+
+
+def test_migrate_adopts_a_baseline_database_and_backfills_it(tmp_path):
+    engine = baseline_database(tmp_path / "baseline.db")
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "INSERT INTO users (id, name, email, password_hash, created_at) "
+                "VALUES (1, 'Alice', 'a@x.io', 'x', '2024-09-01 00:00:00')"
+            )
+        )
+        connection.execute(
+            text("INSERT INTO players (id, name, position, team, cost) VALUES (1, 'ÉMILE Ford', 'QB', 'KC', 9)")
+        )
+        connection.execute(text("INSERT INTO leagues (id, name, created_by_user_id) VALUES (1, 'Office', 1)"))
+        connection.execute(text("INSERT INTO memberships (id, league_id, user_id) VALUES (4, 1, 1)"))
+        connection.execute(text("INSERT INTO squads (id, user_id, league_id, budget_used) VALUES (1, 1, 1, 90.5)"))
+
+    migrate(engine=engine)
+
+    assert schema_revision(engine) == SCHEMA_REVISION
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT name_key FROM players")).scalar() == "émile ford"
+        assert connection.execute(text("SELECT bank FROM squads")).scalar() == pytest.approx(9.5)
+        assert connection.execute(
+            text("SELECT league_id, user_id, team_name, total_points, tiebreak, rank FROM standings")
+        ).all() == [(1, 1, "Alice", 0, 4, 1)]
+        assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+    engine.dispose()
+
+
+def test_only_a_baseline_database_can_be_stamped(tmp_path):
+    engine = baseline_database(tmp_path / "baseline.db")
+    stamp(engine)
+    assert schema_revision(engine) == BASELINE_REVISION
+    with pytest.raises(SchemaOutOfDate):
+        stamp(engine)
+    engine.dispose()
+
+    current = create_engine(f"sqlite:///{tmp_path / 'current.db'}")
+    Base.metadata.create_all(current)
+    with pytest.raises(SchemaOutOfDate):
+        stamp(current)
+    with pytest.raises(SchemaOutOfDate):
+        migrate(engine=current)
+    assert schema_revision(current) is None
+    current.dispose()
@@ -0,0 +1,149 @@
+import asyncio
+import itertools
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ["DATABASE_URL"] = "sqlite:///./test_api.db"
+os.environ["JWT_SECRET"] = "testsecret"
+
+from backend.app import app  # noqa: E402
+from backend.auth import create_user_token  # noqa: E402
+from backend.catalog import player_catalog  # noqa: E402
+from backend.db import Base, SessionLocal, engine  # noqa: E402
+from backend.models import League, Membership, Player, User  # noqa: E402
+from backend.optimizer import Candidate, InfeasibleSquad, optimize_squad  # noqa: E402
+from backend.seed_players import seed_players  # noqa: E402
+
+LIMITS = {"QB": (1, 2), "RB": (1, 3), "WR": (2, 3), "K": (0, 1)}
+SIZE = 6
+BUDGET = 4000
+
+
+def random_pool(seed, size=18):
+    rng = random.Random(seed)
+    return [
+        Candidate(id=index, position=rng.choice(list(LIMITS)), cost=rng.randint(5, 25) * 50, points=rng.randint(0, 40))
+        for index in range(size)
+    ]
+
+
+def brute_force(pool, locked=(), excluded=()):
+    """(points, -cost) of the best squad, found by trying every combination."""
+    best = None
+    for picked in itertools.combinations([c for c in pool if c.id not in set(excluded)], SIZE):
+        cost = sum(c.cost for c in picked)
+        counts = {position: sum(c.position == position for c in picked) for position in LIMITS}
+        if cost > BUDGET or not set(locked) <= {c.id for c in picked}:
+            continue
+        if any(not low <= counts[position] <= high for position, (low, high) in LIMITS.items()):
+            continue
+        key = (sum(c.points for c in picked), -cost)
+        if best is None or key > best:
+            best = key
+    return best
+
+
+def solve(pool, **kwargs):
+    return optimize_squad(pool, BUDGET, LIMITS, SIZE, **kwargs)
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_matches_brute_force(seed):
+    pool = random_pool(seed)
+    expected = brute_force(pool)
+    if expected is None:
+        with pytest.raises(InfeasibleSquad):
+            solve(pool)
+        return
+    result = solve(pool)
+    by_id = {c.id: c for c in pool}
+    picked = [by_id[player_id] for player_id in result.player_ids]
+    assert len(set(result.player_ids)) == SIZE
+    for position, (low, high) in LIMITS.items():
+        assert low <= sum(c.position == position for c in picked) <= high
+    assert (result.points, -result.cost) == expected
+    assert result.cost == sum(c.cost for c in picked) <= BUDGET
+
+
+def test_locked_and_excluded_players():
+    pool = random_pool(4)
+    free = solve(pool)
+    excluded = free.player_ids[:2]
+    locked = [c.id for c in pool if c.id not in free.player_ids and c.position == "RB"][:1]
+    result = solve(pool, locked=locked, excluded=excluded)
+    assert set(locked) <= set(result.player_ids)
+    assert not set(excluded) & set(result.player_ids)
+    assert (result.points, -result.cost) == brute_force(pool, locked=locked, excluded=excluded)
+
+
+def test_infeasible_requests_raise():
+    pool = random_pool(5)
+    with pytest.raises(InfeasibleSquad):
+        optimize_squad(pool, 100, LIMITS, SIZE)
+    rbs = [c.id for c in pool if c.position == "RB"]
+    with pytest.raises(InfeasibleSquad):
+        solve(pool, locked=rbs[:4])
+    with pytest.raises(InfeasibleSquad):
+        solve(pool, locked=[rbs[0]], excluded=[rbs[0]])
+
+
+@pytest.fixture
+def member():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        seed_players(db)
+        user = User(name="Alice", email="alice@example.com", password_hash="x")
+        db.add(user)
+        db.flush()
+        league = League(name="Alpha", created_by_user_id=user.id)
+        db.add(league)
+        db.flush()
+        db.add(Membership(user_id=user.id, league_id=league.id))
+        db.commit()
+        player_catalog.invalidate()
+        players = {player.name: player.id for player in db.query(Player)}
+        yield create_user_token(user.id, user.name, user.token_version), league.id, players
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def post(path, token, body):
+    async def call():
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, json=body, headers={"Authorization": f"Bearer {token}"})
+
+    return asyncio.run(call())
+
+
+def test_optimize_endpoint_returns_a_saveable_squad(member):
+    token, league_id, players = member
+    herbert, engram = players["Justin Herbert"], players["Evan Engram"]
+    response = post(
+        "/api/squad/optimize",
+        token,
+        {"locked": [engram], "projections": {str(herbert): 30.0, str(engram): 12.0}},
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    ids = [player["id"] for player in body["players"]]
+    assert len(ids) == 15 and engram in ids and herbert in ids
+    assert body["budget_used"] <= 100.0
+    assert body["projected_points"] == 42.0
+    saved = post("/api/squad/save", token, {"league_id": league_id, "player_ids": ids})
+    assert saved.status_code == 200
+
+    response = post("/api/squad/optimize", token, {"locked": [engram], "excluded": [engram]})
+    assert response.status_code == 400
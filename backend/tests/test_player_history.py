@@ -0,0 +1,120 @@
+import asyncio
+import io
+import os
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ["DATABASE_URL"] = "sqlite:///./test_api.db"
+os.environ["JWT_SECRET"] = "testsecret"
+
+from backend.app import app  # noqa: E402
+from backend.auth import create_user_token  # noqa: E402
+from backend.catalog import player_catalog  # noqa: E402
+from backend.db import Base, SessionLocal, engine  # noqa: E402
+from backend.ingest import ingest_lines  # noqa: E402
+from backend.models import Player, PlayerPrice, User  # noqa: E402
+from backend.player_history import compute_aggregates, refresh_aggregates  # noqa: E402
+from backend.scoring import apply_stat_lines  # noqa: E402
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///./test_player_history.db", connect_args={"check_same_thread": False})
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = Session(bind=engine)
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def catches(count):
+    """A stat line worth ``count`` points: one reception each."""
+    return {"receptions": count}
+
+
+def test_compute_aggregates():
+    # Gameweeks 5-8 scored 26 points, gameweeks 1-4 scored 10.
+    assert compute_aggregates(Decimal("26"), Decimal("10"), Decimal("5")) == (Decimal("6.50"), Decimal("4.00"), Decimal("5.200"))
+    assert compute_aggregates(Decimal("3"), Decimal("0"), Decimal("0")) == (Decimal("0.75"), Decimal("0.75"), Decimal("0"))
+
+
+def test_aggregates_follow_each_gameweek(session):
+    steady = Player(name="Steady", position="WR", team="X", cost=Decimal("8.0"))
+    rising = Player(name="Rising", position="WR", team="X", cost=Decimal("4.0"))
+    session.add_all([steady, rising])
+    session.flush()
+    for gw in range(1, 6):
+        apply_stat_lines(session, gw, [{"player_id": steady.id, **catches(10)}, {"player_id": rising.id, **catches(gw * 2)}])
+    session.refresh(steady)
+    session.refresh(rising)
+    assert (steady.form, steady.trend, steady.value, steady.form_gw) == (Decimal("10"), Decimal("7.5"), Decimal("5"), 5)
+    # Gameweeks 2-5: 4 + 6 + 8 + 10 points; the window before holds only gameweek 1.
+    assert (rising.form, rising.trend, rising.value) == (Decimal("7"), Decimal("6.5"), Decimal("7"))
+
+    # Only Rising plays gameweek 6: Steady's window still moves, with a zero in it.
+    apply_stat_lines(session, 6, [{"player_id": rising.id, **catches(12)}])
+    session.refresh(steady)
+    assert (steady.form, steady.form_gw) == (Decimal("7.5"), 6)
+    assert refresh_aggregates(session, [steady.id, rising.id]) == 0
+
+
+@pytest.fixture
+def member():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(name="Alice", email="alice@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        yield create_user_token(user.id, user.name, user.token_version)
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def get(path, token):
+    async def call():
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path, headers={"Authorization": f"Bearer {token}"})
+
+    return asyncio.run(call())
+
+
+def test_player_api_serves_aggregates_and_history(member):
+    weeks = [(1, "5.0", 4), (2, "5.0", 8), (3, "5.5", 6)]
+    feed = "external_id,name,position,team,cost,gw,receptions\n" + "".join(
+        f"x-1,Pat Freiermuth,TE,PIT,{cost},{gw},{count}\n" for gw, cost, count in weeks
+    )
+    report = ingest_lines(SessionLocal, io.StringIO(feed), "csv", batch_size=1)
+    assert report.prices_recorded == 3
+    player_catalog.invalidate()
+    with SessionLocal() as db:
+        player_id = db.query(Player.id).filter(Player.external_id == "x-1").scalar()
+        assert db.query(PlayerPrice).count() == 3
+
+    [player] = get("/api/players", member).json()
+    # 18 points over the four-week window ending at gameweek 3, at the current price of 5.5.
+    assert (player["id"], player["cost"], player["form"], player["trend"], player["value"]) == (player_id, 5.5, 4.5, 4.5, 3.273)
+    history = get(f"/api/players/{player_id}/history", member).json()
+    assert history["form"] == 4.5
+    assert history["history"] == [
+        {"gw": 1, "points": 4.0, "cost": 5.0},
+        {"gw": 2, "points": 8.0, "cost": 5.0},
+        {"gw": 3, "points": 6.0, "cost": 5.5},
+    ]
+    assert get("/api/players/999/history", member).status_code == 404
@@ -0,0 +1,152 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ["DATABASE_URL"] = "sqlite:///./test_api.db"
+os.environ["JWT_SECRET"] = "testsecret"
+
+from backend import standings  # noqa: E402
+from starlette.routing import Match, Route  # noqa: E402
+
+from backend.app import app  # noqa: E402
+from backend.auth import AuthUser, create_user_token, token_versions  # noqa: E402
+from backend.catalog import player_catalog  # noqa: E402
+from backend.db import Base, SessionLocal, async_engine, async_write_engine, engine  # noqa: E402
+from backend.models import League, Membership, Player, Squad, SquadPlayer, User  # noqa: E402
+from backend.querycount import QueryBudgetExceeded, QueryCounter  # noqa: E402
+from backend.schedule import kickoff_schedule  # noqa: E402
+from backend.seed_players import seed_players  # noqa: E402
+
+LEAGUES = 3
+MEMBERS = 12
+
+
+@pytest.fixture
+def world():
+    """Alice plus eleven rivals in each of three leagues, everyone with a full squad."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        seed_players(db)
+        player_ids = [player_id for (player_id,) in db.query(Player.id).order_by(Player.cost, Player.id).limit(15)]
+        users = [User(name=f"User {i}", email=f"user{i}@example.com", password_hash="x") for i in range(MEMBERS)]
+        db.add_all(users)
+        db.flush()
+        leagues = [League(name=f"League {i}", created_by_user_id=users[0].id) for i in range(LEAGUES)]
+        db.add_all(leagues)
+        db.flush()
+        for league in leagues:
+            for user in users:
+                membership = Membership(user_id=user.id, league_id=league.id)
+                squad = Squad(user_id=user.id, league_id=league.id, budget_used=0)
+                db.add_all([membership, squad])
+                db.flush()
+                standings.add_standing(db, membership, AuthUser(id=user.id, name=user.name))
+                db.add_all([SquadPlayer(squad_id=squad.id, player_id=player_id) for player_id in player_ids])
+        db.commit()
+        # Budgets are for a warm process: the (empty) kickoff schedule is already indexed and Alice's
+        # token version is known, as after her login.
+        kickoff_schedule.get(db)
+        alice = users[0]
+        token_versions.record(alice.id, alice.token_version)
+        yield create_user_token(alice.id, alice.name, alice.token_version), leagues[0].id, player_ids
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def measured(method, path, token, **kwargs):
+    async def call():
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            with QueryCounter(async_engine, async_write_engine) as counter:
+                response = await client.request(
+                    method, path, headers={"Authorization": f"Bearer {token}"}, **kwargs
+                )
+            return response, counter
+
+    return asyncio.run(call())
+
+
+def read_budgets(league_id, player_ids):
+    """(method, path, request kwargs, statement budget) for each read endpoint."""
+    return [
+        ("GET", "/api/leagues/mine", {}, 1),
+        ("GET", "/api/auth/me", {}, 1),
+        ("GET", "/api/players", {}, 1),
+        ("GET", "/api/players", {}, 0),
+        ("GET", "/api/players?position=QB&limit=5", {}, 1),
+        ("GET", f"/api/squad?league_id={league_id}", {}, 2),
+        ("GET", f"/api/standings/{league_id}", {}, 2),
+        ("GET", f"/api/standings/{league_id}?around_me=3", {}, 4),
+        ("GET", f"/api/squad/transfers?league_id={league_id}&gw=1", {}, 2),
+        ("GET", f"/api/players/{player_ids[0]}/history", {}, 3),
+    ]
+
+
+def route_of(method, path):
+    """The app route a request is served by, as (method, path template)."""
+    scope = {"type": "http", "method": method, "path": path.split("?")[0]}
+    for route in app.routes:
+        if isinstance(route, Route) and route.matches(scope)[0] == Match.FULL:
+            return method, route.path
+    return None
+
+
+def test_every_read_endpoint_has_a_budget():
+    """New GET endpoints under /api fail here until they are added to ``read_budgets``."""
+    budgeted = {route_of(method, path) for method, path, _, _ in read_budgets(1, [1])}
+    reads = {
+        ("GET", route.path)
+        for route in app.routes
+        if isinstance(route, Route)
+        and "GET" in route.methods
+        and route.path.startswith("/api/")
+        and route.include_in_schema
+        and not route.path.startswith("/api/admin/")
+    }
+    assert reads - budgeted == set()
+
+
+def test_read_endpoints_stay_within_statement_budget(world):
+    token, league_id, player_ids = world
+    player_catalog.invalidate()
+    for method, path, kwargs, budget in read_budgets(league_id, player_ids):
+        response, counter = measured(method, path, token, **kwargs)
+        assert response.status_code == 200, (path, response.text)
+        counter.check(budget, f"{method} {path}")
+
+
+def test_write_endpoints_stay_within_statement_budget(world):
+    token, league_id, player_ids = world
+    lineup = {"league_id": league_id, "gw": 1, "starters": player_ids[:9], "captain": player_ids[0], "vice": player_ids[1]}
+    response, counter = measured("POST", "/api/lineup/set", token, json=lineup)
+    assert response.status_code == 200
+    counter.check(6, "POST /api/lineup/set (new)")
+    response, counter = measured("POST", "/api/lineup/set", token, json=lineup)
+    assert response.status_code == 200
+    counter.check(7, "POST /api/lineup/set (update)")
+    response, counter = measured("POST", "/api/squad/save", token, json={"league_id": league_id, "player_ids": player_ids})
+    assert response.status_code == 200
+    counter.check(5, "POST /api/squad/save")
+    batch = {"entries": [{**lineup, "league_id": league} for league in range(league_id, league_id + LEAGUES)]}
+    response, counter = measured("POST", "/api/lineup/batch", token, json=batch)
+    assert response.status_code == 200, response.text
+    counter.check(8, "POST /api/lineup/batch")
+
+
+def test_counter_reports_statements_over_budget(world):
+    token, league_id, _ = world
+    _, counter = measured("GET", f"/api/standings/{league_id}", token)
+    with pytest.raises(QueryBudgetExceeded) as excinfo:
+        counter.check(counter.count - 1, "standings")
+    assert "standings ran" in str(excinfo.value)
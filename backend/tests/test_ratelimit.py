@@ -0,0 +1,92 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ["DATABASE_URL"] = "sqlite:///./test_api.db"
+os.environ["JWT_SECRET"] = "testsecret"
+
+from backend.app import app  # noqa: E402
+from backend.auth import create_user_token, token_versions  # noqa: E402
+from backend.ratelimit import Limit, RateLimiter, StripedMemoryBackend, rate_limiter, route_class  # noqa: E402
+
+
+def test_buckets_refill_at_their_rate_up_to_the_burst():
+    backend = StripedMemoryBackend(stripes=4)
+    limit = Limit.of(rate=2, burst=3)
+    assert [backend.take("alice", limit, 10.0) for _ in range(4)] == [0.0, 0.0, 0.0, 0.5]
+    assert backend.take("bob", limit, 10.0) == 0.0
+    assert backend.take("alice", limit, 10.5) == 0.0
+    assert backend.take("alice", limit, 10.5) == 0.5
+    # Idle long enough to refill, then bursting again.
+    assert [backend.take("alice", limit, 100.0) for _ in range(4)] == [0.0, 0.0, 0.0, 0.5]
+
+    assert route_class("POST", "/api/auth/login") == "auth"
+    assert route_class("GET", "/api/auth/me") == "reads"
+    assert route_class("POST", "/api/squad/save") == "writes"
+    assert route_class("POST", "/api/admin/stats") is None
+    assert route_class("OPTIONS", "/api/squad/save") is None
+    assert route_class("GET", "/metrics") is None
+
+
+@pytest.fixture
+def limited(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "enabled", True)
+    monkeypatch.setitem(rate_limiter.limits, "writes", Limit.of(rate=0.1, burst=2))
+    rate_limiter.reset()
+    # Alice and Bob have no rows; their token versions are known as if they had just logged in.
+    token_versions.record(1, 0)
+    token_versions.record(2, 0)
+    yield
+    rate_limiter.reset()
+    token_versions.clear()
+
+
+def statuses(requests):
+    async def call():
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = [
+                await client.request(method, path, headers=headers, json={}) for method, path, headers in requests
+            ]
+        return [(response.status_code, response.headers.get("Retry-After")) for response in responses]
+
+    return asyncio.run(call())
+
+
+def test_writes_are_limited_per_user_and_per_address(limited):
+    alice = {"Authorization": f"Bearer {create_user_token(1, 'Alice', 0)}"}
+    bob = {"Authorization": f"Bearer {create_user_token(2, 'Bob', 0)}"}
+    save = ("POST", "/api/squad/save")
+    preflight = ("OPTIONS", "/api/squad/save", alice)
+    results = statuses([(*save, alice), (*save, alice), (*save, alice), (*save, bob), preflight])
+    # Requests that pass the limiter fail validation on the empty body.
+    assert results[:4] == [(422, None), (422, None), (429, "10"), (422, None)]
+    assert results[4][0] != 429
+
+    anonymous = statuses([(*save, {"Authorization": "Bearer forged"})] * 3)
+    assert [status for status, _ in anonymous] == [401, 401, 429]
+    assert rate_limiter.limited == 2
+
+
+def test_anonymous_callers_are_keyed_by_the_address_the_proxy_appended():
+    limiter = RateLimiter(enabled=True, proxy_hops=1)
+
+    def subject(*forwarded):
+        headers = [(b"x-forwarded-for", value) for value in forwarded]
+        return limiter.subject({"headers": headers, "client": ("10.0.0.1", 443)})
+
+    # Whatever the caller puts on the left, the proxy's own entry is the rightmost one.
+    assert subject(b"1.1.1.1, 203.0.113.7") == subject(b"2.2.2.2, 203.0.113.7") == "203.0.113.7"
+    assert subject(b"1.1.1.1", b"203.0.113.7") == "203.0.113.7"
+    assert subject() == "10.0.0.1"
+    # Without trusted proxies the header is ignored.
+    limiter.proxy_hops = 0
+    assert subject(b"1.1.1.1") == "10.0.0.1"
@@ -0,0 +1,41 @@
+import json
+import os
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ["DATABASE_URL"] = "sqlite:///./test_api.db"
+os.environ["JWT_SECRET"] = "testsecret"
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from backend import schemas  # noqa: E402
+from backend.app import app  # noqa: E402
+from backend.responses import RowsResponse  # noqa: E402
+
+
+def test_rows_encode_like_the_response_model():
+    rows = [
+        {"rank": 1, "user_id": 7, "team_name": "Zoë's \"Team\"", "points": Decimal("101.50")},
+        {"rank": 2, "user_id": 3, "team_name": "B", "points": Decimal("-4")},
+    ]
+    body = RowsResponse({"standings": rows, "next_cursor": None}).body
+    expected = jsonable_encoder(schemas.StandingsResponse(standings=rows, next_cursor=None))
+    assert json.loads(body) == expected
+    assert body.startswith(b'{"standings":[{"rank":1,"user_id":7,') and b'"points":101.5}' in body
+
+
+def test_fast_routes_keep_their_openapi_schemas():
+    paths = app.openapi()["paths"]
+
+    def schema(path):
+        return paths[path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+
+    assert schema("/api/players")["items"]["$ref"].endswith("/PlayerOut")
+    assert schema("/api/leagues/mine")["items"]["$ref"].endswith("/LeagueOut")
+    assert schema("/api/standings/{league_id}")["$ref"].endswith("/StandingsResponse")
+    assert schema("/api/players/{player_id}/history")["$ref"].endswith("/PlayerHistoryResponse")
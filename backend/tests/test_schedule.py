@@ -0,0 +1,135 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ["DATABASE_URL"] = "sqlite:///./test_api.db"
+os.environ["JWT_SECRET"] = "testsecret"
+os.environ["ADMIN_TOKEN"] = "testadmin"
+
+from backend.app import app  # noqa: E402
+from backend.auth import create_access_token  # noqa: E402
+from backend.db import Base, SessionLocal, engine  # noqa: E402
+from backend.models import League, Membership, Player, Squad, SquadPlayer, User  # noqa: E402
+from backend.schedule import GAME_LENGTH, build_index, clock, kickoff_schedule  # noqa: E402
+
+KICKOFF = datetime(2026, 9, 13, 17, 0)
+
+
+def test_index_locks_by_team_kickoff_and_finds_the_live_gameweek():
+    index = build_index(
+        0,
+        [
+            (1, "KC", KICKOFF),
+            (1, "BUF", KICKOFF + timedelta(hours=3)),
+            (2, "KC", KICKOFF + timedelta(days=7)),
+        ],
+    )
+    assert not index.started(1, "KC", KICKOFF - timedelta(seconds=1))
+    assert index.started(1, "KC", KICKOFF) and not index.started(1, "BUF", KICKOFF)
+    assert not index.started(1, "DAL", KICKOFF + timedelta(days=1))
+    assert index.gameweek_started(1, KICKOFF) and not index.gameweek_started(2, KICKOFF)
+    assert index.live_gameweek(KICKOFF - timedelta(minutes=1)) is None
+    assert index.live_gameweek(KICKOFF + timedelta(hours=3)) == 1
+    assert index.live_gameweek(KICKOFF + timedelta(hours=3) + GAME_LENGTH) is None
+    assert index.live_gameweek(KICKOFF + timedelta(days=7)) == 2
+
+
+@pytest.fixture
+def setup():
+    """Alice's squad: eight Chiefs then seven Bills, with one more Bill and one more Chief left over."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        teams = ["KC"] * 8 + ["BUF"] * 8 + ["KC"]
+        players = [Player(name=f"Player {i}", position="WR", team=team, cost=5) for i, team in enumerate(teams)]
+        user = User(name="Alice", email="alice@example.com", password_hash="x")
+        db.add_all([*players, user])
+        db.flush()
+        league = League(name="L", created_by_user_id=user.id)
+        db.add(league)
+        db.flush()
+        squad = Squad(user_id=user.id, league_id=league.id, budget_used=75)
+        db.add_all([Membership(user_id=user.id, league_id=league.id), squad])
+        db.flush()
+        db.add_all([SquadPlayer(squad_id=squad.id, player_id=player.id) for player in players[:15]])
+        db.commit()
+        yield create_access_token({"sub": user.id}), league.id, [player.id for player in players]
+    finally:
+        db.close()
+        clock.reset()
+        kickoff_schedule.invalidate()
+        Base.metadata.drop_all(bind=engine)
+
+
+def call(method, path, body, headers):
+    async def request():
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, path, json=body, headers=headers)
+
+    return asyncio.run(request())
+
+
+def post(path, token, body):
+    return call("POST", path, body, {"Authorization": f"Bearer {token}"})
+
+
+def lineup(league_id, gw, starters, captain=None):
+    captain = captain or starters[0]
+    return {"league_id": league_id, "gw": gw, "starters": starters, "captain": captain, "vice": starters[1]}
+
+
+def test_lineup_and_squad_changes_lock_at_each_teams_kickoff(setup):
+    token, league_id, ids = setup
+    chiefs, bills, spare_bill, spare_chief = ids[:8], ids[8:15], ids[15], ids[16]
+    schedule = {
+        "kickoffs": [
+            {"team": "kc", "kickoff": KICKOFF.isoformat() + "Z"},
+            {"team": "BUF", "kickoff": (KICKOFF + timedelta(hours=3)).replace(tzinfo=timezone.utc).isoformat()},
+        ]
+    }
+    response = call("PUT", "/api/admin/schedule/1", schedule, {"X-Admin-Token": "testadmin"})
+    assert response.status_code == 200, response.text
+    assert [item["team"] for item in response.json()["kickoffs"]] == ["KC", "BUF"]
+
+    clock.travel_to(KICKOFF - timedelta(minutes=5))
+    starters = chiefs + bills[:1]
+    assert post("/api/lineup/set", token, lineup(league_id, 1, starters)).status_code == 200
+
+    clock.advance(timedelta(hours=1))
+    # The Bills have not kicked off, so their starter can still be swapped; resubmitting the Chiefs is a no-op.
+    assert post("/api/lineup/set", token, lineup(league_id, 1, chiefs + bills[1:2])).status_code == 200
+    benched = post("/api/lineup/set", token, lineup(league_id, 1, chiefs[:7] + bills[:2]))
+    assert (benched.status_code, benched.json()["detail"]) == (400, f"Lineup locked for players: {chiefs[7]}")
+    recaptained = post("/api/lineup/set", token, lineup(league_id, 1, chiefs + bills[1:2], captain=chiefs[2]))
+    assert recaptained.status_code == 400
+    # Gameweeks without a schedule never lock.
+    assert post("/api/lineup/set", token, lineup(league_id, 2, chiefs[:7] + bills[:2])).status_code == 200
+    batch = post(
+        "/api/lineup/batch",
+        token,
+        {"entries": [lineup(league_id, 1, chiefs[:7] + bills[:2]), lineup(league_id, 3, chiefs[:7] + bills[:2])]},
+    )
+    assert [result["error"] for result in batch.json()["results"]] == [f"Lineup locked for players: {chiefs[7]}", None]
+
+    squad = ids[:15]
+    swap_bill = [*squad[:14], spare_bill]
+    assert post("/api/squad/save", token, {"league_id": league_id, "player_ids": swap_bill}).status_code == 200
+    swap_chief = [spare_chief, *swap_bill[1:]]
+    refused = post("/api/squad/save", token, {"league_id": league_id, "player_ids": swap_chief})
+    assert refused.status_code == 400
+    assert refused.json()["detail"] == f"Gameweek 1 locked for players: {chiefs[0]}, {spare_chief}"
+
+    # Once the gameweek's last game is over, transfers reopen.
+    clock.travel_to(KICKOFF + timedelta(hours=3) + GAME_LENGTH)
+    assert post("/api/squad/save", token, {"league_id": league_id, "player_ids": swap_chief}).status_code == 200
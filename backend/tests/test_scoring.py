@@ -0,0 +1,114 @@
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.db import Base  # noqa: E402
+from backend.models import League, Lineup, LineupScore, LineupSlot, Membership, Player, User  # noqa: E402
+from backend.scoring import apply_stat_lines, rescore_lineups, score_stat_line  # noqa: E402
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///./test_scoring.db", connect_args={"check_same_thread": False})
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = Session(bind=engine)
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def make_lineup(db, user, league, starters, captain, vice, gw=1):
+    lineup = Lineup(user_id=user.id, league_id=league.id, gw=gw, captain_player_id=captain, vice_captain_player_id=vice)
+    db.add(lineup)
+    db.flush()
+    for player_id in starters:
+        db.add(LineupSlot(lineup_id=lineup.id, player_id=player_id, starter=True))
+    db.flush()
+    return lineup
+
+
+def stored_points(db, lineup):
+    return db.query(LineupScore.points).filter(LineupScore.lineup_id == lineup.id).scalar()
+
+
+@pytest.fixture
+def league_setup(session):
+    players = [Player(name=f"P{i}", position="WR", team="X", cost=Decimal("5.0")) for i in range(4)]
+    alice = User(name="Alice", email="a@example.com", password_hash="x")
+    bob = User(name="Bob", email="b@example.com", password_hash="x")
+    session.add_all(players + [alice, bob])
+    session.flush()
+    league = League(name="L", created_by_user_id=alice.id)
+    session.add(league)
+    session.flush()
+    session.add_all([Membership(user_id=alice.id, league_id=league.id), Membership(user_id=bob.id, league_id=league.id)])
+    ids = [p.id for p in players]
+    alice_lineup = make_lineup(session, alice, league, ids[:3], captain=ids[0], vice=ids[1])
+    bob_lineup = make_lineup(session, bob, league, ids[1:], captain=ids[3], vice=ids[2])
+    return ids, alice_lineup, bob_lineup
+
+
+def test_score_stat_line():
+    assert score_stat_line({"pass_yards": 250, "pass_tds": 2, "interceptions": 1}) == Decimal("16.00")
+    assert score_stat_line({"receptions": 5, "rec_yards": 73, "rec_tds": 1}) == Decimal("18.30")
+
+
+def test_captain_doubles_and_vice_fallback(session, league_setup):
+    ids, alice_lineup, bob_lineup = league_setup
+    apply_stat_lines(
+        session,
+        1,
+        [
+            {"player_id": ids[0], "rec_tds": 1},
+            {"player_id": ids[1], "receptions": 2},
+            {"player_id": ids[2], "receptions": 3},
+        ],
+    )
+    # Alice: 6 + 2 + 3, captain (6) doubled.
+    assert stored_points(session, alice_lineup) == Decimal("17.00")
+    # Bob: captain ids[3] has no stat line, so the vice (3) is doubled.
+    assert stored_points(session, bob_lineup) == Decimal("8.00")
+
+
+def test_correction_only_rescores_affected_lineups(session, league_setup):
+    ids, alice_lineup, bob_lineup = league_setup
+    apply_stat_lines(session, 1, [{"player_id": pid, "receptions": 1} for pid in ids])
+    session.query(LineupScore).filter(LineupScore.lineup_id == bob_lineup.id).update({"points": 99})
+
+    changed = apply_stat_lines(session, 1, [{"player_id": ids[0], "receptions": 4}, {"player_id": ids[1], "receptions": 1}])
+
+    assert changed == {ids[0]}
+    assert stored_points(session, alice_lineup) == Decimal("10.00")
+    assert stored_points(session, bob_lineup) == Decimal("99.00")
+
+    rescore_lineups(session, 1)
+    assert stored_points(session, bob_lineup) == Decimal("4.00")
+
+
+def test_rescore_reaches_stats_by_player_and_gameweek(session, league_setup):
+    # Starting the join from every stat line of the gameweek made rescoring 20k squads 20x slower.
+    plans = []
+
+    def explain(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("INSERT INTO lineup_scores"):
+            plans.extend(row[-1] for row in cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters))
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", explain)
+    try:
+        rescore_lineups(session, 1)
+    finally:
+        event.remove(engine, "before_cursor_execute", explain)
+    stat_steps = [step for step in plans if " player_gameweek_stats" in step]
+    assert stat_steps and all("(player_id=? AND gw=?)" in step for step in stat_steps)
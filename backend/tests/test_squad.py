@@ -0,0 +1,87 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ["DATABASE_URL"] = "sqlite:///./test_api.db"
+os.environ["JWT_SECRET"] = "testsecret"
+
+from backend.app import app  # noqa: E402
+from backend.auth import create_access_token  # noqa: E402
+from backend.db import Base, SessionLocal, engine  # noqa: E402
+from backend.models import League, Membership, Player, SquadPlayer, User  # noqa: E402
+from backend.seed_players import seed_players  # noqa: E402
+
+
+@pytest.fixture
+def member():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        seed_players(db)
+        user = User(name="Alice", email="alice@example.com", password_hash="x")
+        db.add(user)
+        db.flush()
+        league = League(name="Alpha", created_by_user_id=user.id)
+        db.add(league)
+        db.flush()
+        db.add(Membership(user_id=user.id, league_id=league.id))
+        db.commit()
+        cheapest = [player.id for player in db.query(Player).order_by(Player.cost, Player.id).limit(17)]
+        yield create_access_token({"sub": user.id}), league.id, cheapest
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def request(method, path, token, **kwargs):
+    async def call():
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, path, headers={"Authorization": f"Bearer {token}"}, **kwargs)
+
+    return asyncio.run(call())
+
+
+def squad_rows():
+    db = SessionLocal()
+    try:
+        return {player_id: row_id for row_id, player_id in db.query(SquadPlayer.id, SquadPlayer.player_id)}
+    finally:
+        db.close()
+
+
+def test_resave_only_touches_changed_players(member):
+    token, league_id, cheapest = member
+    first = request("POST", "/api/squad/save", token, json={"league_id": league_id, "player_ids": cheapest[:15]})
+    assert first.status_code == 200
+    assert [player["id"] for player in first.json()["players"]] == cheapest[:15]
+    before = squad_rows()
+
+    swapped = cheapest[2:17]
+    second = request("POST", "/api/squad/save", token, json={"league_id": league_id, "player_ids": swapped})
+    assert second.status_code == 200
+    assert second.json()["squad_id"] == first.json()["squad_id"]
+    after = squad_rows()
+
+    assert set(after) == set(swapped)
+    assert all(after[player_id] == before[player_id] for player_id in cheapest[2:15])
+
+    stored = request("GET", f"/api/squad?league_id={league_id}", token).json()
+    assert sorted(player["id"] for player in stored["players"]) == sorted(swapped)
+
+
+def test_rejected_save_leaves_squad_untouched(member):
+    token, league_id, cheapest = member
+    request("POST", "/api/squad/save", token, json={"league_id": league_id, "player_ids": cheapest[:15]})
+    invalid = request("POST", "/api/squad/save", token, json={"league_id": league_id, "player_ids": cheapest[:14] + [999]})
+    assert invalid.status_code == 400
+    assert set(squad_rows()) == set(cheapest[:15])
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ["DATABASE_URL"] = "sqlite:///./test_api.db"
+os.environ["JWT_SECRET"] = "testsecret"
+
+from backend import standings  # noqa: E402
+from backend.app import app  # noqa: E402
+from backend.auth import create_access_token  # noqa: E402
+from backend.db import Base, SessionLocal, engine  # noqa: E402
+from backend.models import League, Lineup, LineupSlot, Membership, Player, Standing, User  # noqa: E402
+from backend.scoring import apply_stat_lines  # noqa: E402
+
+
+@pytest.fixture
+def league():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        users = [User(name=f"Team {i}", email=f"u{i}@example.com", password_hash="x") for i in range(6)]
+        db.add_all(users)
+        db.flush()
+        league = League(name="Big", created_by_user_id=users[0].id)
+        db.add(league)
+        db.flush()
+        for user, points in zip(users, [10, 30, 20, 30, 0, 5]):
+            membership = Membership(user_id=user.id, league_id=league.id)
+            db.add(membership)
+            db.flush()
+            standings.add_standing(db, membership, user).total_points = points
+        db.flush()
+        standings.rerank(db, [league.id])
+        db.commit()
+        yield league.id, [user.id for user in users]
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def get(path, user_id):
+    async def call():
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            token = create_access_token({"sub": user_id})
+            return await client.get(path, headers={"Authorization": f"Bearer {token}"})
+
+    return asyncio.run(call())
+
+
+def test_ranks_are_stored(league):
+    league_id, _ = league
+    db = SessionLocal()
+    try:
+        rows = db.query(Standing).filter(Standing.league_id == league_id).order_by(*standings.ORDER).all()
+        assert [(row.team_name, row.rank) for row in rows] == [
+            ("Team 1", 1),
+            ("Team 3", 1),
+            ("Team 2", 3),
+            ("Team 0", 4),
+            ("Team 5", 5),
+            ("Team 4", 6),
+        ]
+    finally:
+        db.close()
+
+
+def test_keyset_pagination(league):
+    league_id, user_ids = league
+    first = get(f"/api/standings/{league_id}?limit=4", user_ids[0]).json()
+    assert [row["team_name"] for row in first["standings"]] == ["Team 1", "Team 3", "Team 2", "Team 0"]
+    second = get(f"/api/standings/{league_id}?limit=4&after={first['next_cursor']}", user_ids[0]).json()
+    assert [row["team_name"] for row in second["standings"]] == ["Team 5", "Team 4"]
+    assert second["next_cursor"] is None
+
+
+def test_around_me(league):
+    league_id, user_ids = league
+    response = get(f"/api/standings/{league_id}?around_me=1", user_ids[2]).json()
+    assert [(row["team_name"], row["rank"]) for row in response["standings"]] == [
+        ("Team 3", 1),
+        ("Team 2", 3),
+        ("Team 0", 4),
+    ]
+
+
+def test_invalid_cursor(league):
+    league_id, user_ids = league
+    assert get(f"/api/standings/{league_id}?after=bogus:1", user_ids[0]).status_code == 400
+
+
+def test_new_teams_rank_above_teams_below_zero(league):
+    league_id, user_ids = league
+    db = SessionLocal()
+    try:
+        db.query(Standing).filter(Standing.user_id == user_ids[4]).update({"total_points": -4})
+        standings.rerank(db, [league_id])
+        user = User(name="Team 6", email="u6@example.com", password_hash="x")
+        db.add(user)
+        db.flush()
+        membership = Membership(user_id=user.id, league_id=league_id)
+        db.add(membership)
+        db.flush()
+        standings.add_standing(db, membership, user)
+        db.commit()
+        rows = db.query(Standing).filter(Standing.league_id == league_id).order_by(*standings.ORDER).all()
+        assert [(row.team_name, row.rank) for row in rows][-3:] == [("Team 5", 5), ("Team 6", 6), ("Team 4", 7)]
+    finally:
+        db.close()
+
+
+def test_scoring_adds_standings_missing_for_older_members(league):
+    league_id, _ = league
+    db = SessionLocal()
+    try:
+        user = User(name="Team 6", email="u6@example.com", password_hash="x")
+        player = Player(name="P", position="WR", team="X", cost=5)
+        db.add_all([user, player])
+        db.flush()
+        db.add(Membership(user_id=user.id, league_id=league_id))
+        lineup = Lineup(
+            user_id=user.id, league_id=league_id, gw=1, captain_player_id=player.id, vice_captain_player_id=player.id
+        )
+        db.add(lineup)
+        db.flush()
+        db.add(LineupSlot(lineup_id=lineup.id, player_id=player.id, starter=True))
+        apply_stat_lines(db, 1, [{"player_id": player.id, "receptions": 6}])
+        db.commit()
+        standing = db.query(Standing).filter(Standing.user_id == user.id).one()
+        assert (standing.team_name, standing.total_points, standing.rank) == ("Team 6", 12, 4)
+    finally:
+        db.close()
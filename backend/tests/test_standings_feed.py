@@ -0,0 +1,149 @@
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ["DATABASE_URL"] = "sqlite:///./test_api.db"
+os.environ["JWT_SECRET"] = "testsecret"
+
+from backend import standings  # noqa: E402
+from backend.app import app  # noqa: E402
+from backend.auth import create_user_token  # noqa: E402
+from backend.broker import Broker, InProcessBroker, Subscription  # noqa: E402
+from backend.db import Base, SessionLocal, engine  # noqa: E402
+from backend.models import League, Membership, User  # noqa: E402
+from backend.standings_feed import StandingsFeed, channel, standings_feed  # noqa: E402
+
+
+class RecordingBroker(Broker):
+    """Stand-in broker that records what is published instead of delivering it."""
+
+    def __init__(self) -> None:
+        self.published = []
+        self.channels = {}
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(channel, 8)
+        self.channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.channels.get(subscription.channel, set()).discard(subscription)
+
+    def publish(self, channel: str, message: str) -> int:
+        self.published.append((channel, message))
+        return len(self.channels.get(channel, ()))
+
+    def subscriber_count(self, channel: str) -> int:
+        return len(self.channels.get(channel, ()))
+
+
+def test_slow_subscribers_are_dropped_without_holding_up_others():
+    async def scenario():
+        broker = InProcessBroker(queue_size=2)
+        fast, slow = broker.subscribe("a"), broker.subscribe("a")
+        delivered = []
+        for message in ["1", "2", "3"]:
+            delivered.append(broker.publish("a", message))
+            assert await fast.get() == message
+        return broker, fast, slow, delivered
+
+    broker, fast, slow, delivered = asyncio.run(scenario())
+    assert delivered == [2, 2, 1]
+    assert slow.dropped and broker.dropped == 1
+    assert broker.subscriber_count("a") == 1 and not fast.closed
+    assert asyncio.run(slow.get()) is None
+
+
+def test_each_league_diff_is_computed_and_published_once():
+    broker = RecordingBroker()
+    feed = StandingsFeed(broker)
+    for _ in range(3):
+        broker.subscribe(channel(1))
+    broker.subscribe(channel(2))
+    feed._rows = {
+        1: {10: (1, 1, "Ann", 30.0), 11: (2, 2, "Ben", 20.0), 12: (3, 3, "Cat", 10.0)},
+        2: {20: (1, 1, "Dan", 5.0)},
+    }
+
+    published = feed.publish_changes(
+        {
+            1: {10: (2, 1, "Ann", 30.0), 11: (1, 2, "Ben", 40.0), 13: (3, 4, "Dot", 0.0)},
+            2: {20: (1, 1, "Dan", 5.0)},
+        }
+    )
+
+    assert published == 1 and len(broker.published) == 1
+    assert broker.published[0][0] == "standings:1"
+    diff = json.loads(broker.published[0][1])
+    assert [row["user_id"] for row in diff["changed"]] == [11, 10, 13]
+    assert diff["removed"] == [12]
+    assert feed.publish_changes({1: feed._rows[1]}) == 0
+
+
+@pytest.fixture
+def league():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        users = [User(name=f"Team {i}", email=f"u{i}@example.com", password_hash="x") for i in range(3)]
+        db.add_all(users)
+        db.flush()
+        league = League(name="Live", created_by_user_id=users[0].id)
+        db.add(league)
+        db.flush()
+        for user in users[:2]:
+            membership = Membership(user_id=user.id, league_id=league.id)
+            db.add(membership)
+            db.flush()
+            standings.add_standing(db, membership, user)
+        db.commit()
+        yield league.id, [create_user_token(user.id, user.name, user.token_version) for user in users]
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def test_subscribers_get_a_snapshot_then_diffs(league):
+    league_id, tokens = league
+    client = TestClient(app)
+    with client.websocket_connect(f"/api/standings/{league_id}/live?token={tokens[0]}") as websocket:
+        snapshot = websocket.receive_json()
+        assert snapshot["type"] == "snapshot"
+        assert [row["team_name"] for row in snapshot["standings"]] == ["Team 0", "Team 1"]
+
+        joined = client.post(
+            "/api/leagues/join", json={"league_id": league_id}, headers={"Authorization": f"Bearer {tokens[2]}"}
+        )
+        assert joined.status_code == 200
+
+        diff = websocket.receive_json()
+        assert diff == {
+            "type": "diff",
+            "league_id": league_id,
+            "changed": [{"rank": 1, "user_id": 3, "team_name": "Team 2", "points": 0.0}],
+            "removed": [],
+        }
+    assert standings_feed.broker.subscriber_count(channel(league_id)) == 0
+
+
+def test_non_members_are_refused(league):
+    league_id, tokens = league
+    client = TestClient(app)
+    with pytest.raises(WebSocketDisconnect) as refused:
+        with client.websocket_connect(f"/api/standings/{league_id}/live?token={tokens[2]}"):
+            pass
+    assert refused.value.code == 1008
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect(f"/api/standings/{league_id}/live"):
+            pass
@@ -0,0 +1,177 @@
+import asyncio
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ["DATABASE_URL"] = "sqlite:///./test_api.db"
+os.environ["JWT_SECRET"] = "testsecret"
+os.environ["ADMIN_TOKEN"] = "testadmin"
+
+from backend import standings  # noqa: E402
+from backend.app import app  # noqa: E402
+from backend.auth import AuthUser, create_access_token  # noqa: E402
+from backend.db import Base, SessionLocal, engine  # noqa: E402
+from backend.models import League, Membership, Player, SquadPlayer, Standing, Transfer, User  # noqa: E402
+from backend.schedule import clock, kickoff_schedule  # noqa: E402
+
+SQUAD = ["QB"] * 2 + ["RB"] * 4 + ["WR"] * 5 + ["TE"] * 2 + ["K", "DST"]
+
+
+@pytest.fixture
+def setup():
+    """Alice's league and a pool of fifteen squad players at 6.0, plus a cheap, a dear and a spare player."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        pool = [(position, 6) for position in SQUAD] + [("WR", 4), ("WR", 20), ("RB", 6), ("QB", 6)]
+        players = [
+            Player(name=f"P{i}", position=position, team="KC", cost=cost) for i, (position, cost) in enumerate(pool)
+        ]
+        user = User(name="Alice", email="alice@example.com", password_hash="x")
+        db.add_all([*players, user])
+        db.flush()
+        league = League(name="L", created_by_user_id=user.id)
+        db.add(league)
+        db.flush()
+        membership = Membership(user_id=user.id, league_id=league.id)
+        db.add(membership)
+        db.flush()
+        standings.add_standing(db, membership, AuthUser(id=user.id, name=user.name))
+        db.commit()
+        yield create_access_token({"sub": user.id}), league.id, [player.id for player in players]
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def call(method, path, token, body=None):
+    async def request():
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            headers = {"Authorization": f"Bearer {token}", "X-Admin-Token": "testadmin"}
+            return await client.request(method, path, json=body, headers=headers)
+
+    return asyncio.run(request())
+
+
+@pytest.fixture
+def season(setup):
+    """Gameweeks 1 to 3 kicking off on consecutive Sundays; tests move the clock between them."""
+    token = setup[0]
+    for gw, day in ((1, 13), (2, 20), (3, 27)):
+        schedule = {"kickoffs": [{"team": "KC", "kickoff": f"2026-09-{day}T17:00:00Z"}]}
+        assert call("PUT", f"/api/admin/schedule/{gw}", token, schedule).status_code == 200
+    try:
+        yield setup
+    finally:
+        clock.reset()
+        kickoff_schedule.invalidate()
+
+
+def transfer(token, league_id, gw, *moves):
+    body = {"league_id": league_id, "transfers": [{"player_out_id": o, "player_in_id": i} for o, i in moves]}
+    if gw is not None:
+        body["gw"] = gw
+    return call("POST", "/api/squad/transfers", token, body)
+
+
+def test_transfers_track_bank_free_transfers_hits_and_history(season):
+    token, league_id, ids = season
+    squad, cheap_wr, dear_wr, spare_rb, spare_qb = ids[:15], ids[15], ids[16], ids[17], ids[18]
+    wr, rb, qb = squad[6], squad[2], squad[0]
+    clock.travel_to(datetime(2026, 9, 1))
+    saved = call("POST", "/api/squad/save", token, {"league_id": league_id, "player_ids": squad})
+    assert (saved.status_code, saved.json()["bank"]) == (200, 10.0)
+    clock.travel_to(datetime(2026, 9, 16))
+
+    free = transfer(token, league_id, 2, (wr, cheap_wr))
+    assert free.status_code == 200, free.text
+    body = free.json()
+    assert (body["bank"], body["budget_used"], body["free_transfers_left"], body["hit_points"]) == (12.0, 88.0, 0, 0)
+    assert cheap_wr in {player["id"] for player in body["players"]}
+
+    # Refused moves write nothing.
+    assert transfer(token, league_id, 2, (cheap_wr, dear_wr)).json()["detail"] == "Budget exceeded"
+    assert transfer(token, league_id, 2, (rb, spare_qb)).status_code == 400
+    assert transfer(token, league_id, 2, (wr, spare_rb)).json()["detail"] == f"Player {wr} is not in the squad"
+
+    hit = transfer(token, league_id, None, (rb, spare_rb), (qb, spare_qb))
+    assert (hit.status_code, hit.json()["hit_points"]) == (200, 8)
+    assert transfer(token, league_id, 1, (spare_rb, rb)).json()["detail"] == "Transfers are open for gameweek 2, not 1"
+
+    with SessionLocal() as db:
+        assert db.query(Standing.total_points).filter(Standing.league_id == league_id).scalar() == -8
+        assert db.query(SquadPlayer).count() == 15
+        assert db.query(Transfer).filter(Transfer.counted.is_(True)).count() == 3
+
+    before = call("GET", f"/api/squad/transfers?league_id={league_id}&gw=1", token).json()
+    assert before["player_ids"] == sorted(squad)
+    after = call("GET", f"/api/squad/transfers?league_id={league_id}&gw=2", token).json()
+    assert after["player_ids"] == sorted({*squad, cheap_wr, spare_rb, spare_qb} - {wr, rb, qb})
+    assert [row["hit_points"] for row in after["transfers"][-3:]] == [0, 0, 8]
+
+    # Rescoring keeps the hit: 10 points for the starting kicker, less 8.
+    starters = [spare_qb, spare_rb, squad[3], squad[4], cheap_wr, squad[7], squad[8], squad[11], squad[13]]
+    lineup = {"league_id": league_id, "gw": 2, "starters": starters, "captain": spare_qb, "vice": spare_rb}
+    assert call("POST", "/api/lineup/set", token, lineup).status_code == 200
+    stats = {"gw": 2, "stats": [{"player_id": squad[13], "fg_made": 3, "xp_made": 1}]}
+    assert call("POST", "/api/admin/stats", token, stats).status_code == 200
+    with SessionLocal() as db:
+        assert db.query(Standing.total_points).filter(Standing.league_id == league_id).scalar() == 2
+
+
+def test_saves_after_the_first_kickoff_are_charged_as_transfers(setup):
+    token, league_id, ids = setup
+    squad, cheap_wr, spare_rb = ids[:15], ids[15], ids[17]
+    assert call("POST", "/api/squad/save", token, {"league_id": league_id, "player_ids": squad}).status_code == 200
+    schedule = {"kickoffs": [{"team": "KC", "kickoff": "2026-09-13T17:00:00Z"}]}
+    assert call("PUT", "/api/admin/schedule/1", token, schedule).status_code == 200
+    clock.travel_to(datetime(2026, 9, 20))
+    try:
+        # Swapping the kicker and the defence is two transfers: one free, one charged.
+        body = {"league_id": league_id, "player_ids": [*squad[:13], cheap_wr, spare_rb], "gw": 2}
+        assert call("POST", "/api/squad/save", token, body).status_code == 200
+    finally:
+        clock.reset()
+        kickoff_schedule.invalidate()
+
+    with SessionLocal() as db:
+        assert db.query(Standing.total_points).filter(Standing.league_id == league_id).scalar() == -4
+        counted = db.query(Transfer).filter(Transfer.counted.is_(True)).order_by(Transfer.id)
+        assert [(row.player_out_id, row.player_in_id, row.hit_points) for row in counted] == [
+            (squad[13], cheap_wr, 0),
+            (squad[14], spare_rb, 4),
+        ]
+
+
+def test_the_gameweek_is_the_servers_not_the_clients(season):
+    token, league_id, ids = season
+    squad, cheap_wr, spare_rb, spare_qb = ids[:15], ids[15], ids[17], ids[18]
+    clock.travel_to(datetime(2026, 9, 23))
+    assert call("POST", "/api/squad/save", token, {"league_id": league_id, "player_ids": squad}).status_code == 200
+
+    assert transfer(token, league_id, 3, (squad[6], cheap_wr)).json()["hit_points"] == 0
+    for gw in (4, 5, 6):
+        refused = transfer(token, league_id, gw, (squad[2], spare_rb))
+        assert refused.json()["detail"] == f"Transfers are open for gameweek 3, not {gw}"
+    assert transfer(token, league_id, None, (squad[2], spare_rb)).json()["hit_points"] == 4
+
+    # The squad page sends no gw: its save is gameweek 3's third transfer, not a change back in gameweek 1.
+    swaps = {squad[6]: cheap_wr, squad[2]: spare_rb, squad[0]: spare_qb}
+    player_ids = [swaps.get(player_id, player_id) for player_id in squad]
+    saved = call("POST", "/api/squad/save", token, {"league_id": league_id, "player_ids": player_ids})
+    assert saved.status_code == 200, saved.text
+
+    with SessionLocal() as db:
+        assert db.query(Standing.total_points).filter(Standing.league_id == league_id).scalar() == -8
+        counted = db.query(Transfer.gw, Transfer.hit_points).filter(Transfer.counted.is_(True)).order_by(Transfer.id)
+        assert counted.all() == [(3, 0), (3, 4), (3, 4)]
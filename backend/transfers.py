@@ -0,0 +1,225 @@
+import os
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from .models import Player, Squad, SquadPlayer, Standing, Transfer
+from .standings import rerank
+
+FREE_TRANSFERS_PER_GAMEWEEK = int(os.getenv("FREE_TRANSFERS_PER_GAMEWEEK", "1"))
+TRANSFER_HIT_POINTS = int(os.getenv("TRANSFER_HIT_POINTS", "4"))
+
+# (player out, player in)
+Move = Tuple[int, int]
+
+
+class TransferRejected(ValueError):
+    pass
+
+
+@dataclass
+class TransferResult:
+    squad_id: int
+    player_ids: List[int]
+    budget_used: Decimal
+    bank: Decimal
+    free_transfers_left: int
+    hit_points: int
+    log: List[Transfer] = field(default_factory=list)
+
+
+def hit_points(made: int, moves: int) -> int:
+    """Points charged for ``moves`` more transfers in a gameweek that already had ``made``."""
+    free_left = max(FREE_TRANSFERS_PER_GAMEWEEK - made, 0)
+    return max(moves - free_left, 0) * TRANSFER_HIT_POINTS
+
+
+def log_squad_save(
+    db: Session,
+    squad_id: int,
+    gw: int,
+    added: Dict[int, Decimal],
+    removed: Set[int],
+    baseline: Set[int],
+    hit: Optional[int] = None,
+) -> None:
+    """Log a full squad save.
+
+    ``baseline`` holds players a squad already had when it has no log yet
+    (squads saved before the log existed); they are logged at gameweek 0 so
+    replays still start from the right squad. Saves are logged as uncounted
+    moves unless ``hit`` is given: then each player out is paired with a
+    player in as a counted transfer, and the hit is booked on the last one.
+    The caller commits.
+    """
+    rows = [
+        {"squad_id": squad_id, "gw": 0, "player_in_id": player_id, "counted": False, "hit_points": 0}
+        for player_id in sorted(baseline)
+    ]
+    if hit is not None:
+        pairs = list(zip(sorted(removed), sorted(added)))
+        rows += [
+            {
+                "squad_id": squad_id,
+                "gw": gw,
+                "player_out_id": player_out,
+                "player_in_id": player_in,
+                "cost_in": added[player_in],
+                "counted": True,
+                "hit_points": hit if index == len(pairs) - 1 else 0,
+            }
+            for index, (player_out, player_in) in enumerate(pairs)
+        ]
+    else:
+        rows += [
+            {"squad_id": squad_id, "gw": gw, "player_out_id": player_id, "counted": False, "hit_points": 0}
+            for player_id in sorted(removed)
+        ]
+        rows += [
+            {
+                "squad_id": squad_id,
+                "gw": gw,
+                "player_in_id": player_id,
+                "cost_in": cost,
+                "counted": False,
+                "hit_points": 0,
+            }
+            for player_id, cost in sorted(added.items())
+        ]
+    if rows:
+        db.execute(insert(Transfer), rows)
+
+
+def charge_hit(db: Session, user_id: int, league_id: int, hit: int) -> None:
+    """Take ``hit`` points off the team's standings total and re-rank its league."""
+    db.execute(
+        update(Standing)
+        .where(Standing.league_id == league_id, Standing.user_id == user_id)
+        .values(total_points=Standing.total_points - hit)
+    )
+    rerank(db, [league_id])
+
+
+class LogState(NamedTuple):
+    rows: int
+    # Counted transfers already made in the gameweek asked about.
+    made: int
+    last_gw: int
+
+
+def log_state(db: Session, squad_id: int, gw: int) -> LogState:
+    """Size, last gameweek and ``gw``'s counted transfers of a squad's log, in one query.
+
+    Raises ``TransferRejected`` when ``gw`` is before the last logged change:
+    the log only grows forward, so replays in id order stay in gameweek order.
+    """
+    made = func.coalesce(func.sum(case(((Transfer.gw == gw) & Transfer.counted.is_(True), 1), else_=0)), 0)
+    last_gw = func.coalesce(func.max(Transfer.gw), 0)
+    query = select(func.count(Transfer.id), made, last_gw).where(Transfer.squad_id == squad_id)
+    state = LogState(*db.execute(query).one())
+    if gw < state.last_gw:
+        raise TransferRejected(f"Squad already changed in gameweek {state.last_gw}")
+    return state
+
+
+def make_transfers(db: Session, user_id: int, league_id: int, gw: int, moves: Sequence[Move]) -> TransferResult:
+    """Apply ``moves`` to the user's squad in order, or raise ``TransferRejected`` without writing.
+
+    Each player out must be in the squad and each player in must not be, at
+    the same position. Prices are the players' current costs; the squad's
+    bank must not go negative. Transfers beyond the gameweek's free ones cost
+    ``TRANSFER_HIT_POINTS`` each, taken off the team's standings total.
+    Only the moved ``SquadPlayer`` rows are written. The caller commits.
+    """
+    squad = db.execute(
+        select(Squad.id, Squad.bank, Squad.budget_used).where(Squad.user_id == user_id, Squad.league_id == league_id)
+    ).one_or_none()
+    if squad is None:
+        raise TransferRejected("Squad not found")
+    squad_id, bank, budget_used = squad
+    current = set(db.scalars(select(SquadPlayer.player_id).where(SquadPlayer.squad_id == squad_id)))
+    moved_ids = {player_id for move in moves for player_id in move}
+    players = {
+        player_id: (position, Decimal(cost))
+        for player_id, position, cost in db.execute(
+            select(Player.id, Player.position, Player.cost).where(Player.id.in_(moved_ids))
+        )
+    }
+
+    squad_ids = set(current)
+    spent = Decimal("0")
+    for player_out, player_in in moves:
+        if player_out not in squad_ids:
+            raise TransferRejected(f"Player {player_out} is not in the squad")
+        if player_in in squad_ids:
+            raise TransferRejected(f"Player {player_in} is already in the squad")
+        if player_in not in players:
+            raise TransferRejected("Invalid player selection")
+        if players[player_in][0] != players[player_out][0]:
+            raise TransferRejected("Transfers must swap players of the same position")
+        squad_ids.remove(player_out)
+        squad_ids.add(player_in)
+        spent += players[player_in][1] - players[player_out][1]
+    bank = Decimal(bank) - spent
+    if bank < 0:
+        raise TransferRejected("Budget exceeded")
+
+    state = log_state(db, squad_id, gw)
+    hit = hit_points(state.made, len(moves))
+    removed = current - squad_ids
+    added = squad_ids - current
+    if removed:
+        db.execute(delete(SquadPlayer).where(SquadPlayer.squad_id == squad_id, SquadPlayer.player_id.in_(removed)))
+    if added:
+        db.execute(insert(SquadPlayer), [{"squad_id": squad_id, "player_id": player_id} for player_id in added])
+    if not state.rows:
+        log_squad_save(db, squad_id, gw, {}, set(), current)
+    log = [
+        Transfer(
+            squad_id=squad_id,
+            gw=gw,
+            player_out_id=player_out,
+            player_in_id=player_in,
+            cost_out=players[player_out][1],
+            cost_in=players[player_in][1],
+            counted=True,
+            # The whole hit is booked on the last move, the one that went over the free allowance.
+            hit_points=hit if index == len(moves) - 1 else 0,
+        )
+        for index, (player_out, player_in) in enumerate(moves)
+    ]
+    db.add_all(log)
+    budget_used = Decimal(budget_used) + spent
+    db.execute(update(Squad).where(Squad.id == squad_id).values(bank=bank, budget_used=budget_used))
+    if hit:
+        charge_hit(db, user_id, league_id, hit)
+    db.flush()
+    return TransferResult(
+        squad_id=squad_id,
+        player_ids=sorted(squad_ids),
+        budget_used=budget_used,
+        bank=bank,
+        free_transfers_left=max(FREE_TRANSFERS_PER_GAMEWEEK - state.made - len(moves), 0),
+        hit_points=hit,
+        log=log,
+    )
+
+
+def squad_at(db: Session, squad_id: int, gw: int) -> Tuple[Set[int], List[Transfer]]:
+    """Rebuild the squad as it stood in ``gw`` by replaying its log, in one query on the (squad_id, gw) index.
+
+    Returns the player ids and the log rows replayed, oldest first.
+    """
+    query = select(Transfer).where(Transfer.squad_id == squad_id, Transfer.gw <= gw).order_by(Transfer.gw, Transfer.id)
+    log = list(db.scalars(query))
+    player_ids: Set[int] = set()
+    for row in log:
+        if row.player_out_id is not None:
+            player_ids.discard(row.player_out_id)
+        if row.player_in_id is not None:
+            player_ids.add(row.player_in_id)
+    return player_ids, log
+
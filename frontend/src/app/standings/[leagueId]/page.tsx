@@ -5,14 +5,26 @@ import { useParams, useRouter } from "next/navigation";
 import { useEffect, useState } from "react";
 import Button from "../../../components/Button";
 import Card from "../../../components/Card";
-import { api } from "../../../lib/api";
+import { api, liveUrl } from "../../../lib/api";
 import { getToken } from "../../../lib/auth";
 import type { Standing } from "../../../lib/types";
 
 type StandingsResponse = {
   standings: Standing[];
+  next_cursor: string | null;
 };
 
+type LiveMessage =
+  | { type: "snapshot"; standings: Standing[] }
+  | { type: "diff"; changed: Standing[]; removed: number[] };
+
+function applyDiff(current: Standing[], changed: Standing[], removed: number[]): Standing[] {
+  const byUser = new Map(current.map((entry) => [entry.user_id, entry]));
+  removed.forEach((userId) => byUser.delete(userId));
+  changed.forEach((entry) => byUser.set(entry.user_id, entry));
+  return Array.from(byUser.values()).sort((a, b) => a.rank - b.rank);
+}
+
 export default function StandingsPage() {
   const params = useParams<{ leagueId: string }>();
   const router = useRouter();
@@ -38,6 +50,33 @@ export default function StandingsPage() {
       }
     };
     load();
+
+    let socket: WebSocket | null = null;
+    let retry: ReturnType<typeof setTimeout> | undefined;
+    let closed = false;
+    const connect = () => {
+      socket = new WebSocket(liveUrl(`/standings/${leagueId}/live`));
+      socket.onmessage = (event) => {
+        const message = JSON.parse(event.data) as LiveMessage;
+        if (message.type === "snapshot") {
+          setStandings(message.standings);
+        } else {
+          setStandings((current) => applyDiff(current, message.changed, message.removed));
+        }
+      };
+      socket.onclose = (event) => {
+        // 1008: not allowed to watch this league; anything else is worth a reconnect.
+        if (!closed && event.code !== 1008) {
+          retry = setTimeout(connect, 3000);
+        }
+      };
+    };
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retry);
+      socket?.close();
+    };
   }, [params.leagueId, router]);
 
   return (
@@ -45,7 +84,7 @@ export default function StandingsPage() {
       <div className="flex items-center justify-between">
         <div>
           <h1 className="text-3xl mb-2">League Standings</h1>
-          <p className="text-slate-600">Check how your squad stacks up. Points are placeholders for now.</p>
+          <p className="text-slate-600">Check how your squad stacks up.</p>
           {error && <p className="text-red-600 mt-2">{error}</p>}
         </div>
         <Link href="/dashboard">
@@ -62,9 +101,9 @@ export default function StandingsPage() {
             </tr>
           </thead>
           <tbody>
-            {standings.map((entry, index) => (
-              <tr key={entry.team_name} className="border-t border-slate-200">
-                <td className="py-3">{index + 1}</td>
+            {standings.map((entry) => (
+              <tr key={entry.user_id} className="border-t border-slate-200">
+                <td className="py-3">{entry.rank}</td>
                 <td className="py-3">{entry.team_name}</td>
                 <td className="py-3 text-right">{entry.points}</td>
               </tr>
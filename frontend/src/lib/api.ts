@@ -23,3 +23,10 @@ export async function api<T>(path: string, options: RequestInit = {}): Promise<T
   }
   return data as T;
 }
+
+export function liveUrl(path: string): string {
+  const base = process.env.NEXT_PUBLIC_API_BASE ?? "http://localhost:8000/api";
+  const token = getToken();
+  const url = `${base.replace(/^http/, "ws")}${path}`;
+  return token ? `${url}?token=${encodeURIComponent(token)}` : url;
+}
@@ -43,6 +43,8 @@ export type LineupRequest = {
 };
 
 export type Standing = {
+  rank: number;
+  user_id: number;
   team_name: string;
   points: number;
 };